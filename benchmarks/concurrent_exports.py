@@ -0,0 +1,61 @@
+"""
+Stress test for running many exports at once on one event loop.
+
+Every export gets its own guild, timezone, clock format and bot, so state leaking from one export to
+another (timezone, resolved mentions, dropdown menu ids, cache entries) shows up as a difference against
+the same transcript rendered on its own. Exits non-zero on any mismatch.
+
+Usage: python -m benchmarks.concurrent_exports [exports] [messages]
+"""
+import asyncio
+import re
+import sys
+import time
+
+import chat_exporter
+from benchmarks.fixtures import FakeBot, FakeMember, build_corpus
+
+TIMEZONES = ["UTC", "Europe/Madrid", "America/New_York", "Asia/Tokyo", "Australia/Sydney"]
+
+
+def normalize(transcript):
+    # The header carries the wall clock time of the export
+    return re.sub(r"generated on [^\"<]*", "generated on", transcript)
+
+
+async def render(index, count):
+    channel, messages = build_corpus(count, seed=index, guild_id=100 + index)
+    bot = FakeBot([FakeMember(999, f"ghost {index}")])
+    transcript = await chat_exporter.raw_export(
+        channel,
+        messages,
+        tz_info=TIMEZONES[index % len(TIMEZONES)],
+        bot=bot,
+        military_time=bool(index % 2),
+    )
+    return normalize(transcript)
+
+
+async def main(exports, count):
+    start = time.perf_counter()
+    expected = [await render(index, count) for index in range(exports)]
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(render(index, count) for index in range(exports)))
+    concurrent = time.perf_counter() - start
+
+    mismatches = [index for index in range(exports) if results[index] != expected[index]]
+    print(f"{exports} exports x {count} messages")
+    print(f"sequential {sequential:.2f}s, concurrent {concurrent:.2f}s")
+    if mismatches:
+        print(f"FAILED: {len(mismatches)} transcripts differ from their isolated render: {mismatches}")
+        return 1
+
+    print("OK: every concurrent transcript matches its isolated render")
+    return 0
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    sys.exit(asyncio.run(main(*args)) if args else asyncio.run(main(20, 150)))
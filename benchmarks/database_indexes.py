@@ -0,0 +1,72 @@
+"""
+Benchmark for the ids lookup done when a ticket is closed (Database.get_id_by_id).
+
+Every ticket ever opened leaves a row in ids, and before the indexes were added the lookup by object_id scanned
+the whole table. This fills a database with the schema the bot used to create, times the lookup, then opens it
+with Database so the pending migrations add the indexes, and times the lookup again.
+
+Usage: python -m benchmarks.database_indexes [tickets] [lookups]
+"""
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from discordbot.database.db import Database
+
+
+def legacy_database(path, tickets):
+    connection = sqlite3.connect(path)
+    connection.execute(
+        'CREATE TABLE ids (id INTEGER PRIMARY KEY AUTOINCREMENT, object_id INTEGER NOT NULL, '
+        'name TEXT NOT NULL, type TEXT NOT NULL)'
+    )
+    connection.executemany(
+        'INSERT INTO ids (object_id, name, type) VALUES (?, ?, ?)',
+        ((10_000 + ticket, f'TICKET_{ticket}', 'ticket') for ticket in range(tickets))
+    )
+    connection.commit()
+    connection.close()
+
+
+def query_plan(database):
+    rows = database.conn.execute('EXPLAIN QUERY PLAN SELECT * FROM ids WHERE object_id = ?', (0,)).fetchall()
+    return rows[0][-1]
+
+
+def timed(database, tickets, lookups):
+    start = time.perf_counter()
+    for lookup in range(lookups):
+        database.get_id_by_id(10_000 + lookup * 7919 % tickets)
+    return (time.perf_counter() - start) / lookups * 1_000_000
+
+
+def main(tickets, lookups):
+    logger.remove()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / 'database.db')
+        legacy_database(path, tickets)
+
+        database = Database(path)
+        database.open(migrate=False)
+        before, before_plan = timed(database, tickets, lookups), query_plan(database)
+        database.close()
+
+        database.open()
+        after, after_plan = timed(database, tickets, lookups), query_plan(database)
+        database.close()
+
+    print(f"{tickets} tickets, {lookups} lookups by object_id")
+    print(f"before migrations {before:10.1f} us  {before_plan}")
+    print(f"after migrations  {after:10.1f} us  {after_plan}")
+    return 0
+
+
+if __name__ == "__main__":
+    tickets = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    sys.exit(main(tickets, lookups))
@@ -0,0 +1,79 @@
+"""
+Benchmark for the database work done on every button click.
+
+Before the bot shared one Database, every handler built its own: checking the db folder, opening a new sqlite3
+connection and running the CREATE TABLE IF NOT EXISTS statements before its query. This compares that against
+the query on the shared, already open database:
+- verification click, one lookup (VerificationButton.callback)
+- send_verification, three writes in a row
+
+Usage: python -m benchmarks.database_lifecycle [clicks]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from discordbot.database.db import Database
+
+
+def per_database_click(path):
+    database = Database(path)
+    database.open()
+    database.get_id_by_name('VERIFICATION_ROLE')
+
+
+def per_database_setup(path):
+    for object_id, name, id_type in (
+        (1, 'VERIFICATION_CHANNEL', 'channel'),
+        (2, 'VERIFICATION_MESSAGE', 'message'),
+        (3, 'VERIFICATION_ROLE', 'role'),
+    ):
+        database = Database(path)
+        database.open()
+        database.add_id(object_id, name, id_type)
+
+
+def shared_click(database):
+    database.get_id_by_name('VERIFICATION_ROLE')
+
+
+def shared_setup(database):
+    database.add_id(1, 'VERIFICATION_CHANNEL', 'channel')
+    database.add_id(2, 'VERIFICATION_MESSAGE', 'message')
+    database.add_id(3, 'VERIFICATION_ROLE', 'role')
+
+
+def timed(function, argument, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(argument)
+    return (time.perf_counter() - start) / repeat * 1_000_000
+
+
+def main(clicks):
+    # Entry deletions are logged, keep them out of the timings
+    logger.remove()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / 'database.db')
+        database = Database(path)
+        database.open()
+        shared_setup(database)
+
+        results = [
+            ("verification click", timed(per_database_click, path, clicks), timed(shared_click, database, clicks)),
+            ("send_verification", timed(per_database_setup, path, clicks // 10), timed(shared_setup, database, clicks // 10)),
+        ]
+        database.close()
+
+    print(f"{'':<20}{'per call us':>14}{'shared us':>14}{'saved us':>14}")
+    for name, per_call, shared in results:
+        print(f"{name:<20}{per_call:>14.1f}{shared:>14.1f}{per_call - shared:>14.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
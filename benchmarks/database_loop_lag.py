@@ -0,0 +1,84 @@
+"""
+Benchmark for how long database work blocks the event loop during a join storm.
+
+A ticker task measures how late the loop wakes it up while member joins are written, once with the synchronous
+Database called straight from the coroutines and once with AsyncDatabase, whose queries run on the writer and
+reader threads. Every join writes the member and then reads the ticket setup, like on_member_join and a click.
+
+Usage: python -m benchmarks.database_loop_lag [joins]
+"""
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from discordbot.database import AsyncDatabase, Database
+
+TICK = 0.001
+
+
+async def ticker(lags, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def storm(join, joins):
+    lags = []
+    stop = asyncio.Event()
+    task = asyncio.create_task(ticker(lags, stop))
+    await asyncio.sleep(TICK * 5)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(join(index) for index in range(joins)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await task
+    lags.sort()
+    return elapsed, lags[int(len(lags) * 0.99) - 1] * 1000 if lags else 0.0, lags[-1] * 1000 if lags else 0.0
+
+
+async def main(joins):
+    # Every query is fast, the logs would only add noise to the timings
+    logger.remove()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database(str(Path(directory) / 'sync.db'))
+        database.open()
+
+        async def sync_join(index):
+            await asyncio.sleep(0)
+            database.add_discord_user(index, f'member {index}', '2025-01-01 00:00:00')
+            database.get_id_by_name('TICKET_CHANNEL')
+
+        sync_results = await storm(sync_join, joins)
+        database.close()
+
+        async_database = AsyncDatabase(str(Path(directory) / 'async.db'))
+        await async_database.open()
+
+        async def async_join(index):
+            await async_database.add_discord_user(index, f'member {index}', '2025-01-01 00:00:00')
+            await async_database.get_id_by_name('TICKET_CHANNEL')
+
+        async_results = await storm(async_join, joins)
+        metrics = async_database.metrics()
+        await async_database.close()
+
+    print(f"{joins} joins")
+    print(f"{'':<16}{'total s':>10}{'p99 lag ms':>12}{'max lag ms':>12}")
+    for name, (elapsed, p99, worst) in (("Database", sync_results), ("AsyncDatabase", async_results)):
+        print(f"{name:<16}{elapsed:>10.3f}{p99:>12.2f}{worst:>12.2f}")
+    for kind, values in metrics.items():
+        print(f"{kind:<6} " + ", ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                                          for key, value in values.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)))
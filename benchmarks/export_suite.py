@@ -0,0 +1,161 @@
+"""
+Offline benchmark suite for the exporter, driven by the synthetic fixtures in benchmarks.fixtures.
+
+Every corpus runs in a fresh interpreter so peak RSS belongs to that corpus alone. Each run renders the
+corpus three times:
+- raw_export, timed, for messages/sec
+- raw_stream_export, with the time between consecutive messages written to the sink as per-message latency
+- raw_export again under tracemalloc, for the peak of Python allocations
+
+Results can be saved as JSON and compared against an earlier run to track regressions.
+
+Usage: python -m benchmarks.export_suite [--corpus NAME ...] [--scale FACTOR] [--no-tracemalloc]
+                                         [--save results.json] [--baseline results.json]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import chat_exporter
+from benchmarks.fixtures import build_themed_corpus
+
+# Corpus name -> (theme, messages)
+CORPORA = {
+    "plain": ("plain", 2000),
+    "markdown": ("markdown", 2000),
+    "mentions": ("mentions", 2000),
+    "emoji": ("emoji", 2000),
+    "embeds": ("embeds", 1000),
+    "mixed": ("mixed", 2000),
+    "channel-100k": ("mixed", 100_000),
+}
+COLUMNS = ("msgs/s", "p50 ms", "p90 ms", "p99 ms", "max ms", "rss MiB", "traced MiB")
+
+
+class TimingSink:
+    """Text sink recording when every chunk arrives."""
+
+    def __init__(self):
+        self.times = []
+
+    def write(self, chunk):
+        self.times.append(time.perf_counter())
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def export(theme, count):
+    channel, messages = build_themed_corpus(theme, count)
+    return await chat_exporter.raw_export(channel, messages, support_dev=False)
+
+
+async def run_corpus(name, scale, trace):
+    theme, count = CORPORA[name]
+    count = max(1, int(count * scale))
+
+    gc.collect()
+    start = time.perf_counter()
+    await export(theme, count)
+    elapsed = time.perf_counter() - start
+
+    channel, messages = build_themed_corpus(theme, count)
+    sink = TimingSink()
+    await chat_exporter.raw_stream_export(channel, messages, sink, support_dev=False)
+    # The first chunk is the page header and the last two close the chat log and write the summary
+    latencies = [(b - a) * 1000 for a, b in zip(sink.times[1:-2], sink.times[2:-1])]
+
+    traced = 0.0
+    if trace:
+        tracemalloc.start()
+        await export(theme, count)
+        traced = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+
+    return {
+        "corpus": name,
+        "messages": count,
+        "msgs/s": count / elapsed,
+        "p50 ms": statistics.median(latencies) if latencies else 0.0,
+        "p90 ms": percentile(latencies, 0.90),
+        "p99 ms": percentile(latencies, 0.99),
+        "max ms": max(latencies, default=0.0),
+        # ru_maxrss is in KiB on Linux and bytes on macOS
+        "rss MiB": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10),
+        "traced MiB": traced,
+    }
+
+
+def run_isolated(name, scale, trace):
+    command = [sys.executable, "-m", "benchmarks.export_suite", "--child", name, "--scale", str(scale)]
+    if not trace:
+        command.append("--no-tracemalloc")
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def print_table(results, baseline):
+    print(f"{'corpus':<14}{'messages':>10}" + "".join(f"{column:>12}" for column in COLUMNS))
+    for result in results:
+        print(f"{result['corpus']:<14}{result['messages']:>10}" + "".join(
+            f"{result[column]:>12.2f}" for column in COLUMNS
+        ))
+
+        previous = baseline.get(result["corpus"])
+        if previous and previous["messages"] == result["messages"]:
+            print(f"{'  vs baseline':<24}" + "".join(
+                f"{_change(previous[column], result[column]):>12}" for column in COLUMNS
+            ))
+
+
+def _change(before, after):
+    # Zero when the measurement was skipped in one of the runs
+    if not before or not after:
+        return "-"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", nargs="+", choices=list(CORPORA), default=list(CORPORA))
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every corpus size, e.g. 0.1 for a quick run")
+    parser.add_argument("--no-tracemalloc", dest="trace", action="store_false", help="skip the tracemalloc pass")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against results saved by an earlier run")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run_corpus(args.child, args.scale, args.trace))))
+        return 0
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {result["corpus"]: result for result in json.load(f)}
+
+    results = []
+    for name in args.corpus:
+        results.append(run_isolated(name, args.scale, args.trace))
+        print(f"finished {name}", file=sys.stderr)
+
+    print_table(results, baseline)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+"""
+Offline stand-ins for the discord objects the exporter reads, so transcripts can be rendered without a
+gateway connection. Fetches yield to the event loop like real HTTP calls would.
+"""
+import asyncio
+import datetime
+import random
+
+import discord
+
+
+BASE_TIME = datetime.datetime(2025, 3, 1, 12, 0, 0, tzinfo=datetime.timezone.utc)
+
+
+class FakeFlags:
+    def __init__(self, verified_bot=False):
+        self.verified_bot = verified_bot
+
+
+class FakeRole:
+    def __init__(self, role_id, name, colour=0):
+        self.id = role_id
+        self.name = name
+        self.color = discord.Colour(colour)
+        self.colour = self.color
+        self.icon = None
+
+
+class FakeMember:
+    def __init__(self, member_id, name, bot=False, colour=0, joined=True):
+        self.id = member_id
+        self.name = name
+        self.discriminator = "0"
+        self.bot = bot
+        self.public_flags = FakeFlags(verified_bot=bot)
+        self.display_avatar = f"https://cdn.discordapp.com/avatars/{member_id}/a.png"
+        self.display_name = name.title()
+        self.created_at = BASE_TIME - datetime.timedelta(days=400)
+        if joined:
+            self.joined_at = BASE_TIME - datetime.timedelta(days=30)
+        self.colour = discord.Colour(colour)
+        self.color = self.colour
+        self.display_icon = None
+        self.top_role = None
+        self.mention = f"<@{member_id}>"
+
+
+class FakeReference:
+    def __init__(self, message_id, channel_id):
+        self.message_id = message_id
+        self.channel_id = channel_id
+
+
+class FakeAttachment:
+    def __init__(self, attachment_id, filename, content_type, size):
+        self.id = attachment_id
+        self.filename = filename
+        self.content_type = content_type
+        self.size = size
+        self.url = f"https://cdn.discordapp.com/attachments/1/{attachment_id}/{filename}"
+        self.proxy_url = f"https://media.discordapp.net/attachments/1/{attachment_id}/{filename}"
+
+
+class FakeReaction:
+    def __init__(self, emoji, count):
+        self.emoji = emoji
+        self.count = count
+
+
+class FakeMessage:
+    def __init__(self, message_id, channel, author, content, created_at, **kwargs):
+        self.id = message_id
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.created_at = created_at
+        self.edited_at = kwargs.get("edited_at")
+        self.type = kwargs.get("type", discord.MessageType.default)
+        self.reference = kwargs.get("reference")
+        self.embeds = kwargs.get("embeds", [])
+        self.attachments = kwargs.get("attachments", [])
+        self.components = kwargs.get("components", [])
+        self.reactions = kwargs.get("reactions", [])
+        self.stickers = []
+        self.interaction = None
+        self.interaction_metadata = None
+        self.webhook_id = None
+        self.mentions = kwargs.get("mentions", [])
+
+
+class FakeGuild:
+    def __init__(self, guild_id=100, name="Veryx Network"):
+        self.id = guild_id
+        self.name = name
+        self.icon = "https://cdn.discordapp.com/icons/100/icon.png"
+        self.members = {}
+        self.channels = {}
+        self.roles = {}
+        self.fetch_member_calls = 0
+
+    def get_member(self, member_id):
+        return self.members.get(member_id)
+
+    async def fetch_member(self, member_id):
+        self.fetch_member_calls += 1
+        await asyncio.sleep(0)
+        raise discord.NotFound.__new__(discord.NotFound)
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_role(self, role_id):
+        return self.roles.get(role_id)
+
+
+class FakeChannel:
+    def __init__(self, guild, channel_id=200, name="support-ticket-user"):
+        self.id = channel_id
+        self.name = name
+        self.guild = guild
+        self.topic = None
+        self.created_at = BASE_TIME - datetime.timedelta(days=1)
+        self.type = discord.ChannelType.text
+        self.remote = {}
+        self.fetch_message_calls = 0
+        self.history_calls = 0
+        self.page_latency = 0
+        guild.channels[channel_id] = self
+
+    async def fetch_message(self, message_id):
+        self.fetch_message_calls += 1
+        await asyncio.sleep(0)
+        message = self.remote.get(message_id)
+        if message is None:
+            raise discord.NotFound.__new__(discord.NotFound)
+        return message
+
+    async def history(self, limit=100, before=None, after=None, around=None, oldest_first=None):
+        """Serves the messages in ``remote`` in pages of 100, waiting ``page_latency`` seconds for every page."""
+        self.history_calls += 1
+        await asyncio.sleep(0)
+        ordered = sorted(self.remote.values(), key=lambda message: message.id)
+        if around is not None:
+            index = sum(1 for message in ordered if message.id < around.id)
+            ordered = ordered[max(0, index - limit // 2):index + limit // 2 + 1]
+        else:
+            ordered = [
+                message for message in ordered
+                if (before is None or message.id < before.id) and (after is None or message.id > after.id)
+            ]
+            if not (oldest_first if oldest_first is not None else after is not None):
+                ordered.reverse()
+        for index, message in enumerate(ordered[:limit]):
+            if index % 100 == 0:
+                await asyncio.sleep(self.page_latency)
+            yield message
+
+
+class FakeBot:
+    def __init__(self, users=()):
+        self.users = {user.id: user for user in users}
+
+    def get_user(self, user_id):
+        return self.users.get(user_id)
+
+
+def make_embed(i):
+    embed = discord.Embed(
+        title=f"Ticket **{i}** opened",
+        description="Hello <@1>, staff will be with you soon.\n> please wait\n[docs](https://veryx.us/docs) `code` 🎉",
+        colour=discord.Colour.blurple(),
+    )
+    embed.set_author(name="Veryx Network", icon_url="https://i.imgur.com/Q8BD0l5.jpeg")
+    embed.add_field(name="🕒 Open Time", value="<t:1740830400:F>", inline=True)
+    embed.add_field(name="👤 Opened By", value="<@2>", inline=False)
+    embed.set_footer(text="Veryx support", icon_url="https://i.imgur.com/Q8BD0l5.jpeg")
+    embed.set_thumbnail(url="https://i.imgur.com/Q8BD0l5.jpeg")
+    return embed
+
+
+def make_components():
+    return [
+        discord.ActionRow({"type": 1, "components": [
+            {"type": 2, "style": 4, "label": "Close", "custom_id": "close_ticket"},
+            {"type": 2, "style": 5, "label": "Site", "url": "https://veryx.us", "emoji": {"name": "🌐"}},
+        ]}),
+        discord.ActionRow({"type": 1, "components": [
+            {"type": 3, "custom_id": "ticket_dropdown", "placeholder": "Pick a **category**", "options": [
+                {"label": "Support", "value": "support", "description": "Get help", "emoji": {"name": "🛠️"}},
+                {"label": "Bug *report*", "value": "bug"},
+            ]},
+        ]}),
+    ]
+
+
+CONTENTS = [
+    "hello there",
+    "Can someone help me with my account? I cannot log in since yesterday.",
+    "**bold** and *italic* and __underline__ and ~~strike~~ with ||spoiler||",
+    "```py\nprint('hi')\n  indented\n```",
+    "inline `code` and ``double`` here",
+    "# Header\n## Sub\n### Third\nplain",
+    "> quoted line\n> second quote\nafter",
+    "- item one\n- item two\n  - nested\nend",
+    "link https://veryx.us/store and <https://example.com/silent> and [named](https://x.y)",
+    "hey <@1> and <@2> and <@999> in <#200> with <@&300> @everyone",
+    "the time is <t:1740830400:R> and <t:1740830400:d> and <t:1740830400>",
+    "emoji party 🎉🔥 thumbs 👍🏽 family 👨‍👩‍👧 flag 🇺🇸 heart ❤️",
+    "custom <:veryx:123456789> and <a:spin:987654321>",
+    "use </ticket close:1234> to close",
+    "mixed **bold `code` inside** and 😀 plus <@1>",
+    "<script>alert('x')</script> & stuff",
+]
+
+
+def _build_channel(guild_id=100, extra_members=0):
+    """A guild and channel with the regular cast (staff, customer, bot, a member who left) plus extra members."""
+    guild = FakeGuild(guild_id)
+    channel = FakeChannel(guild)
+    staff = FakeMember(1, "staffer", colour=0xE67E22)
+    user = FakeMember(2, "customer")
+    bot = FakeMember(3, "veryx", bot=True)
+    gone = FakeMember(4, "leaver", joined=False)
+    for m in (staff, user, bot):
+        guild.members[m.id] = m
+    for member_id in range(10, 10 + extra_members):
+        guild.members[member_id] = FakeMember(member_id, f"member{member_id}", colour=member_id * 0x010203)
+    guild.roles[300] = FakeRole(300, "Staff", 0x3498DB)
+    return guild, channel, [staff, user, user, bot, gone]
+
+
+def build_corpus(count=120, seed=7, reply_misses=True, guild_id=100):
+    """Build a deterministic channel with ``count`` messages of mixed content."""
+    rng = random.Random(seed)
+    guild, channel, authors = _build_channel(guild_id)
+    user, bot = authors[1], authors[3]
+
+    old = FakeMessage(50, channel, user, "an **old** message outside window", BASE_TIME - datetime.timedelta(days=2))
+    channel.remote[old.id] = old
+
+    messages = []
+    t = BASE_TIME
+    for i in range(count):
+        author = rng.choice(authors)
+        t = t + datetime.timedelta(minutes=rng.choice([0, 1, 2, 5, 30]))
+        kwargs = {}
+        roll = rng.random()
+        if author is bot and roll < 0.6:
+            kwargs["embeds"] = [make_embed(i % 3)]
+            kwargs["components"] = make_components()
+        if roll > 0.85:
+            kwargs["reactions"] = [FakeReaction("👍", 2), FakeReaction("<:veryx:123456789>", 1)]
+        if 0.8 < roll <= 0.85:
+            kwargs["attachments"] = [
+                FakeAttachment(5000 + i, f"shot{i}.png", "image/png", 20480),
+                FakeAttachment(6000 + i, f"log{i}.txt", "text/plain", 3000),
+            ]
+        if messages and 0.7 < roll <= 0.8:
+            kwargs["reference"] = FakeReference(rng.choice(messages).id, channel.id)
+        if reply_misses and 0.65 < roll <= 0.7:
+            kwargs["reference"] = FakeReference(rng.choice([50, 51]), channel.id)
+        if roll < 0.05:
+            kwargs["edited_at"] = t + datetime.timedelta(minutes=3)
+        content = rng.choice(CONTENTS)
+        messages.append(FakeMessage(1000 + i, channel, author, content, t, **kwargs))
+    return channel, messages
+
+
+PLAIN_CONTENTS = [
+    "hello there",
+    "Can someone help me with my account? I cannot log in since yesterday.",
+    "I bought a rank on the store but it did not show up in game, order 48213",
+    "thanks, that fixed it!",
+    "ok",
+    "Could you send me the username you use in game and the email of the purchase please",
+]
+
+MARKDOWN_CONTENTS = [
+    "**bold** *italic* __underline__ ~~strike~~ ||spoiler|| ***both*** __*mixed*__ and **`code` in bold**",
+    "```py\ndef close(ticket):\n    return ticket.close()\n```\nand ```json\n{\"a\": 1}\n```",
+    "# Rules\n## Chat\n- be nice\n- no spam\n  - not even a little\n### Voice\n> keep it down\n> please\nend",
+    ">>> multi line\nblock **quote**\nwith *all* the ~~things~~",
+    "inline `code` ``double`` [docs](https://veryx.us/docs) <https://example.com> https://veryx.us/store " * 3,
+    "*a* **b** *c* **d** __e__ ~~f~~ ||g|| `h` " * 8,
+]
+
+EMOJI_CONTENTS = [
+    "🎉",
+    "😀😃😄😁😆😅😂🤣",
+    "thank you so much 🎉🎉 you are the best ❤️ 👍🏽 👨‍👩‍👧 🇺🇸 #️⃣",
+    "custom <:veryx:123456789> and <a:spin:987654321> and <:pepe:111111111>",
+    "🔥 " * 20,
+    "still broken 😭 see screenshot 👇🏽 ✅ ❌ ⚠️",
+]
+
+
+def _mention_content(rng, extra_members):
+    member_ids = [1, 2, 3, 4, 999] + list(range(10, 10 + extra_members))
+    mentions = " ".join(f"<@{rng.choice(member_ids)}>" for _ in range(rng.randint(1, 6)))
+    return f"{mentions} please check <#200> with <@&300> at <t:{1740830400 + rng.randint(0, 10**6)}:R> @here"
+
+
+def build_themed_corpus(theme, count=1000, seed=7):
+    """Build a deterministic channel of ``count`` messages dominated by one kind of content.
+
+    Themes: plain, markdown, mentions, emoji, embeds and mixed (build_corpus)."""
+    if theme == "mixed":
+        return build_corpus(count, seed=seed, reply_misses=False)
+
+    rng = random.Random(seed)
+    guild, channel, authors = _build_channel(extra_members=50 if theme == "mentions" else 0)
+    bot = authors[3]
+
+    messages = []
+    t = BASE_TIME
+    for i in range(count):
+        t = t + datetime.timedelta(minutes=rng.choice([0, 1, 2, 5, 30]))
+        author = rng.choice(authors)
+        kwargs = {}
+        if theme == "plain":
+            content = rng.choice(PLAIN_CONTENTS)
+        elif theme == "markdown":
+            content = rng.choice(MARKDOWN_CONTENTS)
+        elif theme == "mentions":
+            content = _mention_content(rng, 50)
+        elif theme == "emoji":
+            content = rng.choice(EMOJI_CONTENTS)
+            if rng.random() < 0.3:
+                kwargs["reactions"] = [FakeReaction("👍", 2), FakeReaction("<:veryx:123456789>", 1)]
+        elif theme == "embeds":
+            author = bot
+            content = ""
+            kwargs["embeds"] = [make_embed(i + n) for n in range(rng.randint(1, 3))]
+        else:
+            raise ValueError(f"Unknown corpus theme {theme!r}")
+        messages.append(FakeMessage(1000 + i, channel, author, content, t, **kwargs))
+    return channel, messages
@@ -0,0 +1,96 @@
+"""
+Benchmark for rendering a channel while its history is still being fetched.
+
+The channel history is served in pages of 100 messages with a fixed latency per page, standing in for the REST
+round trips. The same channel is exported three ways:
+- fetch only, the time to read the whole history
+- serial, reading the whole history newest first and then rendering it (raw_export reverses the messages)
+- overlapped, export() rendering every page while the next ones are fetched
+- streamed, stream_export() writing every page to the sink while the next ones are fetched
+
+The overlapped export should take about max(fetch, render) instead of fetch + render, and the streamed one
+should write its first messages after about one page of history instead of after the whole of it. The streamed
+head can not count the messages, everything else must match the serial transcript.
+
+Usage: python -m benchmarks.history_overlap [messages] [page latency ms]
+"""
+import asyncio
+import re
+import sys
+import time
+
+import chat_exporter
+from benchmarks.fixtures import build_corpus
+
+
+def normalize(transcript):
+    # The header carries the wall clock time of the export
+    return re.sub(r"generated on [^\"<]*", "generated on", transcript)
+
+
+def uncounted(transcript):
+    return re.sub(r" with \d+ messages\.", ".", transcript)
+
+
+class TimingSink:
+    """Text sink keeping the transcript and when the first message arrived."""
+
+    def __init__(self, start):
+        self.start = start
+        self.chunks = []
+        self.first_message = None
+
+    def write(self, chunk):
+        if self.first_message is None and 'id="chatlog__message-container-' in chunk:
+            self.first_message = time.perf_counter() - self.start
+        self.chunks.append(chunk)
+
+
+def build_channel(count, page_latency):
+    channel, messages = build_corpus(count)
+    channel.remote.update((message.id, message) for message in messages)
+    channel.page_latency = page_latency
+    return channel
+
+
+async def main(count, page_latency):
+    channel = build_channel(count, page_latency)
+    start = time.perf_counter()
+    messages = [message async for message in channel.history(limit=None)]
+    fetch = time.perf_counter() - start
+    serial = normalize(await chat_exporter.raw_export(channel, messages, military_time=True, support_dev=False))
+    serial_time = time.perf_counter() - start
+    render = serial_time - fetch
+
+    channel = build_channel(count, page_latency)
+    start = time.perf_counter()
+    overlapped = normalize(await chat_exporter.export(channel, support_dev=False))
+    overlapped_time = time.perf_counter() - start
+
+    channel = build_channel(count, page_latency)
+    start = time.perf_counter()
+    sink = TimingSink(start)
+    await chat_exporter.stream_export(channel, sink, support_dev=False)
+    streamed_time = time.perf_counter() - start
+    streamed = normalize("".join(sink.chunks))
+
+    print(f"{count} messages, {page_latency * 1000:.0f} ms per page of history")
+    print(f"fetch      {fetch:8.3f}s")
+    print(f"render     {render:8.3f}s")
+    print(f"serial     {serial_time:8.3f}s")
+    print(f"overlapped {overlapped_time:8.3f}s ({serial_time / overlapped_time:.2f}x)")
+    print(f"streamed   {streamed_time:8.3f}s, first message written after {sink.first_message:.3f}s")
+
+    if overlapped != serial:
+        print("overlapped transcript differs from the serial one")
+        return 1
+    if uncounted(streamed) != uncounted(serial):
+        print("streamed transcript differs from the serial one")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.05
+    sys.exit(asyncio.run(main(messages, latency)))
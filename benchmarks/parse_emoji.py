@@ -0,0 +1,90 @@
+"""
+Messages/sec of ParseMarkdown.parse_emoji before and after the ASCII fast path.
+
+The "before" column replays the previous implementation (every character passed to
+grapheme segmentation and one awaited convert() per grapheme) against the same twemoji
+index, so the numbers only differ by the scanning strategy.
+
+Usage: python -m benchmarks.parse_emoji [messages]
+"""
+import asyncio
+import random
+import re
+import sys
+import time
+
+from grapheme import graphemes
+
+from chat_exporter.ext.emoji_convert import convert_grapheme
+from chat_exporter.parse.markdown import ParseMarkdown
+
+ASCII_MESSAGES = [
+    "Can someone help me with my account? I cannot log in since yesterday.",
+    "I bought a rank on the store but it did not show up in game, order #48213",
+    "thanks, that fixed it!",
+    "**Important:** please attach a screenshot of the error &lt;:veryx:123456789&gt;",
+]
+EMOJI_MESSAGES = [
+    "thank you so much 🎉🎉 you are the best ❤️",
+    "still broken 😭 see screenshot 👇🏽",
+    "gg 👨‍👩‍👧 🇺🇸 #️⃣ &lt;a:spin:987654321&gt;",
+]
+
+
+def corpus(count, emoji_ratio, seed=1):
+    rng = random.Random(seed)
+    return [
+        rng.choice(EMOJI_MESSAGES) if rng.random() < emoji_ratio else rng.choice(ASCII_MESSAGES)
+        for _ in range(count)
+    ]
+
+
+async def legacy_parse_emoji(content):
+    holder = (
+        [r"&lt;:.*?:(\d*)&gt;", '<img class="emoji emoji--small" src="https://cdn.discordapp.com/emojis/%s.png">'],
+        [r"&lt;a:.*?:(\d*)&gt;", '<img class="emoji emoji--small" src="https://cdn.discordapp.com/emojis/%s.gif">'],
+        [r"<:.*?:(\d*)>", '<img class="emoji emoji--small" src="https://cdn.discordapp.com/emojis/%s.png">'],
+        [r"<a:.*?:(\d*)>", '<img class="emoji emoji--small" src="https://cdn.discordapp.com/emojis/%s.gif">'],
+    )
+
+    async def convert(char):
+        return convert_grapheme.__wrapped__(char)
+
+    x = []
+    for ch in graphemes([word for word in content]):
+        x.append(await convert(ch))
+    content = "".join(x)
+
+    for p, r in holder:
+        match = re.search(p, content)
+        while match is not None:
+            content = content.replace(content[match.start():match.end()], r % match.group(1))
+            match = re.search(p, content)
+    return content
+
+
+async def current_parse_emoji(content):
+    return await ParseMarkdown(content).special_emoji_flow()
+
+
+async def measure(func, messages):
+    start = time.perf_counter()
+    for message in messages:
+        await func(message)
+    return len(messages) / (time.perf_counter() - start)
+
+
+async def main(count):
+    print(f"{'corpus':<16}{'before msg/s':>14}{'after msg/s':>14}{'speedup':>10}")
+    for name, ratio in (("ascii", 0.0), ("mixed (10%)", 0.1), ("emoji-heavy", 1.0)):
+        messages = corpus(count, ratio)
+        for message in messages[:50]:
+            assert await legacy_parse_emoji(message) == await current_parse_emoji(message)
+
+        before = await measure(legacy_parse_emoji, messages)
+        after = await measure(current_parse_emoji, messages)
+        print(f"{name:<16}{before:>14,.0f}{after:>14,.0f}{after / before:>9.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
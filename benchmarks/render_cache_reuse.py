@@ -0,0 +1,72 @@
+"""
+Check that the render cache never reuses a fragment whose message changed without being edited.
+
+A ticket is exported twice through the same RenderCache, the staff preview and then the close export. In
+between a reaction is added, another one is counted again, an embed is unfurled, a component is updated and an
+attachment is added, none of which touches edited_at. The second export must equal the same history rendered
+without the cache, and only the changed messages may be rendered again. Exits non-zero on any mismatch.
+
+Usage: python -m benchmarks.render_cache_reuse [messages]
+"""
+import asyncio
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+import chat_exporter
+from benchmarks.fixtures import FakeAttachment, FakeReaction, build_corpus, make_components, make_embed
+
+
+def normalize(transcript):
+    # The header carries the wall clock time of the export
+    return re.sub(r"generated on [^\"<]*", "generated on", transcript)
+
+
+def change(messages):
+    """Change five messages without editing them, return their ids."""
+    plain = [message for message in messages if not (message.reactions or message.embeds or message.reference)]
+    reacted = next(message for message in messages if message.reactions)
+
+    reacted.reactions[0].count += 1
+    plain[0].reactions = [FakeReaction("🔥", 1)]
+    plain[1].embeds = [make_embed(7)]
+    plain[2].components = make_components()[:1]
+    plain[3].attachments = [FakeAttachment(9000, "late.png", "image/png", 1024)]
+    return {reacted.id, plain[0].id, plain[1].id, plain[2].id, plain[3].id}
+
+
+async def export(count, changed=False, profiler=None, render_cache=None):
+    # Rendering writes to the messages, every export gets a fresh (deterministic) copy of the history
+    channel, messages = build_corpus(count)
+    changes = change(messages) if changed else set()
+    transcript = await chat_exporter.raw_export(
+        channel, messages, military_time=True, support_dev=False, profiler=profiler, render_cache=render_cache
+    )
+    return normalize(transcript), changes
+
+
+async def main(count):
+    with tempfile.TemporaryDirectory() as directory:
+        render_cache = chat_exporter.RenderCache(Path(directory) / "fragments.db")
+        await export(count, render_cache=render_cache)
+
+        profiler = chat_exporter.ExportProfiler()
+        cached, changed = await export(count, True, profiler, render_cache)
+        render_cache.close()
+
+    uncached, _ = await export(count, True)
+    stats = profiler.report()["render_cache"]
+    print(f"{count} messages, {len(changed)} changed: reused {stats['reused']}, rendered {stats['rendered']}")
+
+    if cached != uncached:
+        print("cached transcript differs from the uncached one")
+        return 1
+    if stats["rendered"] < len(changed):
+        print("changed messages were reused from the cache")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)))
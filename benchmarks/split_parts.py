@@ -0,0 +1,76 @@
+"""
+Check that split_export keeps every part within max_bytes, also once the part numbers need several digits.
+
+A channel is split with a sweep of budgets, from a handful of parts to over a hundred. Every part must fit in
+max_bytes unless it holds a single message group bigger than that, the navigation must number the parts 1..n,
+and the parts together must hold every message of the channel once. Exits non-zero on any violation.
+
+Usage: python -m benchmarks.split_parts [messages]
+"""
+import asyncio
+import re
+import sys
+import time
+
+import chat_exporter
+from benchmarks.fixtures import build_corpus
+
+MESSAGE_ID = re.compile(rb'id="chatlog__message-container-(\d+)"')
+MESSAGE_GROUP = b'<div class="chatlog__message-group">'
+# Room for the summary of a channel with more participants than a single message has
+OVERHEAD_MARGIN = 4096
+
+
+def build_channel(count):
+    channel, messages = build_corpus(count, reply_misses=False)
+    channel.remote.update((message.id, message) for message in messages)
+    return channel
+
+
+async def check(count, max_bytes):
+    channel = build_channel(count)
+    # The history also holds the messages of the channel outside the corpus
+    count = len(channel.remote)
+    parts = await chat_exporter.split_export(channel, max_bytes, "ticket", support_dev=False)
+    errors = []
+    seen = []
+    for index, part in enumerate(parts, 1):
+        data = part.file.read()
+        part.file.close()
+        # A message group bigger than the budget gets a part of its own
+        if len(data) != part.size or (part.size > max_bytes and data.count(MESSAGE_GROUP) > 1):
+            errors.append(f"{part.file_name} is {len(data)} bytes (reported {part.size}), over {max_bytes}")
+        if len(parts) > 1 and f"Part {index} of {len(parts)}".encode() not in data:
+            errors.append(f"{part.file_name} does not say it is part {index} of {len(parts)}")
+        seen.extend(MESSAGE_ID.findall(data))
+
+    if len(seen) != count or len(set(seen)) != count:
+        errors.append(f"the parts hold {len(seen)} messages ({len(set(seen))} distinct), expected {count}")
+    return len(parts), errors
+
+
+async def transcript_size(count):
+    part, = await chat_exporter.split_export(build_channel(count), 1 << 40, "ticket", support_dev=False)
+    part.file.close()
+    return part.size
+
+
+async def main(count):
+    # Budgets are the header and summary every part carries plus a share of the messages
+    overhead = await transcript_size(1) + OVERHEAD_MARGIN
+    messages = await transcript_size(count) - overhead
+
+    failed = False
+    for divisor in (3, 9, 10, 11, 25, 40, 60, 99, 100, 101, 150):
+        max_bytes = overhead + messages // divisor
+        start = time.perf_counter()
+        parts, errors = await check(count, max_bytes)
+        print(f"max_bytes={max_bytes:>9} {parts:>4} parts {time.perf_counter() - start:6.2f}s")
+        for error in errors:
+            print(f"  {error}")
+        failed = failed or bool(errors)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 3000)))
@@ -2,9 +2,18 @@ from chat_exporter.chat_exporter import (
     export,
     raw_export,
     quick_export,
+    stream_export,
+    raw_stream_export,
+    split_export,
+    shutdown,
     AttachmentHandler,
     AttachmentToLocalFileHostHandler,
-    AttachmentToDiscordChannelHandler)
+    AttachmentToDiscordChannelHandler,
+    RenderCache,
+    ExportProfiler,
+    TranscriptPart)
+from chat_exporter.construct.attachment_handler import upload_batches
+from chat_exporter.construct.asset_store import LocalAssetStore
 
 __version__ = "2.8.0"
 
@@ -12,7 +21,16 @@ __all__ = (
     export,
     raw_export,
     quick_export,
+    stream_export,
+    raw_stream_export,
+    split_export,
+    shutdown,
     AttachmentHandler,
     AttachmentToLocalFileHostHandler,
     AttachmentToDiscordChannelHandler,
+    LocalAssetStore,
+    RenderCache,
+    ExportProfiler,
+    TranscriptPart,
+    upload_batches,
 )
\ No newline at end of file
@@ -1,10 +1,13 @@
 import datetime
-import io
+import tempfile
 from typing import List, Optional
 
 from chat_exporter.construct.transcript import Transcript
 from chat_exporter.ext.discord_import import discord
-from chat_exporter.construct.attachment_handler import AttachmentHandler, AttachmentToLocalFileHostHandler, AttachmentToDiscordChannelHandler
+from chat_exporter.construct.attachment_handler import AttachmentHandler, AttachmentToLocalFileHostHandler, AttachmentToDiscordChannelHandler, close_sessions
+from chat_exporter.construct.render_cache import RenderCache
+from chat_exporter.ext.profiler import ExportProfiler
+from chat_exporter.ext.writer import SPOOL_MAX_SIZE, TranscriptPart
 
 async def quick_export(
     channel: discord.TextChannel,
@@ -23,31 +26,28 @@ async def quick_export(
     if guild:
         channel.guild = guild
 
-    transcript = (
-        await Transcript(
-            channel=channel,
-            limit=None,
-            messages=None,
-            pytz_timezone="UTC",
-            military_time=True,
-            fancy_times=True,
-            before=None,
-            after=None,
-            support_dev=True,
-            bot=bot,
-            attachment_handler=None
-            ).export()
-        ).html
-
-    if not transcript:
-        return
+    transcript = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    await Transcript(
+        channel=channel,
+        limit=None,
+        messages=None,
+        pytz_timezone="UTC",
+        military_time=True,
+        fancy_times=True,
+        before=None,
+        after=None,
+        support_dev=True,
+        bot=bot,
+        attachment_handler=None
+        ).stream(transcript)
+    transcript.seek(0)
 
     transcript_embed = discord.Embed(
         description=f"**Transcript Name:** transcript-{channel.name}\n\n",
         colour=discord.Colour.blurple()
     )
 
-    transcript_file = discord.File(io.BytesIO(transcript.encode()), filename=f"transcript-{channel.name}.html")
+    transcript_file = discord.File(transcript, filename=f"transcript-{channel.name}.html")
     return await channel.send(embed=transcript_embed, file=transcript_file)
 
 async def export(
@@ -62,6 +62,8 @@ async def export(
     after: Optional[datetime.datetime] = None,
     support_dev: Optional[bool] = True,
     attachment_handler: Optional[AttachmentHandler] = None,
+    render_cache: Optional[RenderCache] = None,
+    profiler: Optional[ExportProfiler] = None,
 ):
     """
     Create a customised transcript of your Discord channel.
@@ -76,6 +78,8 @@ async def export(
     :param before: (optional) datetime.datetime - allows before time for history
     :param after: (optional) datetime.datetime - allows after time for history
     :param attachment_handler: (optional) attachment_handler.AttachmentHandler - allows custom asset handling
+    :param render_cache: (optional) RenderCache - reuse messages rendered by earlier exports of the channel
+    :param profiler: (optional) ExportProfiler - collect per-stage timings, read them with profiler.report()
     :return: string - transcript file make up
     """
     if guild:
@@ -94,6 +98,8 @@ async def export(
             support_dev=support_dev,
             bot=bot,
             attachment_handler=attachment_handler,
+            render_cache=render_cache,
+            profiler=profiler,
         ).export()
     ).html
 
@@ -107,6 +113,8 @@ async def raw_export(
     fancy_times: Optional[bool] = True,
     support_dev: Optional[bool] = True,
     attachment_handler: Optional[AttachmentHandler] = None,
+    render_cache: Optional[RenderCache] = None,
+    profiler: Optional[ExportProfiler] = None,
 ):
     """
     Create a customised transcript with your own captured Discord messages
@@ -119,6 +127,8 @@ async def raw_export(
     :param military_time: (optional) boolean - set military time (24hour clock)
     :param fancy_times: (optional) boolean - set javascript around time display
     :param attachment_handler: (optional) AttachmentHandler - allows custom asset handling
+    :param render_cache: (optional) RenderCache - reuse messages rendered by earlier exports of the channel
+    :param profiler: (optional) ExportProfiler - collect per-stage timings, read them with profiler.report()
     :return: string - transcript file make up
     """
     if guild:
@@ -136,6 +146,180 @@ async def raw_export(
             after=None,
             support_dev=support_dev,
             bot=bot,
-            attachment_handler=attachment_handler
+            attachment_handler=attachment_handler,
+            render_cache=render_cache,
+            profiler=profiler,
         ).export()
-    ).html
\ No newline at end of file
+    ).html
+
+async def stream_export(
+    channel: discord.TextChannel,
+    sink,
+    limit: Optional[int] = None,
+    tz_info="UTC",
+    guild: Optional[discord.Guild] = None,
+    bot: Optional[discord.Client] = None,
+    military_time: Optional[bool] = True,
+    fancy_times: Optional[bool] = True,
+    before: Optional[datetime.datetime] = None,
+    after: Optional[datetime.datetime] = None,
+    support_dev: Optional[bool] = True,
+    attachment_handler: Optional[AttachmentHandler] = None,
+    render_cache: Optional[RenderCache] = None,
+    profiler: Optional[ExportProfiler] = None,
+    output: str = "html",
+    compression: Optional[str] = None,
+):
+    """
+    Create a customised transcript of your Discord channel and write it straight in to a sink.
+    Messages are written as soon as they are rendered, so the full transcript is never held in memory.
+    :param channel: discord.TextChannel - channel to Export
+    :param sink: file-like object (text or binary) or async writer (e.g. asyncio.StreamWriter, aiofiles)
+    :param limit: (optional) integer - limit of messages to capture
+    :param tz_info: (optional) TZ Database Name - set the timezone of your transcript
+    :param guild: (optional) discord.Guild - solution for edpy
+    :param bot: (optional) discord.Client - set getting member role colour
+    :param military_time: (optional) boolean - set military time (24hour clock)
+    :param fancy_times: (optional) boolean - set javascript around time display
+    :param before: (optional) datetime.datetime - allows before time for history
+    :param after: (optional) datetime.datetime - allows after time for history
+    :param attachment_handler: (optional) attachment_handler.AttachmentHandler - allows custom asset handling
+    :param render_cache: (optional) RenderCache - reuse messages rendered by earlier exports of the channel
+    :param profiler: (optional) ExportProfiler - collect per-stage timings, read them with profiler.report()
+    :param output: (optional) "html" for the transcript page, "ndjson" for compact message records to archive
+    :param compression: (optional) "gzip" or "zstd" - compress the output on the fly, the sink must be binary
+    :return: Transcript - the finished export
+    """
+    if guild:
+        channel.guild = guild
+
+    return await Transcript(
+        channel=channel,
+        limit=limit,
+        messages=None,
+        pytz_timezone=tz_info,
+        military_time=military_time,
+        fancy_times=fancy_times,
+        before=before,
+        after=after,
+        support_dev=support_dev,
+        bot=bot,
+        attachment_handler=attachment_handler,
+        render_cache=render_cache,
+        profiler=profiler,
+    ).stream(sink, output=output, compression=compression)
+
+async def raw_stream_export(
+    channel: discord.TextChannel,
+    messages: List[discord.Message],
+    sink,
+    tz_info="UTC",
+    guild: Optional[discord.Guild] = None,
+    bot: Optional[discord.Client] = None,
+    military_time: Optional[bool] = False,
+    fancy_times: Optional[bool] = True,
+    support_dev: Optional[bool] = True,
+    attachment_handler: Optional[AttachmentHandler] = None,
+    render_cache: Optional[RenderCache] = None,
+    profiler: Optional[ExportProfiler] = None,
+    output: str = "html",
+    compression: Optional[str] = None,
+):
+    """
+    Create a customised transcript with your own captured Discord messages and write it straight in to a sink.
+    :param channel: discord.TextChannel - channel to Export
+    :param messages: List[discord.Message] - list of Discord messages to export
+    :param sink: file-like object (text or binary) or async writer (e.g. asyncio.StreamWriter, aiofiles)
+    :param tz_info: (optional) TZ Database Name - set the timezone of your transcript
+    :param guild: (optional) discord.Guild - solution for edpy
+    :param bot: (optional) discord.Client - set getting member role colour
+    :param military_time: (optional) boolean - set military time (24hour clock)
+    :param fancy_times: (optional) boolean - set javascript around time display
+    :param attachment_handler: (optional) AttachmentHandler - allows custom asset handling
+    :param render_cache: (optional) RenderCache - reuse messages rendered by earlier exports of the channel
+    :param profiler: (optional) ExportProfiler - collect per-stage timings, read them with profiler.report()
+    :param output: (optional) "html" for the transcript page, "ndjson" for compact message records to archive
+    :param compression: (optional) "gzip" or "zstd" - compress the output on the fly, the sink must be binary
+    :return: Transcript - the finished export
+    """
+    if guild:
+        channel.guild = guild
+
+    return await Transcript(
+        channel=channel,
+        limit=None,
+        messages=messages,
+        pytz_timezone=tz_info,
+        military_time=military_time,
+        fancy_times=fancy_times,
+        before=None,
+        after=None,
+        support_dev=support_dev,
+        bot=bot,
+        attachment_handler=attachment_handler,
+        render_cache=render_cache,
+        profiler=profiler,
+    ).stream(sink, output=output, compression=compression)
+
+async def split_export(
+    channel: discord.TextChannel,
+    max_bytes: int,
+    file_name: Optional[str] = None,
+    limit: Optional[int] = None,
+    tz_info="UTC",
+    guild: Optional[discord.Guild] = None,
+    bot: Optional[discord.Client] = None,
+    military_time: Optional[bool] = True,
+    fancy_times: Optional[bool] = True,
+    before: Optional[datetime.datetime] = None,
+    after: Optional[datetime.datetime] = None,
+    support_dev: Optional[bool] = True,
+    attachment_handler: Optional[AttachmentHandler] = None,
+    render_cache: Optional[RenderCache] = None,
+    profiler: Optional[ExportProfiler] = None,
+) -> List[TranscriptPart]:
+    """
+    Create a customised transcript of your Discord channel split in to numbered files of at most max_bytes.
+    Parts are cut between message groups, each carries the channel summary and links to its neighbours.
+    :param channel: discord.TextChannel - channel to Export
+    :param max_bytes: integer - size limit of every part, e.g. the upload limit of the guild
+    :param file_name: (optional) string - file name without extension, defaults to transcript-<channel name>
+    :param limit: (optional) integer - limit of messages to capture
+    :param tz_info: (optional) TZ Database Name - set the timezone of your transcript
+    :param guild: (optional) discord.Guild - solution for edpy
+    :param bot: (optional) discord.Client - set getting member role colour
+    :param military_time: (optional) boolean - set military time (24hour clock)
+    :param fancy_times: (optional) boolean - set javascript around time display
+    :param before: (optional) datetime.datetime - allows before time for history
+    :param after: (optional) datetime.datetime - allows after time for history
+    :param attachment_handler: (optional) attachment_handler.AttachmentHandler - allows custom asset handling
+    :param render_cache: (optional) RenderCache - reuse messages rendered by earlier exports of the channel
+    :param profiler: (optional) ExportProfiler - collect per-stage timings, read them with profiler.report()
+    :return: List[TranscriptPart] - the parts in order, a single part when the transcript fits
+    """
+    if guild:
+        channel.guild = guild
+
+    return await Transcript(
+        channel=channel,
+        limit=limit,
+        messages=None,
+        pytz_timezone=tz_info,
+        military_time=military_time,
+        fancy_times=fancy_times,
+        before=before,
+        after=after,
+        support_dev=support_dev,
+        bot=bot,
+        attachment_handler=attachment_handler,
+        render_cache=render_cache,
+        profiler=profiler,
+    ).split(max_bytes, file_name)
+
+
+async def shutdown():
+    """
+    Release what the exporter keeps open between exports, call it when your bot shuts down.
+    Closes the pooled HTTP session of every attachment handler, handlers used afterwards open a new one.
+    """
+    await close_sessions()
@@ -0,0 +1,158 @@
+import hashlib
+import os
+import pathlib
+import sqlite3
+import time
+import urllib.parse
+import uuid
+from typing import Awaitable, Callable, Optional, Union
+
+from chat_exporter.ext.discord_import import discord
+
+INDEX_NAME = "assets.sqlite3"
+TEMP_DIRECTORY = "tmp"
+# Seconds an unindexed file or partial download is kept by collect_garbage, exports still writing it need it
+TEMP_MAX_AGE = 60 * 60
+
+
+class _HashingWriter:
+    """File object wrapper hashing and counting everything written through it."""
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk: bytes):
+        self.hash.update(chunk)
+        self.size += len(chunk)
+        return self.fp.write(chunk)
+
+
+class LocalAssetStore:
+    """Content-addressed store for attachment files.
+
+    Files are saved once under the sha256 of their content, sharded as ab/cd/<digest><suffix>, and a small
+    SQLite index maps attachment id and size to the stored file. An attachment that was stored before is
+    never downloaded again and the same file posted as different attachments is kept only once."""
+
+    def __init__(self, base_path: Union[str, pathlib.Path]):
+        self.base_path = pathlib.Path(base_path)
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.base_path / INDEX_NAME)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, path TEXT NOT NULL, "
+                "size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS attachments (attachment_id INTEGER NOT NULL, size INTEGER NOT NULL, "
+                "digest TEXT NOT NULL REFERENCES blobs (digest), PRIMARY KEY (attachment_id, size))"
+            )
+
+    def lookup(self, attachment: discord.Attachment) -> Optional[str]:
+        """Relative path of an attachment that is already stored, None when it has to be downloaded."""
+        row = self.connection.execute(
+            "SELECT blobs.digest, blobs.path FROM attachments JOIN blobs ON blobs.digest = attachments.digest "
+            "WHERE attachments.attachment_id = ? AND attachments.size = ?",
+            (attachment.id, attachment.size or 0),
+        ).fetchone()
+        if row is None or not (self.base_path / row[1]).exists():
+            return None
+
+        self._touch(row[0])
+        return row[1]
+
+    async def store(
+        self,
+        attachment: discord.Attachment,
+        download: Callable[[discord.Attachment, object], Awaitable[int]],
+    ) -> str:
+        """Store an attachment unless it is already known, returns its path relative to the store.
+        :param attachment: discord.Attachment
+        :param download: coroutine function streaming the attachment into a file object
+        """
+        path = self.lookup(attachment)
+        if path is not None:
+            return path
+
+        temp_directory = self.base_path / TEMP_DIRECTORY
+        temp_directory.mkdir(exist_ok=True)
+        temp_path = temp_directory / uuid.uuid4().hex
+        try:
+            with open(temp_path, "wb") as fp:
+                writer = _HashingWriter(fp)
+                await download(attachment, writer)
+
+            digest = writer.hash.hexdigest()
+            row = self.connection.execute("SELECT path FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            if row is not None and (self.base_path / row[0]).exists():
+                # Same content stored for another attachment, keep the existing file
+                path = row[0]
+            else:
+                suffix = urllib.parse.quote(pathlib.PurePath(attachment.filename).suffix.lower())
+                path = f"{digest[:2]}/{digest[2:4]}/{digest}{suffix}"
+                (self.base_path / path).parent.mkdir(parents=True, exist_ok=True)
+                os.replace(temp_path, self.base_path / path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO blobs (digest, path, size, last_used) VALUES (?, ?, ?, ?)",
+                (digest, path, writer.size, time.time()),
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO attachments (attachment_id, size, digest) VALUES (?, ?, ?)",
+                (attachment.id, attachment.size or 0, digest),
+            )
+        return path
+
+    def collect_garbage(self, max_age: Optional[float] = None, temp_max_age: float = TEMP_MAX_AGE) -> int:
+        """Delete stored files nothing refers to, returns how many were removed.
+
+        Files missing from the index and partial downloads in tmp/ are left behind by interrupted exports. They are
+        removed once nothing wrote to them for temp_max_age seconds, so exports still running keep theirs.
+
+        With max_age, indexed files no export has used for that many seconds are removed as well. The index does
+        not know which transcripts link to a file, so transcripts saved earlier lose those attachments: only pass
+        max_age when old transcripts are not kept, or are archived together with their files.
+        :param max_age: seconds since a file was last used before it is removed, None to keep every indexed file
+        :param temp_max_age: seconds since an unindexed or partial file was written before it is removed
+        """
+        removed = 0
+        expired_paths = set()
+        with self.connection:
+            if max_age is not None:
+                expired = self.connection.execute(
+                    "SELECT digest, path FROM blobs WHERE last_used < ?", (time.time() - max_age,)
+                ).fetchall()
+                for digest, path in expired:
+                    self.connection.execute("DELETE FROM attachments WHERE digest = ?", (digest,))
+                    self.connection.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                    expired_paths.add(path)
+
+            indexed = {path for (path,) in self.connection.execute("SELECT path FROM blobs")}
+
+        abandoned = time.time() - temp_max_age
+        for file in self.base_path.glob("*/*/*"):
+            path = file.relative_to(self.base_path).as_posix()
+            if not file.is_file() or path in indexed:
+                continue
+            # Files a running export just moved in place are indexed right after, only abandoned ones are removed
+            if path in expired_paths or file.stat().st_mtime < abandoned:
+                file.unlink()
+                removed += 1
+
+        for file in (self.base_path / TEMP_DIRECTORY).glob("*"):
+            if file.stat().st_mtime < abandoned:
+                file.unlink()
+        return removed
+
+    def close(self):
+        self.connection.close()
+
+    def _touch(self, digest: str):
+        with self.connection:
+            self.connection.execute("UPDATE blobs SET last_used = ? WHERE digest = ?", (time.time(), digest))
@@ -12,9 +12,10 @@ from chat_exporter.ext.html_generator import (
 
 
 class Attachment:
-    def __init__(self, attachments, guild):
+    def __init__(self, attachments, context):
         self.attachments = attachments
-        self.guild = guild
+        self.context = context
+        self.guild = context.guild
 
     async def flow(self):
         await self.build_attachment()
@@ -31,13 +32,13 @@ class Attachment:
         await self.file()
 
     async def image(self):
-        self.attachments = await fill_out(self.guild, img_attachment, [
+        self.attachments = await fill_out(self.context, img_attachment, [
             ("ATTACH_URL", self.attachments.proxy_url, PARSE_MODE_NONE),
             ("ATTACH_URL_THUMB", self.attachments.proxy_url, PARSE_MODE_NONE)
         ])
 
     async def video(self):
-        self.attachments = await fill_out(self.guild, video_attachment, [
+        self.attachments = await fill_out(self.context, video_attachment, [
             ("ATTACH_URL", self.attachments.proxy_url, PARSE_MODE_NONE)
         ])
 
@@ -45,7 +46,7 @@ class Attachment:
         file_icon = DiscordUtils.file_attachment_audio
         file_size = self.get_file_size(self.attachments.size)
 
-        self.attachments = await fill_out(self.guild, audio_attachment, [
+        self.attachments = await fill_out(self.context, audio_attachment, [
             ("ATTACH_ICON", file_icon, PARSE_MODE_NONE),
             ("ATTACH_URL", self.attachments.proxy_url, PARSE_MODE_NONE),
             ("ATTACH_BYTES", str(file_size), PARSE_MODE_NONE),
@@ -58,7 +59,7 @@ class Attachment:
 
         file_size = self.get_file_size(self.attachments.size)
 
-        self.attachments = await fill_out(self.guild, msg_attachment, [
+        self.attachments = await fill_out(self.context, msg_attachment, [
             ("ATTACH_ICON", file_icon, PARSE_MODE_NONE),
             ("ATTACH_URL", self.attachments.proxy_url, PARSE_MODE_NONE),
             ("ATTACH_BYTES", str(file_size), PARSE_MODE_NONE),
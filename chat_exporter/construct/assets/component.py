@@ -1,3 +1,4 @@
+from chat_exporter.ext.cache import payload_key
 from chat_exporter.ext.discord_import import discord
 
 from chat_exporter.ext.discord_utils import DiscordUtils
@@ -32,16 +33,18 @@ class Component:
     buttons: str = ""
     menu_div_id: int = 0
 
-    def __init__(self, component, guild):
+    def __init__(self, component, context):
         self.component = component
-        self.guild = guild
+        self.context = context
+        self.guild = context.guild
 
     async def build_component(self, c):
         if isinstance(c, discord.Button):
             await self.build_button(c)
         elif isinstance(c, discord.SelectMenu):
+            self.menu_div_id = self.context.menu_div_id
             await self.build_menu(c)
-            Component.menu_div_id += 1
+            self.context.menu_div_id += 1
 
     async def build_button(self, c):
         if c.url:
@@ -57,7 +60,7 @@ class Component:
         style = self.styles[str(c.style).split(".")[1]]
         emoji = str(c.emoji) if c.emoji else ""
 
-        self.buttons += await fill_out(self.guild, component_button, [
+        self.buttons += await fill_out(self.context, component_button, [
             ("DISABLED", "chatlog__component-disabled" if c.disabled else "", PARSE_MODE_NONE),
             ("URL", url, PARSE_MODE_NONE),
             ("LABEL", label, PARSE_MODE_MARKDOWN),
@@ -75,7 +78,7 @@ class Component:
         if not c.disabled:
             content = await self.build_menu_options(options)
 
-        self.menus += await fill_out(self.guild, component_menu, [
+        self.menus += await fill_out(self.context, component_menu, [
             ("DISABLED", "chatlog__component-disabled" if c.disabled else "", PARSE_MODE_NONE),
             ("ID", str(self.menu_div_id), PARSE_MODE_NONE),
             ("PLACEHOLDER", str(placeholder), PARSE_MODE_MARKDOWN),
@@ -87,13 +90,13 @@ class Component:
         content = []
         for option in options:
             if option.emoji:
-                content.append(await fill_out(self.guild, component_menu_options_emoji, [
+                content.append(await fill_out(self.context, component_menu_options_emoji, [
                     ("EMOJI", str(option.emoji), PARSE_MODE_EMOJI),
                     ("TITLE", str(option.label), PARSE_MODE_MARKDOWN),
                     ("DESCRIPTION", str(option.description) if option.description else "", PARSE_MODE_MARKDOWN)
                 ]))
             else:
-                content.append(await fill_out(self.guild, component_menu_options, [
+                content.append(await fill_out(self.context, component_menu_options, [
                     ("TITLE", str(option.label), PARSE_MODE_MARKDOWN),
                     ("DESCRIPTION", str(option.description) if option.description else "", PARSE_MODE_MARKDOWN)
                 ]))
@@ -104,6 +107,21 @@ class Component:
         return content
 
     async def flow(self):
+        """Rendered component row, identical rows are rendered once per export.
+
+        Rows holding a select menu are always rendered, every dropdown gets an id of its own."""
+        if any(isinstance(c, discord.SelectMenu) for c in self.component.children):
+            return await self.render()
+
+        cache = self.context.asset_caches["components"]
+        key = payload_key(self.component.to_dict())
+        components_html = cache.get(key)
+        if components_html is None:
+            components_html = await self.render()
+            cache.set(key, components_html)
+        return components_html
+
+    async def render(self):
         for c in self.component.children:
             await self.build_component(c)
 
@@ -1,5 +1,6 @@
 import html
 
+from chat_exporter.ext.cache import payload_key
 from chat_exporter.ext.discord_import import discord
 
 from chat_exporter.ext.html_generator import (
@@ -44,11 +45,22 @@ class Embed:
 
     check_against = None
 
-    def __init__(self, embed, guild):
+    def __init__(self, embed, context):
         self.embed: discord.Embed = embed
-        self.guild: discord.Guild = guild
+        self.context = context
+        self.guild: discord.Guild = context.guild
 
     async def flow(self):
+        """Rendered embed, identical embeds are rendered once per export."""
+        cache = self.context.asset_caches["embeds"]
+        key = payload_key(self.embed.to_dict())
+        embed_html = cache.get(key)
+        if embed_html is None:
+            embed_html = await self.render()
+            cache.set(key, embed_html)
+        return embed_html
+
+    async def render(self):
         self.check_against = _gather_checker()
         self.build_colour()
         await self.build_title()
@@ -72,7 +84,7 @@ class Embed:
         self.title = html.escape(self.embed.title) if self.embed.title != self.check_against else ""
 
         if self.title:
-            self.title = await fill_out(self.guild, embed_title, [
+            self.title = await fill_out(self.context, embed_title, [
                 ("EMBED_TITLE", self.title, PARSE_MODE_MARKDOWN)
             ])
 
@@ -80,7 +92,7 @@ class Embed:
         self.description = html.escape(self.embed.description) if self.embed.description != self.check_against else ""
 
         if self.description:
-            self.description = await fill_out(self.guild, embed_description, [
+            self.description = await fill_out(self.context, embed_description, [
                 ("EMBED_DESC", self.embed.description, PARSE_MODE_EMBED)
             ])
 
@@ -96,12 +108,12 @@ class Embed:
             field.value = html.escape(field.value)
 
             if field.inline:
-                self.fields += await fill_out(self.guild, embed_field_inline, [
+                self.fields += await fill_out(self.context, embed_field_inline, [
                     ("FIELD_NAME", field.name, PARSE_MODE_SPECIAL_EMBED),
                     ("FIELD_VALUE", field.value, PARSE_MODE_EMBED)
                 ])
             else:
-                self.fields += await fill_out(self.guild, embed_field, [
+                self.fields += await fill_out(self.context, embed_field, [
                     ("FIELD_NAME", field.name, PARSE_MODE_SPECIAL_EMBED),
                     ("FIELD_VALUE", field.value, PARSE_MODE_EMBED)])
 
@@ -115,23 +127,23 @@ class Embed:
                 self.embed.author and self.embed.author.url != self.check_against
             ) else self.author
 
-        author_icon = await fill_out(self.guild, embed_author_icon, [
+        author_icon = await fill_out(self.context, embed_author_icon, [
             ("AUTHOR", self.author, PARSE_MODE_NONE),
             ("AUTHOR_ICON", self.embed.author.icon_url, PARSE_MODE_NONE)
         ]) if self.embed.author and self.embed.author.icon_url != self.check_against else ""
 
         if author_icon == "" and self.author != "":
-            self.author = await fill_out(self.guild, embed_author, [("AUTHOR", self.author, PARSE_MODE_NONE)])
+            self.author = await fill_out(self.context, embed_author, [("AUTHOR", self.author, PARSE_MODE_NONE)])
         else:
             self.author = author_icon
 
     async def build_image(self):
-        self.image = await fill_out(self.guild, embed_image, [
+        self.image = await fill_out(self.context, embed_image, [
             ("EMBED_IMAGE", str(self.embed.image.proxy_url), PARSE_MODE_NONE)
         ]) if self.embed.image and self.embed.image.url != self.check_against else ""
 
     async def build_thumbnail(self):
-        self.thumbnail = await fill_out(self.guild, embed_thumbnail, [
+        self.thumbnail = await fill_out(self.context, embed_thumbnail, [
             ("EMBED_THUMBNAIL", str(self.embed.thumbnail.url), PARSE_MODE_NONE)]) \
             if self.embed.thumbnail and self.embed.thumbnail.url != self.check_against else ""
 
@@ -148,16 +160,16 @@ class Embed:
             return
 
         if footer_icon is not None:
-            self.footer = await fill_out(self.guild, embed_footer_icon, [
+            self.footer = await fill_out(self.context, embed_footer_icon, [
                 ("EMBED_FOOTER", self.footer, PARSE_MODE_NONE),
                 ("EMBED_FOOTER_ICON", footer_icon, PARSE_MODE_NONE)
             ])
         else:
-            self.footer = await fill_out(self.guild, embed_footer, [
+            self.footer = await fill_out(self.context, embed_footer, [
                 ("EMBED_FOOTER", self.footer, PARSE_MODE_NONE)])
 
     async def build_embed(self):
-        self.embed = await fill_out(self.guild, embed_body, [
+        self.embed = await fill_out(self.context, embed_body, [
             ("EMBED_R", str(self.r)),
             ("EMBED_G", str(self.g)),
             ("EMBED_B", str(self.b)),
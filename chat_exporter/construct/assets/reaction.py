@@ -5,14 +5,21 @@ from chat_exporter.ext.html_generator import fill_out, emoji, custom_emoji, PARS
 
 
 class Reaction:
-    def __init__(self, reaction, guild):
+    def __init__(self, reaction, context):
         self.reaction = reaction
-        self.guild = guild
+        self.context = context
+        self.guild = context.guild
 
     async def flow(self):
-        await self.build_reaction()
-
-        return self.reaction
+        """Rendered reaction, the same emoji with the same count is rendered once per export."""
+        cache = self.context.asset_caches["reactions"]
+        key = (str(self.reaction.emoji), self.reaction.count)
+        reaction_html = cache.get(key)
+        if reaction_html is None:
+            await self.build_reaction()
+            reaction_html = self.reaction
+            cache.set(key, reaction_html)
+        return reaction_html
 
     async def build_reaction(self):
         if ":" in str(self.reaction.emoji):
@@ -27,7 +34,7 @@ class Reaction:
     async def create_discord_reaction(self, emoji_type):
         pattern = r":.*:(\d*)"
         emoji_id = re.search(pattern, str(self.reaction.emoji)).group(1)
-        self.reaction = await fill_out(self.guild, custom_emoji, [
+        self.reaction = await fill_out(self.context, custom_emoji, [
             ("EMOJI", str(emoji_id), PARSE_MODE_NONE),
             ("EMOJI_COUNT", str(self.reaction.count), PARSE_MODE_NONE),
             ("EMOJI_FILE", emoji_type, PARSE_MODE_NONE)
@@ -35,7 +42,7 @@ class Reaction:
 
     async def create_standard_emoji(self):
         react_emoji = await convert_emoji(self.reaction.emoji)
-        self.reaction = await fill_out(self.guild, emoji, [
+        self.reaction = await fill_out(self.context, emoji, [
             ("EMOJI", str(react_emoji), PARSE_MODE_NONE),
             ("EMOJI_COUNT", str(self.reaction.count), PARSE_MODE_NONE)
         ])
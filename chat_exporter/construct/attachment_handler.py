@@ -1,17 +1,71 @@
+import asyncio
 import urllib.parse
 import datetime
 import pathlib
+import tempfile
+import time
+import weakref
 import aiohttp
-import io
-from typing import Union
+from typing import Callable, List, Optional, TypeVar, Union
 
+from chat_exporter.construct.asset_store import LocalAssetStore
 from chat_exporter.ext.discord_import import discord
 
+# Bytes read from the network at a time when downloading an attachment
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Downloads larger than this are spooled to disk instead of memory before being uploaded again
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+# Most files discord accepts in a single message
+MAX_FILES_PER_MESSAGE = 10
+# Upload limit of a message when the guild does not report its own
+DEFAULT_FILESIZE_LIMIT = 10 * 1024 * 1024
+
+T = TypeVar("T")
+
+# Handlers holding an open HTTP session, closed together by close_sessions
+_open_handlers: "weakref.WeakSet[AttachmentHandler]" = weakref.WeakSet()
+
+
+def upload_batches(files: List[T], size_limit: int, size: Callable[[T], int]) -> List[List[T]]:
+	"""Split files in to groups that fit in one message, by file count and the total upload size.
+	:param files: the files to send, in order
+	:param size_limit: most bytes one message may upload, e.g. guild.filesize_limit
+	:param size: returns the size in bytes of a file
+	:return: the groups in order, a file bigger than size_limit gets a group of its own
+	"""
+	batches: List[List[T]] = []
+	batch_size = 0
+	for file in files:
+		file_size = size(file)
+		if batches and len(batches[-1]) < MAX_FILES_PER_MESSAGE and batch_size + file_size <= size_limit:
+			batches[-1].append(file)
+			batch_size += file_size
+		else:
+			batches.append([file])
+			batch_size = file_size
+	return batches
+
+
+async def close_sessions():
+	"""Close the pooled HTTP session of every attachment handler that opened one."""
+	await asyncio.gather(*(handler.close() for handler in list(_open_handlers)))
+
+
 class AttachmentHandler:
 	"""Handle the saving of attachments (images, videos, audio, etc.)
 
 	Subclass this to implement your own asset handler."""
 
+	# How many attachments process_assets handles at once, also the size of the HTTP connection pool
+	concurrency: int = 4
+
+	_session: Optional[aiohttp.ClientSession] = None
+
+	# Totals over every process_assets call of this handler
+	processed_count: int = 0
+	processed_bytes: int = 0
+	processing_time: float = 0.0
+
 	async def process_asset(self, attachment: discord.Attachment) -> discord.Attachment:
 		"""Implement this to process the asset and return a url to the stored attachment.
 		:param attachment: discord.Attachment
@@ -19,23 +73,87 @@ class AttachmentHandler:
 		"""
 		raise NotImplementedError
 
+	async def process_assets(self, attachments: List[discord.Attachment]) -> List[discord.Attachment]:
+		"""Process every attachment of an export, at most self.concurrency at a time.
+		:param attachments: List[discord.Attachment]
+		:return: the processed attachments, in the same order
+		"""
+		start = time.perf_counter()
+		semaphore = asyncio.Semaphore(self.concurrency)
+
+		async def process(attachment):
+			async with semaphore:
+				return await self.process_asset(attachment)
+
+		processed = await asyncio.gather(*(process(attachment) for attachment in attachments))
+		self._record(attachments, start)
+		return list(processed)
+
+	@property
+	def session(self) -> aiohttp.ClientSession:
+		"""HTTP session every download of this handler goes through, created on first use."""
+		if self._session is None or self._session.closed:
+			self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.concurrency))
+			_open_handlers.add(self)
+		return self._session
+
+	async def close(self):
+		"""Close the pooled HTTP session, a new one is opened if the handler is used again."""
+		_open_handlers.discard(self)
+		if self._session is not None and not self._session.closed:
+			await self._session.close()
+
+	async def download(self, attachment: discord.Attachment, fp) -> int:
+		"""Stream an attachment into a binary file object chunk by chunk.
+		:param attachment: discord.Attachment
+		:param fp: file object to write to
+		:return: the number of bytes written
+		"""
+		size = 0
+		async with self.session.get(attachment.url) as res:
+			if res.status != 200:
+				res.raise_for_status()
+			async for chunk in res.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+				fp.write(chunk)
+				size += len(chunk)
+		return size
+
+	def _record(self, attachments: List[discord.Attachment], start: float):
+		self.processed_count += len(attachments)
+		self.processed_bytes += sum(attachment.size or 0 for attachment in attachments)
+		self.processing_time += time.perf_counter() - start
+
 class AttachmentToLocalFileHostHandler(AttachmentHandler):
-	"""Save the assets to a local file host and embed the assets in the transcript from there."""
+	"""Save the assets to a local file host and embed the assets in the transcript from there.
+
+	By default assets are kept in a content-addressed LocalAssetStore, so an asset is downloaded and stored
+	only once however many exports include it."""
 
-	def __init__(self, base_path: Union[str, pathlib.Path], url_base: str):
+	def __init__(
+		self,
+		base_path: Union[str, pathlib.Path],
+		url_base: str,
+		concurrency: int = 4,
+		deduplicate: bool = True,
+	):
 		if isinstance(base_path, str):
 			base_path = pathlib.Path(base_path)
 		self.base_path = base_path
 		self.url_base = url_base
+		self.concurrency = concurrency
+		self.store = LocalAssetStore(base_path) if deduplicate else None
 
 	async def process_asset(self, attachment: discord.Attachment) -> discord.Attachment:
 		"""Implement this to process the asset and return a url to the stored attachment.
 		:param attachment: discord.Attachment
 		:return: str
 		"""
-		file_name = urllib.parse.quote_plus(f"{datetime.datetime.utcnow().timestamp()}_{attachment.filename}")
-		asset_path = self.base_path / file_name
-		await attachment.save(asset_path)
+		if self.store is not None:
+			file_name = await self.store.store(attachment, self.download)
+		else:
+			file_name = urllib.parse.quote_plus(f"{datetime.datetime.utcnow().timestamp()}_{attachment.filename}")
+			with open(self.base_path / file_name, "wb") as fp:
+				await self.download(attachment, fp)
 		file_url = f"{self.url_base}/{file_name}"
 		attachment.url = file_url
 		attachment.proxy_url = file_url
@@ -45,24 +163,52 @@ class AttachmentToLocalFileHostHandler(AttachmentHandler):
 class AttachmentToDiscordChannelHandler(AttachmentHandler):
 	"""Save the attachment to a discord channel and embed the assets in the transcript from there."""
 
-	def __init__(self, channel: discord.TextChannel):
+	def __init__(self, channel: discord.TextChannel, concurrency: int = 4):
 		self.channel = channel
+		self.concurrency = concurrency
 
 	async def process_asset(self, attachment: discord.Attachment) -> discord.Attachment:
 		"""Implement this to process the asset and return a url to the stored attachment.
 		:param attachment: discord.Attachment
 		:return: str
 		"""
+		return (await self._upload([attachment], asyncio.Semaphore(1)))[0]
+
+	async def process_assets(self, attachments: List[discord.Attachment]) -> List[discord.Attachment]:
+		"""Download the attachments concurrently and upload them again, up to 10 per message.
+		:param attachments: List[discord.Attachment]
+		:return: the uploaded attachments, in the same order
+		"""
+		start = time.perf_counter()
+		semaphore = asyncio.Semaphore(self.concurrency)
+
+		uploaded = await asyncio.gather(*(self._upload(batch, semaphore) for batch in self._batches(attachments)))
+		self._record(attachments, start)
+		return [attachment for batch in uploaded for attachment in batch]
+
+	def _batches(self, attachments: List[discord.Attachment]) -> List[List[discord.Attachment]]:
+		"""Split attachments in to groups that fit in one message, by file count and the guild upload limit."""
+		guild = getattr(self.channel, "guild", None)
+		size_limit = getattr(guild, "filesize_limit", None) or DEFAULT_FILESIZE_LIMIT
+		return upload_batches(attachments, size_limit, lambda attachment: attachment.size or 0)
+
+	async def _upload(self, attachments: List[discord.Attachment], semaphore: asyncio.Semaphore):
+		spools = [tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) for _ in attachments]
+
+		async def download(attachment, fp):
+			async with semaphore:
+				await self.download(attachment, fp)
+			fp.seek(0)
+
 		try:
-			async with aiohttp.ClientSession() as session:
-				async with session.get(attachment.url) as res:
-					if res.status != 200:
-						res.raise_for_status()
-					data = io.BytesIO(await res.read())
-					data.seek(0)
-					attach = discord.File(data, attachment.filename)
-					msg: discord.Message = await self.channel.send(file=attach)
-					return msg.attachments[0]
-		except discord.errors.HTTPException as e:
-			# discords http errors, including missing permissions
-			raise e
\ No newline at end of file
+			await asyncio.gather(*(download(attachment, fp) for attachment, fp in zip(attachments, spools)))
+			files = [discord.File(fp, attachment.filename) for attachment, fp in zip(attachments, spools)]
+			try:
+				msg: discord.Message = await self.channel.send(files=files)
+			except discord.errors.HTTPException as e:
+				# discords http errors, including missing permissions
+				raise e
+			return msg.attachments
+		finally:
+			for fp in spools:
+				fp.close()
@@ -0,0 +1,51 @@
+from typing import Optional
+
+from chat_exporter.construct.attachment_handler import AttachmentHandler
+from chat_exporter.construct.render_cache import RenderCache
+from chat_exporter.ext.cache import ASSET_CACHE_SIZE, ASSET_KINDS, CacheScope, EXPORT_CACHE_SIZE
+from chat_exporter.ext.discord_import import discord
+from chat_exporter.ext.profiler import ExportProfiler
+from chat_exporter.ext.time_format import TimeFormatter
+
+
+class ExportContext:
+    """State that belongs to a single export.
+
+    One context is created per transcript and handed to every builder (messages, assets, fill_out and the
+    parsers), so any number of exports can render on the same event loop without sharing mutable state."""
+
+    def __init__(
+        self,
+        guild: discord.Guild,
+        pytz_timezone="UTC",
+        military_time: bool = True,
+        bot: Optional[discord.Client] = None,
+        attachment_handler: Optional[AttachmentHandler] = None,
+        render_cache: Optional[RenderCache] = None,
+        profiler: Optional[ExportProfiler] = None,
+    ):
+        self.guild = guild
+        self.pytz_timezone = pytz_timezone
+        self.military_time = military_time
+        self.time_formatter = TimeFormatter(pytz_timezone, military_time)
+        # Bot is used to fetch a user who is no longer inside a guild
+        self.bot = bot
+        self.attachment_handler = attachment_handler
+        self.render_cache = render_cache
+        # Messages reused from the render cache and messages rendered again, filled in when a render cache is used
+        self.render_stats = {"reused": 0, "rendered": 0}
+        # Measures nothing unless the caller asked for a profile
+        self.profiler = profiler if profiler is not None else ExportProfiler(enabled=False)
+        self.cache = CacheScope(maxsize=EXPORT_CACHE_SIZE)
+        # Rendered HTML of identical embeds, components and reactions, kind -> payload key -> html
+        self.asset_caches = {kind: CacheScope(maxsize=ASSET_CACHE_SIZE) for kind in ASSET_KINDS}
+        self.menu_div_id = 0
+        # Reply targets outside the exported messages, message id -> message or the error fetching it raised
+        self.referenced_messages: dict = {}
+        # Guild members resolved up front, user id -> member or None when the user is not in the guild
+        self.members: dict = {}
+        # How every member was resolved, "remote" counts the ones requested over the gateway or REST
+        self.member_stats = {"cache": 0, "remote": 0, "missing": 0}
+        # Attachments run through the attachment handler, message id -> processed attachments
+        self.processed_attachments: dict = {}
+        self.attachment_stats = {"attachments": 0, "bytes": 0, "seconds": 0.0}
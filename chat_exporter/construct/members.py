@@ -0,0 +1,130 @@
+import asyncio
+from typing import Iterable, List, Optional, Set
+
+from chat_exporter.ext.cache import shared_cache
+from chat_exporter.ext.discord_import import discord
+from chat_exporter.ext.profiler import NETWORK
+
+# Seconds a member resolved through the API (or found to be missing) is reused across exports
+MEMBER_CACHE_TTL = 300
+MEMBER_FETCH_CONCURRENCY = 8
+# Most user ids one gateway member request may ask for
+QUERY_MEMBERS_LIMIT = 100
+
+
+def gather_member_ids(messages: List[discord.Message], context, message_dict: dict) -> Set[int]:
+    """Every user whose guild member is looked up while rendering these messages."""
+    user_ids = set()
+    for message in messages:
+        user_ids.add(message.author.id)
+        user_ids.update(user.id for user in message.mentions)
+
+        interaction = getattr(message, "interaction_metadata", None) or getattr(message, "interaction", None)
+        if interaction:
+            user_ids.add(interaction.user.id)
+
+        if message.reference and message.reference.message_id:
+            message_id = message.reference.message_id
+            target = message_dict.get(message_id) or context.referenced_messages.get(message_id)
+            if target is not None and not isinstance(target, Exception):
+                user_ids.add(target.author.id)
+    return user_ids
+
+
+async def resolve_members(context, user_ids: Iterable[int], messages: Optional[List[discord.Message]] = None):
+    """Resolve guild members in bulk in to context.members.
+
+    The guild cache, the shared member cache and the member objects sent along with mentions are tried first,
+    the rest is requested through gateway member chunking or, without it, a bounded number of REST calls.
+    """
+    guild = context.guild
+    stats = context.member_stats
+    missing = []
+
+    mentioned = {}
+    for message in messages or ():
+        for user in message.mentions:
+            if isinstance(user, discord.Member):
+                mentioned[user.id] = user
+
+    for user_id in user_ids:
+        if user_id in context.members:
+            continue
+
+        member = guild.get_member(user_id)
+        if member is not None:
+            context.members[user_id] = member
+            stats["cache"] += 1
+            continue
+
+        member = shared_cache.get(("member", guild.id, user_id), missing)
+        if member is not missing:
+            context.members[user_id] = member
+            stats["cache"] += 1
+        elif user_id in mentioned:
+            context.members[user_id] = mentioned[user_id]
+            stats["cache"] += 1
+        else:
+            missing.append(user_id)
+
+    if not missing:
+        return
+
+    if getattr(guild, "chunked", False):
+        # Every member is already cached, whoever is not there has left the guild
+        for user_id in missing:
+            _store(context, user_id, None)
+        return
+
+    if hasattr(guild, "query_members"):
+        missing = await _query_members(context, missing)
+
+    semaphore = asyncio.Semaphore(MEMBER_FETCH_CONCURRENCY)
+
+    async def fetch(user_id):
+        async with semaphore:
+            try:
+                with context.profiler.measure(NETWORK, "fetch_member"):
+                    member = await guild.fetch_member(user_id)
+            except Exception:
+                member = None
+        if member is not None:
+            stats["remote"] += 1
+        _store(context, user_id, member)
+
+    await asyncio.gather(*(fetch(user_id) for user_id in missing))
+
+
+async def resolve_member(context, user_id: int):
+    """Member of a single user, resolved (and remembered) on demand."""
+    if user_id not in context.members:
+        await resolve_members(context, [user_id])
+    return context.members[user_id]
+
+
+async def _query_members(context, user_ids: List[int]) -> List[int]:
+    """Request members over the gateway, returns the user ids that still have to be fetched."""
+    guild = context.guild
+    for start in range(0, len(user_ids), QUERY_MEMBERS_LIMIT):
+        batch = user_ids[start:start + QUERY_MEMBERS_LIMIT]
+        try:
+            with context.profiler.measure(NETWORK, "query_members"):
+                members = await guild.query_members(user_ids=batch, limit=len(batch), cache=True)
+        except (discord.ClientException, asyncio.TimeoutError):
+            # No members intent or the gateway did not answer, fall back to REST for the rest
+            return user_ids[start:]
+
+        for member in members:
+            context.member_stats["remote"] += 1
+            _store(context, member.id, member)
+        for user_id in batch:
+            if user_id not in context.members:
+                _store(context, user_id, None)
+    return []
+
+
+def _store(context, user_id: int, member):
+    context.members[user_id] = member
+    if member is None:
+        context.member_stats["missing"] += 1
+    shared_cache.set(("member", context.guild.id, user_id), member, MEMBER_CACHE_TTL)
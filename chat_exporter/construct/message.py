@@ -1,18 +1,23 @@
+import asyncio
+import time
 import traceback
 import aiohttp
 import html
 import io
-from typing import List, Optional, Union
-from pytz import timezone
+from typing import AsyncIterator, List, Optional, Union
 from datetime import timedelta
 
 from chat_exporter.construct.attachment_handler import AttachmentHandler
+from chat_exporter.construct.context import ExportContext
+from chat_exporter.construct.members import gather_member_ids, resolve_member, resolve_members
+from chat_exporter.construct.render_cache import RenderedMessage
 from chat_exporter.ext.discord_import import discord
+from chat_exporter.ext.cache import payload_key
+from chat_exporter.ext.profiler import NETWORK, STAGES
 
 from chat_exporter.construct.assets import Attachment, Component, Embed, Reaction
 from chat_exporter.ext.discord_utils import DiscordUtils
 from chat_exporter.ext.discriminator import discriminator
-from chat_exporter.ext.cache import cache
 from chat_exporter.ext.html_generator import (
     fill_out,
     bot_tag,
@@ -34,6 +39,28 @@ from chat_exporter.ext.html_generator import (
     message_thread_add,
 )
 
+# Messages whose API lookups are resolved together before they are rendered, and how many lookups may run at once
+PREFETCH_WINDOW = 100
+PREFETCH_CONCURRENCY = 16
+
+# Messages rendered as channel events, they do not count towards their author's messages
+AUDIT_MESSAGE_TYPES = (
+    discord.MessageType.pins_add,
+    discord.MessageType.thread_created,
+    discord.MessageType.recipient_remove,
+    discord.MessageType.recipient_add,
+)
+
+# At least REFERENCE_CLUSTER_MIN reply targets sent within REFERENCE_CLUSTER_SPAN milliseconds of each other are
+# fetched with a single history(around=...) call
+REFERENCE_CLUSTER_MIN = 3
+REFERENCE_CLUSTER_SPAN = 15 * 60 * 1000
+HISTORY_AROUND_LIMIT = 101
+
+# Messages per page of channel history handed to the renderer, and how many pages are fetched ahead of it
+HISTORY_PAGE_SIZE = 100
+HISTORY_PAGES_AHEAD = 4
+
 def _gather_user_bot(author: discord.Member):
     if author.bot and author.public_flags.verified_bot:
         return bot_tag_verified
@@ -52,31 +79,31 @@ class MessageConstruct:
     reactions: str = ""
     components: str = ""
     attachments: str = ""
-    time_format: str = ""
 
     interaction: str = ""
 
+    # Resolved by prefetch(), fetched on demand when the message is constructed without it
+    reference_message = None
+    sticker = None
+    processed_attachments: Optional[list] = None
+
     def __init__(
         self,
         message: discord.Message,
         previous_message: Optional[discord.Message],
-        pytz_timezone,
-        military_time: bool,
-        guild: discord.Guild,
+        context: ExportContext,
         meta_data: dict,
         message_dict: dict,
-        attachment_handler: Optional[AttachmentHandler]
     ):
         self.message = message
         self.previous_message = previous_message
-        self.pytz_timezone = pytz_timezone
-        self.military_time = military_time
-        self.guild = guild
+        self.context = context
+        self.pytz_timezone = context.pytz_timezone
+        self.military_time = context.military_time
+        self.guild = context.guild
         self.message_dict = message_dict
-        self.attachment_handler = attachment_handler
-        self.time_format = "%A, %e %B %Y %I:%M %p"
-        if self.military_time:
-            self.time_format = "%A, %e %B %Y %H:%M"
+        self.attachment_handler = context.attachment_handler
+        self.time_formatter = context.time_formatter
 
         self.message_created_at, self.message_edited_at = self.set_time()
         self.meta_data = meta_data
@@ -84,26 +111,49 @@ class MessageConstruct:
     async def construct_message(
         self,
     ) -> (str, dict):
+        profiler = self.context.profiler
         if discord.MessageType.pins_add == self.message.type:
-            await self.build_pin()
+            with profiler.measure(STAGES, "build_pin"):
+                await self.build_pin()
         elif discord.MessageType.thread_created == self.message.type:
-            await self.build_thread()
+            with profiler.measure(STAGES, "build_thread"):
+                await self.build_thread()
         elif discord.MessageType.recipient_remove == self.message.type:
-            await self.build_thread_remove()
+            with profiler.measure(STAGES, "build_thread_remove"):
+                await self.build_thread_remove()
         elif discord.MessageType.recipient_add == self.message.type:
-            await self.build_thread_add()
+            with profiler.measure(STAGES, "build_thread_add"):
+                await self.build_thread_add()
         else:
             await self.build_message()
         return self.message_html, self.meta_data
 
+    async def prefetch(self, semaphore: asyncio.Semaphore):
+        """Resolve the API lookups this message needs so construct_message only has to render."""
+        async with semaphore:
+            if self.message.reference:
+                self.reference_message = await self._fetch_reference()
+
+            if (self.message.stickers and hasattr(self.message.stickers[0], "url")
+                    and self.message.stickers[0].url.endswith(".json")):
+                with self.context.profiler.measure(NETWORK, "fetch_sticker"):
+                    self.sticker = await self.message.stickers[0].fetch()
+
+            self.processed_attachments = self.context.processed_attachments.get(self.message.id)
+
     async def build_message(self):
-        await self.build_content()
-        await self.build_reference()
-        await self.build_interaction()
-        await self.build_sticker()
-        await self.build_assets()
-        await self.build_message_template()
-        await self.build_meta_data()
+        profiler = self.context.profiler
+        for stage in (
+            self.build_content,
+            self.build_reference,
+            self.build_interaction,
+            self.build_sticker,
+            self.build_assets,
+            self.build_message_template,
+            self.build_meta_data,
+        ):
+            with profiler.measure(STAGES, stage.__name__):
+                await stage()
 
     async def build_pin(self):
         await self.generate_message_divider(channel_audit=True)
@@ -144,6 +194,14 @@ class MessageConstruct:
                 user_name_discriminator, user_created_at, user_bot, user_avatar, 1, user_joined_at, user_display_name
             ]
 
+    def meta_data_entry(self) -> Optional[list]:
+        """The author's meta_data entry without its message count, None when this message is not counted."""
+        if self.message.type in AUDIT_MESSAGE_TYPES:
+            return None
+
+        name, created_at, bot, avatar, _, joined_at, display_name = self.meta_data[self.message.author.id]
+        return [name, created_at, bot, avatar, joined_at, display_name]
+
     async def build_content(self):
         if not self.message.content:
             self.message.content = ""
@@ -153,7 +211,7 @@ class MessageConstruct:
             self.message_edited_at = _set_edit_at(self.message_edited_at)
 
         self.message.content = html.escape(self.message.content)
-        self.message.content = await fill_out(self.guild, message_content, [
+        self.message.content = await fill_out(self.context, message_content, [
             ("MESSAGE_CONTENT", self.message.content, PARSE_MODE_MARKDOWN),
             ("EDIT", self.message_edited_at, PARSE_MODE_NONE)
         ])
@@ -163,16 +221,13 @@ class MessageConstruct:
             self.message.reference = ""
             return
 
-        message: discord.Message = self.message_dict.get(self.message.reference.message_id)
+        message = self.reference_message if self.reference_message is not None else await self._fetch_reference()
 
-        if not message:
-            try:
-                message: discord.Message = await self.message.channel.fetch_message(self.message.reference.message_id)
-            except (discord.NotFound, discord.HTTPException) as e:
-                self.message.reference = ""
-                if isinstance(e, discord.NotFound):
-                    self.message.reference = message_reference_unknown
-                return
+        if isinstance(message, (discord.NotFound, discord.HTTPException)):
+            self.message.reference = ""
+            if isinstance(message, discord.NotFound):
+                self.message.reference = message_reference_unknown
+            return
 
         is_bot = _gather_user_bot(message.author)
         user_colour = await self._gather_user_colour(message.author)
@@ -200,7 +255,7 @@ class MessageConstruct:
             message_edited_at = _set_edit_at(message_edited_at)
 
         avatar_url = message.author.display_avatar if message.author.display_avatar else DiscordUtils.default_avatar
-        self.message.reference = await fill_out(self.guild, message_reference, [
+        self.message.reference = await fill_out(self.context, message_reference, [
             ("AVATAR_URL", str(avatar_url), PARSE_MODE_NONE),
             ("BOT_TAG", is_bot, PARSE_MODE_NONE),
             ("NAME_TAG", await discriminator(message.author.name, message.author.discriminator), PARSE_MODE_NONE),
@@ -233,7 +288,7 @@ class MessageConstruct:
         user_colour = await self._gather_user_colour(user)
         avatar_url = user.display_avatar if user.display_avatar else DiscordUtils.default_avatar
 
-        self.interaction = await fill_out(self.guild, message_interaction, [
+        self.interaction = await fill_out(self.context, message_interaction, [
             ("AVATAR_URL", str(avatar_url), PARSE_MODE_NONE),
             ("BOT_TAG", is_bot, PARSE_MODE_NONE),
             ("NAME_TAG", await discriminator(user.name, user.discriminator), PARSE_MODE_NONE),
@@ -252,30 +307,37 @@ class MessageConstruct:
         sticker_image_url = self.message.stickers[0].url
 
         if sticker_image_url.endswith(".json"):
-            sticker = await self.message.stickers[0].fetch()
+            sticker = self.sticker
+            if sticker is None:
+                with self.context.profiler.measure(NETWORK, "fetch_sticker"):
+                    sticker = await self.message.stickers[0].fetch()
             sticker_image_url = (
                 f"https://cdn.jsdelivr.net/gh/mahtoid/DiscordUtils@master/stickers/{sticker.pack_id}/{sticker.id}.gif"
             )
 
-        self.message.content = await fill_out(self.guild, img_attachment, [
+        self.message.content = await fill_out(self.context, img_attachment, [
             ("ATTACH_URL", str(sticker_image_url), PARSE_MODE_NONE),
             ("ATTACH_URL_THUMB", str(sticker_image_url), PARSE_MODE_NONE)
         ])
 
     async def build_assets(self):
         for e in self.message.embeds:
-            self.embeds += await Embed(e, self.guild).flow()
+            self.embeds += await Embed(e, self.context).flow()
 
-        for a in self.message.attachments:
+        attachments = self.processed_attachments
+        if attachments is None:
+            attachments = self.message.attachments
             if self.attachment_handler and isinstance(self.attachment_handler, AttachmentHandler):
-                a = await self.attachment_handler.process_asset(a)
-            self.attachments += await Attachment(a, self.guild).flow()
+                attachments = [await self.attachment_handler.process_asset(a) for a in attachments]
+
+        for a in attachments:
+            self.attachments += await Attachment(a, self.context).flow()
 
         for c in self.message.components:
-            self.components += await Component(c, self.guild).flow()
+            self.components += await Component(c, self.context).flow()
 
         for r in self.message.reactions:
-            self.reactions += await Reaction(r, self.guild).flow()
+            self.reactions += await Reaction(r, self.context).flow()
 
         if self.reactions:
             self.reactions = f'<div class="chatlog__reactions">{self.reactions}</div>'
@@ -286,7 +348,7 @@ class MessageConstruct:
         if started:
             return self.message_html
 
-        self.message_html += await fill_out(self.guild, message_body, [
+        self.message_html += await fill_out(self.context, message_body, [
             ("MESSAGE_ID", str(self.message.id)),
             ("MESSAGE_CONTENT", self.message.content, PARSE_MODE_NONE),
             ("EMBEDS", self.embeds, PARSE_MODE_NONE),
@@ -310,7 +372,7 @@ class MessageConstruct:
     async def generate_message_divider(self, channel_audit=False):
         if channel_audit or self._generate_message_divider_check():
             if self.previous_message is not None:
-                self.message_html += await fill_out(self.guild, end_message, [])
+                self.message_html += await fill_out(self.context, end_message, [])
 
             if channel_audit:
                 self.audit = True
@@ -323,16 +385,11 @@ class MessageConstruct:
             if self.message.reference != "" or self.interaction:
                 followup_symbol = "<div class='chatlog__followup-symbol'></div>"
 
-            time = self.message.created_at
-            if not self.message.created_at.tzinfo:
-                time = timezone("UTC").localize(time)
-
-            if self.military_time:
-                default_timestamp = time.astimezone(timezone(self.pytz_timezone)).strftime("%d-%m-%Y %H:%M")
-            else:
-                default_timestamp = time.astimezone(timezone(self.pytz_timezone)).strftime("%d-%m-%Y %I:%M %p")
+            default_timestamp = self.time_formatter.format(
+                self.message.created_at, self.time_formatter.default_format
+            )
 
-            self.message_html += await fill_out(self.guild, start_message, [
+            self.message_html += await fill_out(self.context, start_message, [
                 ("REFERENCE_SYMBOL", followup_symbol, PARSE_MODE_NONE),
                 ("REFERENCE", self.message.reference if self.message.reference else self.interaction,
                  PARSE_MODE_NONE),
@@ -356,7 +413,7 @@ class MessageConstruct:
             return True
 
     async def build_pin_template(self):
-        self.message_html += await fill_out(self.guild, message_pin, [
+        self.message_html += await fill_out(self.context, message_pin, [
             ("PIN_URL", DiscordUtils.pinned_message_icon, PARSE_MODE_NONE),
             ("USER_COLOUR", await self._gather_user_colour(self.message.author)),
             ("NAME", str(html.escape(self.message.author.display_name))),
@@ -366,7 +423,7 @@ class MessageConstruct:
         ])
 
     async def build_thread_template(self):
-        self.message_html += await fill_out(self.guild, message_thread, [
+        self.message_html += await fill_out(self.context, message_thread, [
             ("THREAD_URL", DiscordUtils.thread_channel_icon,
              PARSE_MODE_NONE),
             ("THREAD_NAME", self.message.content, PARSE_MODE_NONE),
@@ -378,7 +435,7 @@ class MessageConstruct:
 
     async def build_remove(self):
         removed_member: discord.Member = self.message.mentions[0]
-        self.message_html += await fill_out(self.guild, message_thread_remove, [
+        self.message_html += await fill_out(self.context, message_thread_remove, [
             ("THREAD_URL", DiscordUtils.thread_remove_recipient,
              PARSE_MODE_NONE),
             ("USER_COLOUR", await self._gather_user_colour(self.message.author)),
@@ -394,7 +451,7 @@ class MessageConstruct:
 
     async def build_add(self):
         removed_member: discord.Member = self.message.mentions[0]
-        self.message_html += await fill_out(self.guild, message_thread_add, [
+        self.message_html += await fill_out(self.context, message_thread_add, [
             ("THREAD_URL", DiscordUtils.thread_add_recipient,
              PARSE_MODE_NONE),
             ("USER_COLOUR", await self._gather_user_colour(self.message.author)),
@@ -408,17 +465,25 @@ class MessageConstruct:
             ("MESSAGE_ID", str(self.message.id), PARSE_MODE_NONE),
         ])
 
-    @cache()
-    async def _gather_member(self, author: discord.Member):
-        member = self.guild.get_member(author.id)
+    async def _fetch_reference(self):
+        message_id = self.message.reference.message_id
+        message: discord.Message = self.message_dict.get(message_id) or self.context.referenced_messages.get(message_id)
 
-        if member:
-            return member
+        if not message:
+            try:
+                with self.context.profiler.measure(NETWORK, "fetch_message"):
+                    message = await self.message.channel.fetch_message(message_id)
+            except (discord.NotFound, discord.HTTPException) as e:
+                message = e
+            self.context.referenced_messages[message_id] = message
+
+        return message
 
+    async def _gather_member(self, author: discord.Member):
         try:
-            return await self.guild.fetch_member(author.id)
-        except Exception:
-            return None
+            return self.context.members[author.id]
+        except KeyError:
+            return await resolve_member(self.context, author.id)
 
     async def _gather_user_colour(self, author: discord.Member):
         member = await self._gather_member(author)
@@ -439,56 +504,324 @@ class MessageConstruct:
 
     def set_time(self, message: Optional[discord.Message] = None):
         message = message if message else self.message
-        created_at_str = self.to_local_time_str(message.created_at)
-        edited_at_str = self.to_local_time_str(message.edited_at) if message.edited_at else ""
-
-        return created_at_str, edited_at_str
-
-    def to_local_time_str(self, time):
-        if not self.message.created_at.tzinfo:
-            time = timezone("UTC").localize(time)
-
-        local_time = time.astimezone(timezone(self.pytz_timezone))
-
-        return local_time.strftime(self.time_format)
+        return self.time_formatter.message_times(message)
 
 async def gather_messages(
     messages: List[discord.Message],
-    guild: discord.Guild,
-    pytz_timezone,
-    military_time,
-    attachment_handler: Optional[AttachmentHandler],
+    context: ExportContext,
+    pages: Optional[AsyncIterator[List[discord.Message]]] = None,
 ) -> (str, dict):
-    message_html: str = ""
     meta_data: dict = {}
-    previous_message: Optional[discord.Message] = None
+    message_html = [chunk async for chunk in iter_messages(messages, context, meta_data, pages)]
+    return "".join(message_html), meta_data
 
-    message_dict = {message.id: message for message in messages}
+async def iter_messages(
+    messages: List[discord.Message],
+    context: ExportContext,
+    meta_data: dict,
+    pages: Optional[AsyncIterator[List[discord.Message]]] = None,
+) -> AsyncIterator[str]:
+    """Yield the rendered HTML of each message as soon as it is constructed, filling meta_data on the way.
+
+    With pages (oldest first, see iter_history) every page is appended to messages and rendered while the
+    pages after it are still being fetched."""
+    guild = context.guild
+    profiler = context.profiler
+    render_cache = context.render_cache
+    namespace = None
+
+    message_dict: dict = {}
+    reused = 0
+
+    async for start in _extend_messages(messages, pages):
+        message_dict.update((message.id, message) for message in messages[start:])
+
+        if start == 0 and "thread" in str(messages[0].channel.type) and messages[0].reference:
+            channel = guild.get_channel(messages[0].reference.channel_id)
+
+            if not channel:
+                with profiler.measure(NETWORK, "fetch_channel"):
+                    channel = await guild.fetch_channel(messages[0].reference.channel_id)
+
+            with profiler.measure(NETWORK, "fetch_message"):
+                message = await channel.fetch_message(messages[0].reference.message_id)
+            messages[0] = message
+            messages[0].reference = None
+
+        page = messages[start:]
+        with profiler.measure(STAGES, "prefetch_references"):
+            await prefetch_references(page, context, message_dict)
+
+        # Messages rendered by an earlier export are reused as long as they (and what they reply to) were not
+        # edited and they still follow the same message
+        if render_cache and namespace is None:
+            namespace = render_cache.namespace(context, messages[0].channel.id)
+        versions: dict = {}
+        cached: dict = {}
+        if namespace:
+            with profiler.measure(STAGES, "render_cache_load"):
+                fragments = await render_cache.fetch(namespace, [message.id for message in page])
+            for index in range(start, len(messages)):
+                message = messages[index]
+                version = versions[message.id] = _render_version(message, context, message_dict)
+                fragment = fragments.get(message.id)
+                if (fragment is not None and version is not None and fragment.version == version
+                        and fragment.previous_id == (messages[index - 1].id if index else 0)):
+                    cached[message.id] = fragment
+        reused += len(cached)
+
+        rendering = [message for message in page if message.id not in cached]
+        with profiler.measure(STAGES, "prefetch_assets_and_members"):
+            await asyncio.gather(
+                prefetch_attachments(rendering, context),
+                resolve_members(context, gather_member_ids(rendering, context, message_dict), rendering),
+            )
 
-    if messages and "thread" in str(messages[0].channel.type) and messages[0].reference:
-        channel = guild.get_channel(messages[0].reference.channel_id)
+        def window(window_start):
+            return [
+                cached.get(messages[index].id) or MessageConstruct(
+                    messages[index],
+                    messages[index - 1] if index else None,
+                    context,
+                    meta_data,
+                    message_dict,
+                )
+                for index in range(window_start, min(window_start + PREFETCH_WINDOW, len(messages)))
+            ]
 
-        if not channel:
-            channel = await guild.fetch_channel(messages[0].reference.channel_id)
+        # The next window is prefetched while the current one renders, rendering itself stays in message order
+        semaphore = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+        pending = asyncio.create_task(prefetch_messages(window(start), semaphore))
+        rendered = []
+        try:
+            for window_start in range(start, len(messages), PREFETCH_WINDOW):
+                constructs = await pending
+                pending = None
+                if window_start + PREFETCH_WINDOW < len(messages):
+                    pending = asyncio.create_task(
+                        prefetch_messages(window(window_start + PREFETCH_WINDOW), semaphore)
+                    )
+
+                for index, construct in enumerate(constructs, window_start):
+                    message = messages[index]
+                    if isinstance(construct, RenderedMessage):
+                        # Later replies preview the rendered content, as if the message had been rendered again
+                        message.content = construct.content
+                        if construct.meta_data is not None:
+                            _count_meta_data(meta_data, message.author.id, construct.meta_data)
+                        yield construct.html
+                        continue
+
+                    menu_div_id = context.menu_div_id
+                    content_html, meta_data = await construct.construct_message()
+                    version = versions.get(message.id)
+                    # Dropdown menu ids are numbered per export, fragments holding one can not be reused
+                    if namespace and version is not None and context.menu_div_id == menu_div_id:
+                        rendered.append((message.id, RenderedMessage(
+                            version,
+                            messages[index - 1].id if index else 0,
+                            content_html,
+                            message.content,
+                            construct.meta_data_entry(),
+                        )))
+                    yield content_html
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+        if namespace:
+            with profiler.measure(STAGES, "render_cache_save"):
+                await render_cache.store(namespace, rendered)
+
+    if namespace:
+        context.render_stats = {"reused": reused, "rendered": len(messages) - reused}
+
+    yield "</div>"
+
+async def _extend_messages(
+    messages: List[discord.Message],
+    pages: Optional[AsyncIterator[List[discord.Message]]],
+) -> AsyncIterator[int]:
+    """Offsets in messages where the next messages to render start, appending each page first."""
+    if pages is None:
+        if messages:
+            yield 0
+        return
+
+    async for page in pages:
+        if page:
+            start = len(messages)
+            messages.extend(page)
+            yield start
+
+async def iter_history(
+    channel: discord.TextChannel,
+    context: ExportContext,
+    limit: Optional[int] = None,
+    before=None,
+    after=None,
+) -> AsyncIterator[List[discord.Message]]:
+    """Yield the channel history oldest first in pages of HISTORY_PAGE_SIZE messages.
+
+    Pages are fetched in the background, at most HISTORY_PAGES_AHEAD of them ahead of the consumer, so the
+    history behind a page is still being fetched while that page renders."""
+    profiler = context.profiler
+    queue: asyncio.Queue = asyncio.Queue(maxsize=HISTORY_PAGES_AHEAD)
+
+    async def produce():
+        try:
+            page = []
+            start = time.perf_counter()
+            async for message in channel.history(limit=limit, before=before, after=after, oldest_first=True):
+                page.append(message)
+                if len(page) == HISTORY_PAGE_SIZE:
+                    profiler.add(NETWORK, "history", time.perf_counter() - start)
+                    await queue.put(page)
+                    page = []
+                    start = time.perf_counter()
+
+            profiler.add(NETWORK, "history", time.perf_counter() - start)
+            if page:
+                await queue.put(page)
+        except Exception as e:
+            await queue.put(e)
+        else:
+            await queue.put(None)
 
-        message = await channel.fetch_message(messages[0].reference.message_id)
-        messages[0] = message
-        messages[0].reference = None
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            page = await queue.get()
+            if page is None:
+                return
+            if isinstance(page, Exception):
+                raise page
+            yield page
+    finally:
+        producer.cancel()
+
+def _render_version(message: discord.Message, context: ExportContext, message_dict: dict) -> Optional[str]:
+    """What a cached fragment of this message depends on, None when it can not be cached.
+
+    Reactions, embeds, components, attachments and stickers change without touching edited_at, so they are
+    part of the version through a digest."""
+    version = str(message.edited_at.timestamp()) if message.edited_at else "0"
+    if message.reactions or message.embeds or message.components or message.attachments or message.stickers:
+        version = f"{version}:{payload_key(_asset_payload(message))}"
+    if message.reference and message.reference.message_id:
+        message_id = message.reference.message_id
+        target = message_dict.get(message_id) or context.referenced_messages.get(message_id)
+        if target is None:
+            return None
+        if isinstance(target, Exception):
+            return f"{version}:{type(target).__name__}"
+        return f"{version}:{target.edited_at.timestamp() if target.edited_at else 0}"
+    return version
+
+def _asset_payload(message: discord.Message) -> list:
+    return [
+        [[str(reaction.emoji), reaction.count] for reaction in message.reactions],
+        [embed.to_dict() for embed in message.embeds],
+        [component.to_dict() for component in message.components],
+        [attachment.id for attachment in message.attachments],
+        [getattr(sticker, "id", None) for sticker in message.stickers],
+    ]
+
+def _count_meta_data(meta_data: dict, user_id: int, entry: list):
+    if user_id in meta_data:
+        meta_data[user_id][4] += 1
+    else:
+        name, created_at, bot, avatar, joined_at, display_name = entry
+        meta_data[user_id] = [name, created_at, bot, avatar, 1, joined_at, display_name]
+
+async def prefetch_messages(constructs: List[MessageConstruct], semaphore: asyncio.Semaphore) -> List[MessageConstruct]:
+    """Resolve the API lookups of a window of messages concurrently, at most semaphore lookups at a time."""
+    await asyncio.gather(*(
+        construct.prefetch(semaphore) for construct in constructs if isinstance(construct, MessageConstruct)
+    ))
+    return constructs
+
+
+async def prefetch_attachments(messages: List[discord.Message], context: ExportContext):
+    """Run every attachment of the export through the attachment handler in one batch."""
+    handler = context.attachment_handler
+    if not handler or not isinstance(handler, AttachmentHandler):
+        return
+
+    attachments = [attachment for message in messages for attachment in message.attachments]
+    if not attachments:
+        return
+
+    start = time.perf_counter()
+    processed = await handler.process_assets(attachments)
+    elapsed = time.perf_counter() - start
+    context.attachment_stats["attachments"] += len(attachments)
+    context.attachment_stats["bytes"] += sum(attachment.size or 0 for attachment in attachments)
+    context.attachment_stats["seconds"] += elapsed
+    context.profiler.add(NETWORK, "attachments", elapsed, len(attachments))
+
+    offset = 0
+    for message in messages:
+        context.processed_attachments[message.id] = processed[offset:offset + len(message.attachments)]
+        offset += len(message.attachments)
 
+
+def _cluster_references(message_ids) -> List[List[int]]:
+    """Group message ids whose snowflake timestamps lie within REFERENCE_CLUSTER_SPAN of the first of the group."""
+    clusters: List[List[int]] = []
+    for message_id in sorted(message_ids):
+        if clusters and (message_id >> 22) - (clusters[-1][0] >> 22) <= REFERENCE_CLUSTER_SPAN:
+            clusters[-1].append(message_id)
+        else:
+            clusters.append([message_id])
+    return clusters
+
+async def prefetch_references(messages: List[discord.Message], context: ExportContext, message_dict: dict):
+    """Fetch every reply target that is not part of the export once, storing it in context.referenced_messages."""
+    missing: dict = {}
     for message in messages:
-        content_html, meta_data = await MessageConstruct(
-            message,
-            previous_message,
-            pytz_timezone,
-            military_time,
-            guild,
-            meta_data,
-            message_dict,
-            attachment_handler,
-            ).construct_message()
-
-        message_html += content_html
-        previous_message = message
-
-    message_html += "</div>"
-    return message_html, meta_data
\ No newline at end of file
+        if not message.reference or not message.reference.message_id:
+            continue
+        message_id = message.reference.message_id
+        if message_id not in message_dict and message_id not in context.referenced_messages:
+            missing.setdefault(message.channel, set()).add(message_id)
+
+    if not missing:
+        return
+
+    semaphore = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+
+    async def fetch_one(channel, message_id):
+        async with semaphore:
+            try:
+                with context.profiler.measure(NETWORK, "fetch_message"):
+                    context.referenced_messages[message_id] = await channel.fetch_message(message_id)
+            except (discord.NotFound, discord.HTTPException) as e:
+                context.referenced_messages[message_id] = e
+
+    async def fetch_around(channel, cluster):
+        wanted = set(cluster)
+        async with semaphore:
+            try:
+                with context.profiler.measure(NETWORK, "history_around"):
+                    async for message in channel.history(
+                        limit=HISTORY_AROUND_LIMIT, around=discord.Object(id=cluster[len(cluster) // 2])
+                    ):
+                        if message.id in wanted:
+                            context.referenced_messages[message.id] = message
+            except discord.HTTPException:
+                pass
+
+        # Targets outside the history window (or deleted ones) fall back to a single fetch
+        await asyncio.gather(*(
+            fetch_one(channel, message_id) for message_id in cluster if message_id not in context.referenced_messages
+        ))
+
+    tasks = []
+    for channel, message_ids in missing.items():
+        for cluster in _cluster_references(message_ids):
+            if len(cluster) >= REFERENCE_CLUSTER_MIN:
+                tasks.append(fetch_around(channel, cluster))
+            else:
+                tasks.extend(fetch_one(channel, message_id) for message_id in cluster)
+    await asyncio.gather(*tasks)
@@ -0,0 +1,125 @@
+import json
+from typing import AsyncIterator, List, Optional
+
+from chat_exporter.construct.context import ExportContext
+from chat_exporter.construct.message import prefetch_attachments
+from chat_exporter.ext.discord_import import discord
+
+# Bump whenever a record changes shape, so archives can be read by the matching renderer
+RECORD_VERSION = 1
+
+
+def _time(moment) -> Optional[str]:
+    return moment.isoformat() if moment else None
+
+
+def _dump(record: dict) -> str:
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False, default=str) + "\n"
+
+
+def channel_record(channel: discord.TextChannel, message_count: int) -> dict:
+    return {
+        "type": "channel",
+        "version": RECORD_VERSION,
+        "guild": {"id": channel.guild.id, "name": channel.guild.name, "icon": str(channel.guild.icon or "")},
+        "id": channel.id,
+        "name": channel.name,
+        "topic": getattr(channel, "topic", None),
+        "created_at": _time(channel.created_at),
+        "message_count": message_count,
+    }
+
+
+def dump_error(error: Exception) -> str:
+    """The line ending an export that failed part way, so readers can tell it from a complete one."""
+    return _dump({
+        "type": "error",
+        "version": RECORD_VERSION,
+        "error": type(error).__name__,
+        "message": str(error),
+    })
+
+
+def user_record(user: discord.User) -> dict:
+    return {
+        "type": "user",
+        "id": user.id,
+        "name": user.name,
+        "discriminator": user.discriminator,
+        "display_name": user.display_name,
+        "bot": user.bot,
+        "avatar": str(user.display_avatar or ""),
+        "created_at": _time(user.created_at),
+        "joined_at": _time(getattr(user, "joined_at", None)),
+    }
+
+
+def _interaction(message: discord.Message):
+    return getattr(message, "interaction_metadata", None) or getattr(message, "interaction", None)
+
+
+def message_record(message: discord.Message, attachments: Optional[List[discord.Attachment]] = None) -> dict:
+    """Everything needed to render a message later, with its author referenced by id.
+    :param message: discord.Message
+    :param attachments: the attachments as processed by the attachment handler, if any
+    """
+    interaction = _interaction(message)
+    return {
+        "type": "message",
+        "id": message.id,
+        "message_type": message.type.name,
+        "author_id": message.author.id,
+        "created_at": _time(message.created_at),
+        "edited_at": _time(message.edited_at),
+        "content": message.content,
+        "reference": {
+            "message_id": message.reference.message_id,
+            "channel_id": message.reference.channel_id,
+        } if message.reference else None,
+        "interaction": {
+            "id": interaction.id,
+            "name": getattr(interaction, "name", None),
+            "user_id": interaction.user.id,
+        } if interaction else None,
+        "webhook_id": message.webhook_id,
+        "mentions": [user.id for user in message.mentions],
+        "attachments": [
+            {
+                "id": attachment.id,
+                "filename": attachment.filename,
+                "content_type": attachment.content_type,
+                "size": attachment.size,
+                "url": attachment.url,
+                "proxy_url": attachment.proxy_url,
+            }
+            for attachment in (message.attachments if attachments is None else attachments)
+        ],
+        "embeds": [embed.to_dict() for embed in message.embeds],
+        "components": [component.to_dict() for component in message.components],
+        "reactions": [{"emoji": str(reaction.emoji), "count": reaction.count} for reaction in message.reactions],
+        "stickers": [
+            {"id": sticker.id, "name": sticker.name, "url": str(getattr(sticker, "url", ""))}
+            for sticker in message.stickers
+        ],
+    }
+
+
+async def iter_records(
+    channel: discord.TextChannel,
+    messages: List[discord.Message],
+    context: ExportContext,
+) -> AsyncIterator[str]:
+    """Yield the export as NDJSON: the channel, then every message preceded by the first appearance of its users."""
+    yield _dump(channel_record(channel, len(messages)))
+
+    await prefetch_attachments(messages, context)
+
+    users = set()
+    for message in messages:
+        interaction = _interaction(message)
+        for user in (message.author, *message.mentions, *((interaction.user,) if interaction else ())):
+            if user.id not in users:
+                users.add(user.id)
+                yield _dump(user_record(user))
+
+        yield _dump(message_record(message, context.processed_attachments.get(message.id)))
@@ -0,0 +1,157 @@
+import asyncio
+import datetime
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# Bump whenever the message templates change, fragments rendered by another version are never reused
+RENDER_CACHE_VERSION = 2
+# Seconds a rendered fragment is reused, after that names, avatars and role colours are picked up again
+RENDER_CACHE_MAX_AGE = 24 * 60 * 60
+# Most message ids looked up in one query, below SQLite's bound parameter limit
+LOAD_BATCH_SIZE = 500
+
+
+class RenderedMessage:
+    """A message fragment as it was rendered by an earlier export."""
+
+    __slots__ = ("version", "previous_id", "html", "content", "meta_data")
+
+    def __init__(self, version: str, previous_id: int, html: str, content: str, meta_data: Optional[list]):
+        self.version = version
+        self.previous_id = previous_id
+        self.html = html
+        self.content = content
+        self.meta_data = meta_data
+
+
+class RenderCache:
+    """Persistent cache of rendered message fragments, shared by every export of a channel.
+
+    Fragments are keyed on the message id and reused while the message (and the message it replies to) was not
+    edited and it still follows the same message, so grouping and dividers are recomputed wherever the
+    history around it changed. Fragments are kept per guild, channel, timezone, clock format and attachment
+    handler since all of them change the rendered output.
+
+    Exports go through fetch and store, which run the queries on a thread of the cache so the event loop keeps
+    serving the bot while SQLite reads and commits."""
+
+    def __init__(self, path: Union[str, pathlib.Path], max_age: Optional[float] = RENDER_CACHE_MAX_AGE):
+        self.max_age = max_age
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="render-cache")
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS fragments (namespace TEXT NOT NULL, message_id INTEGER NOT NULL, "
+                "version TEXT NOT NULL, previous_id INTEGER NOT NULL, html TEXT NOT NULL, content TEXT NOT NULL, "
+                "meta_data TEXT, rendered_at REAL NOT NULL, PRIMARY KEY (namespace, message_id))"
+            )
+
+    @staticmethod
+    def namespace(context, channel_id: int) -> str:
+        """Key separating fragments of exports whose settings render messages differently."""
+        handler = type(context.attachment_handler).__name__ if context.attachment_handler else ""
+        return (
+            f"{RENDER_CACHE_VERSION}:{context.guild.id}:{channel_id}:{context.pytz_timezone}:"
+            f"{int(bool(context.military_time))}:{handler}"
+        )
+
+    async def fetch(self, namespace: str, message_ids: Iterable[int]) -> Dict[int, RenderedMessage]:
+        """load, run on the thread of the cache."""
+        message_ids = list(message_ids)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.load, namespace, message_ids)
+
+    async def store(self, namespace: str, fragments: List[Tuple[int, RenderedMessage]]):
+        """save, run on the thread of the cache."""
+        if fragments:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self.save, namespace, fragments)
+
+    def load(self, namespace: str, message_ids: Iterable[int]) -> Dict[int, RenderedMessage]:
+        """Fragments of the given messages that have not expired."""
+        oldest = time.time() - self.max_age if self.max_age is not None else 0
+        message_ids = list(message_ids)
+
+        fragments = {}
+        with self._lock:
+            for start in range(0, len(message_ids), LOAD_BATCH_SIZE):
+                batch = message_ids[start:start + LOAD_BATCH_SIZE]
+                rows = self.connection.execute(
+                    "SELECT message_id, version, previous_id, html, content, meta_data FROM fragments "
+                    f"WHERE namespace = ? AND rendered_at >= ? AND message_id IN ({', '.join('?' * len(batch))})",
+                    (namespace, oldest, *batch),
+                )
+                for message_id, version, previous_id, html, content, meta_data in rows:
+                    fragments[message_id] = RenderedMessage(
+                        version, previous_id, html, content, _load_meta_data(meta_data)
+                    )
+        return fragments
+
+    def save(self, namespace: str, fragments: List[Tuple[int, RenderedMessage]]):
+        """Store freshly rendered fragments, replacing what was cached for those messages."""
+        if not fragments:
+            return
+
+        rendered_at = time.time()
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO fragments "
+                "(namespace, message_id, version, previous_id, html, content, meta_data, rendered_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        namespace, message_id, fragment.version, fragment.previous_id, fragment.html,
+                        fragment.content, _dump_meta_data(fragment.meta_data), rendered_at,
+                    )
+                    for message_id, fragment in fragments
+                ],
+            )
+
+    def prune(self) -> int:
+        """Delete expired fragments, returns how many were removed."""
+        if self.max_age is None:
+            return 0
+
+        with self._lock, self.connection:
+            cursor = self.connection.execute(
+                "DELETE FROM fragments WHERE rendered_at < ?", (time.time() - self.max_age,)
+            )
+        return cursor.rowcount
+
+    def clear(self, namespace: Optional[str] = None):
+        with self._lock, self.connection:
+            if namespace is None:
+                self.connection.execute("DELETE FROM fragments")
+            else:
+                self.connection.execute("DELETE FROM fragments WHERE namespace = ?", (namespace,))
+
+    def close(self):
+        """Wait for the queued writes, then close the connection."""
+        self._executor.shutdown(wait=True)
+        self.connection.close()
+
+
+def _dump_meta_data(meta_data: Optional[list]) -> Optional[str]:
+    if meta_data is None:
+        return None
+
+    name, created_at, bot, avatar, joined_at, display_name = meta_data
+    return json.dumps([
+        name, created_at.isoformat(), str(bot), str(avatar), joined_at.isoformat() if joined_at else None,
+        display_name,
+    ])
+
+
+def _load_meta_data(meta_data: Optional[str]) -> Optional[list]:
+    if meta_data is None:
+        return None
+
+    name, created_at, bot, avatar, joined_at, display_name = json.loads(meta_data)
+    return [
+        name, datetime.datetime.fromisoformat(created_at), bot, avatar,
+        datetime.datetime.fromisoformat(joined_at) if joined_at else None, display_name,
+    ]
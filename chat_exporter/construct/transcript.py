@@ -1,23 +1,35 @@
 import traceback
 import datetime
 import html
-import pytz
+import io
+import tempfile
 import re
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 
 from chat_exporter.construct.attachment_handler import AttachmentHandler
+from chat_exporter.construct.context import ExportContext
+from chat_exporter.construct.render_cache import RenderCache
 from chat_exporter.ext.discord_import import discord
-from chat_exporter.construct.message import gather_messages
-from chat_exporter.construct.assets.component import Component
-from chat_exporter.ext.cache import clear_cache
-from chat_exporter.parse.mention import pass_bot
+from chat_exporter.construct.message import gather_messages, iter_history, iter_messages
+from chat_exporter.construct.records import dump_error, iter_records
+from chat_exporter.ext.cache import CacheScope
 from chat_exporter.ext.discord_utils import DiscordUtils
+from chat_exporter.ext.profiler import ExportProfiler, NETWORK, STAGES
+from chat_exporter.ext.writer import SPOOL_MAX_SIZE, TranscriptPart, TranscriptWriter
 from chat_exporter.ext.html_generator import (
-    fill_out, total, channel_topic, meta_data_temp, fancy_time, channel_subject, PARSE_MODE_NONE
+    fill_out, fill_values, total, total_head, total_tail, channel_topic, meta_data_temp, fancy_time, channel_subject,
+    end_message, part_navigation, PARSE_MODE_NONE
 )
 
+OUTPUTS = ("html", "ndjson")
+
+Pages = Optional[AsyncIterator[List[discord.Message]]]
+
+
 class TranscriptDAO:
     html: str
+    # Report of the profiler once the export finished, None unless a profiler was passed
+    profile: Optional[dict] = None
 
     def __init__(
         self,
@@ -32,6 +44,8 @@ class TranscriptDAO:
         support_dev: bool,
         bot: Optional[discord.Client],
         attachment_handler: Optional[AttachmentHandler],
+        render_cache: Optional[RenderCache] = None,
+        profiler: Optional[ExportProfiler] = None,
     ):
         self.channel = channel
         self.messages = messages
@@ -44,51 +58,179 @@ class TranscriptDAO:
         self.pytz_timezone = pytz_timezone
         self.attachment_handler = attachment_handler
 
-        # This is to pass timezone in to mention.py without rewriting
-        setattr(discord.Guild, "timezone", self.pytz_timezone)
-
-        if bot:
-            pass_bot(bot)
-
-    async def build_transcript(self):
-        message_html, meta_data = await gather_messages(
-            self.messages,
-            self.channel.guild,
-            self.pytz_timezone,
-            self.military_time,
-            self.attachment_handler
+        self.context = ExportContext(
+            channel.guild,
+            pytz_timezone=pytz_timezone,
+            military_time=military_time,
+            bot=bot,
+            attachment_handler=attachment_handler,
+            render_cache=render_cache,
+            profiler=profiler,
         )
+        self.cache: CacheScope = self.context.cache
+        self.profiler: ExportProfiler = self.context.profiler
+
+    async def build_transcript(self, pages: Pages = None):
+        message_html, meta_data = await gather_messages(self.messages, self.context, pages)
         await self.export_transcript(message_html, meta_data)
-        clear_cache()
-        Component.menu_div_id = 0
         return self
 
-    async def export_transcript(self, message_html: str, meta_data: str):
-        guild_icon = self.channel.guild.icon if (
+    async def stream_transcript(self, writer: TranscriptWriter, pages: Pages = None):
+        values = await self.transcript_values()
+        head_values = values
+        if pages is not None:
+            # The history is still being fetched, the link preview of the head can not count the messages yet
+            head_values = dict(values, MESSAGE_COUNT_DESCRIPTION="")
+        await writer.write(total_head.render(head_values))
+
+        meta_data: dict = {}
+        async for chunk in iter_messages(self.messages, self.context, meta_data, pages):
+            with self.profiler.measure(STAGES, "write"):
+                await writer.write(chunk)
+
+        values["MESSAGE_COUNT"] = str(len(self.messages))
+        values.update(await self.meta_data_values(meta_data))
+        await writer.write(total_tail.render(values))
+        return self
+
+    async def split_transcript(self, max_bytes: int, file_name: str, pages: Pages = None) -> List[TranscriptPart]:
+        """Render the transcript in to parts of at most max_bytes, cut between message groups.
+
+        Messages are spooled first, so every part can carry the header and participant summary of the whole
+        channel. A single message group bigger than the budget still gets a part of its own."""
+        end = end_message.render({}).encode()
+
+        # Rendered messages and the [offset, size] of every message group inside the spool
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        groups: List[List[int]] = []
+        meta_data: dict = {}
+        offset = 0
+        previous = None
+        async for chunk in iter_messages(self.messages, self.context, meta_data, pages):
+            # The last chunk closes the last group, every part closes its own
+            if previous is not None:
+                data = previous.encode()
+                if not groups or data.startswith(end):
+                    groups.append([offset, 0])
+                groups[-1][1] += len(data)
+                spool.write(data)
+                offset += len(data)
+            previous = chunk
+
+        values = await self.transcript_values()
+        values.update(await self.meta_data_values(meta_data))
+        tail = total_tail.render(values).encode()
+
+        # The navigation is measured with the longest links it can hold, every part number as wide as the
+        # part count. More parts than that width holds need a wider navigation, so the groups are split again
+        head_size = len(total_head.render(values).encode()) + len(end) + len(tail)
+        digits = 1
+        while True:
+            widest = 10 ** digits - 1
+            navigation = self._part_navigation(file_name, widest - 1, widest).encode()
+            budget = max_bytes - head_size - len(navigation)
+            if budget <= 0:
+                raise ValueError(f"max_bytes={max_bytes} is smaller than the transcript header and summary")
+
+            parts: List[List[List[int]]] = [[]]
+            part_size = 0
+            for group in groups:
+                if parts[-1] and part_size + group[1] > budget:
+                    parts.append([])
+                    part_size = 0
+                parts[-1].append(group)
+                part_size += group[1]
+
+            if len(str(len(parts))) <= digits:
+                break
+            digits = len(str(len(parts)))
+
+        files = []
+        for index, part in enumerate(parts, 1):
+            part_values = values
+            if len(parts) > 1:
+                part_values = dict(values)
+                part_values["SUBJECT"] = values["SUBJECT"] + self._part_navigation(file_name, index, len(parts))
+
+            fp = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+            fp.write(total_head.render(part_values).encode())
+            for position, (group_offset, group_size) in enumerate(part):
+                spool.seek(group_offset)
+                data = spool.read(group_size)
+                if position == 0 and index > 1:
+                    # The group closing the previous part is closed there already
+                    data = data[len(end):]
+                fp.write(data)
+            fp.write(end)
+            fp.write(tail)
+
+            size = fp.tell()
+            fp.seek(0)
+            files.append(TranscriptPart(self._part_file_name(file_name, index, len(parts)), fp, size))
+
+        spool.close()
+        return files
+
+    @staticmethod
+    def _part_file_name(file_name: str, part: int, parts: int) -> str:
+        return f"{file_name}.html" if parts == 1 else f"{file_name}-part-{part}.html"
+
+    def _part_navigation(self, file_name: str, part: int, parts: int) -> str:
+        previous_part = next_part = ""
+        if part > 1:
+            previous_part = f'<a href="{html.escape(self._part_file_name(file_name, part - 1, parts))}">Previous part</a>'
+        if part < parts:
+            next_part = f'<a href="{html.escape(self._part_file_name(file_name, part + 1, parts))}">Next part</a>'
+
+        return part_navigation.render({
+            "PART": str(part),
+            "PARTS": str(parts),
+            "PREVIOUS_PART": previous_part,
+            "NEXT_PART": next_part,
+        })
+
+    async def stream_records(self, writer: TranscriptWriter):
+        async for record in iter_records(self.channel, self.messages, self.context):
+            await writer.write(record)
+        return self
+
+    def finish_profile(self):
+        """Stop the profiler and keep its report as self.profile."""
+        if self.profiler.enabled:
+            self.profiler.finish(self.context)
+            self.profile = self.profiler.report()
+
+    async def export_transcript(self, message_html: str, meta_data: dict):
+        values = await self.transcript_values()
+        values.update(await fill_values(self.context, [("MESSAGES", message_html, PARSE_MODE_NONE)]))
+        values.update(await self.meta_data_values(meta_data))
+        self.html = total.render(values)
+
+    def _guild_icon(self):
+        return self.channel.guild.icon if (
                 self.channel.guild.icon and len(self.channel.guild.icon) > 2
         ) else DiscordUtils.default_avatar
 
-        guild_name = html.escape(self.channel.guild.name)
+    async def meta_data_values(self, meta_data: dict) -> dict:
+        with self.profiler.measure(STAGES, "summary"):
+            return await self._meta_data_values(meta_data)
 
-        timezone = pytz.timezone(self.pytz_timezone)
-        if self.military_time:
-            time_now = datetime.datetime.now(timezone).strftime("%e %B %Y at %H:%M:%S (%Z)")
-        else:
-            time_now = datetime.datetime.now(timezone).strftime("%e %B %Y at %I:%M:%S %p (%Z)")
+    async def _meta_data_values(self, meta_data: dict) -> dict:
+        guild_icon = self._guild_icon()
+        time_formatter = self.context.time_formatter
 
         meta_data_html: str = ""
         for data in meta_data:
-            creation_time = meta_data[int(data)][1].astimezone(timezone).strftime("%b %d, %Y")
-            joined_time = (
-                meta_data[int(data)][5].astimezone(timezone).strftime("%b %d, %Y")
-                if meta_data[int(data)][5] else "Unknown"
+            creation_time, joined_time = time_formatter.format_batch(
+                (meta_data[int(data)][1], meta_data[int(data)][5]), time_formatter.date_format
             )
+            joined_time = joined_time or "Unknown"
 
             pattern = r'^#\d{4}'
             discrim = str(meta_data[int(data)][0][-5:])
             user = str(meta_data[int(data)][0])
 
-            meta_data_html += await fill_out(self.channel.guild, meta_data_temp, [
+            meta_data_html += await fill_out(self.context, meta_data_temp, [
                 ("USER_ID", str(data), PARSE_MODE_NONE),
                 ("USERNAME", user[:-5] if re.match(pattern, discrim) else user, PARSE_MODE_NONE),
                 ("DISCRIMINATOR", discrim if re.match(pattern, discrim) else ""),
@@ -103,10 +245,22 @@ class TranscriptDAO:
                 ("MESSAGE_COUNT", str(meta_data[int(data)][4]))
             ])
 
-        if self.military_time:
-            channel_creation_time = self.channel.created_at.astimezone(timezone).strftime("%b %d, %Y (%H:%M:%S)")
-        else:
-            channel_creation_time = self.channel.created_at.astimezone(timezone).strftime("%b %d, %Y (%I:%M:%S %p)")
+        return await fill_values(self.context, [
+            ("META_DATA", meta_data_html, PARSE_MODE_NONE),
+            ("MESSAGE_PARTICIPANTS", str(len(meta_data)), PARSE_MODE_NONE),
+        ])
+
+    async def transcript_values(self) -> dict:
+        with self.profiler.measure(STAGES, "header"):
+            return await self._transcript_values()
+
+    async def _transcript_values(self) -> dict:
+        guild_icon = self._guild_icon()
+        guild_name = html.escape(self.channel.guild.name)
+
+        time_formatter = self.context.time_formatter
+        time_now = time_formatter.now()
+        channel_creation_time = time_formatter.format(self.channel.created_at, time_formatter.channel_format)
 
         raw_channel_topic = (
             self.channel.topic if isinstance(self.channel, discord.TextChannel) and self.channel.topic else ""
@@ -114,7 +268,7 @@ class TranscriptDAO:
 
         channel_topic_html = ""
         if raw_channel_topic:
-            channel_topic_html = await fill_out(self.channel.guild, channel_topic, [
+            channel_topic_html = await fill_out(self.context, channel_topic, [
                 ("CHANNEL_TOPIC", html.escape(raw_channel_topic))
             ])
 
@@ -122,7 +276,7 @@ class TranscriptDAO:
         if self.limit:
             limit = f"latest {self.limit} messages"
 
-        subject = await fill_out(self.channel.guild, channel_subject, [
+        subject = await fill_out(self.context, channel_subject, [
             ("LIMIT", limit, PARSE_MODE_NONE),
             ("CHANNEL_NAME", self.channel.name),
             ("RAW_CHANNEL_TOPIC", str(raw_channel_topic))
@@ -136,45 +290,119 @@ class TranscriptDAO:
             else:
                 time_format = "hh:mm A"
 
-            _fancy_time = await fill_out(self.channel.guild, fancy_time, [
+            _fancy_time = await fill_out(self.context, fancy_time, [
                 ("TIME_FORMAT", time_format, PARSE_MODE_NONE),
                 ("TIMEZONE", str(self.pytz_timezone), PARSE_MODE_NONE)
             ])
 
-        self.html = await fill_out(self.channel.guild, total, [
+        values = await fill_values(self.context, [
             ("SERVER_NAME", f"{guild_name}"),
             ("GUILD_ID", str(self.channel.guild.id), PARSE_MODE_NONE),
             ("SERVER_AVATAR_URL", str(guild_icon), PARSE_MODE_NONE),
             ("CHANNEL_NAME", f"{self.channel.name}"),
             ("MESSAGE_COUNT", str(len(self.messages))),
-            ("MESSAGES", message_html, PARSE_MODE_NONE),
-            ("META_DATA", meta_data_html, PARSE_MODE_NONE),
             ("DATE_TIME", str(time_now)),
             ("SUBJECT", subject, PARSE_MODE_NONE),
             ("CHANNEL_CREATED_AT", str(channel_creation_time), PARSE_MODE_NONE),
             ("CHANNEL_TOPIC", str(channel_topic_html), PARSE_MODE_NONE),
             ("CHANNEL_ID", str(self.channel.id), PARSE_MODE_NONE),
-            ("MESSAGE_PARTICIPANTS", str(len(meta_data)), PARSE_MODE_NONE),
             ("FANCY_TIME", _fancy_time, PARSE_MODE_NONE)
         ])
+        # Filled values are stripped, the description keeps the space separating it from the guild
+        values["MESSAGE_COUNT_DESCRIPTION"] = f" with {len(self.messages)} messages"
+        return values
 
 
 class Transcript(TranscriptDAO):
-    async def export(self):
+    async def gather_history(self, overlap: bool = False) -> Pages:
+        """Collect the messages to export.
+
+        With overlap a history that can be read oldest first is not collected up front, the pages of it are
+        returned instead so they render while the rest is still being fetched. The latest limit messages have to
+        be read newest first and are always collected."""
+        self.profiler.start()
+
+        if not self.messages and overlap and (not self.limit or self.after):
+            self.messages = []
+            return iter_history(self.channel, self.context, self.limit, self.before, self.after)
+
         if not self.messages:
-            self.messages = [message async for message in self.channel.history(
-                limit=self.limit,
-                before=self.before,
-                after=self.after,
-            )]
+            with self.profiler.measure(NETWORK, "history"):
+                self.messages = [message async for message in self.channel.history(
+                    limit=self.limit,
+                    before=self.before,
+                    after=self.after,
+                )]
 
         if not self.after:
             self.messages.reverse()
+        return None
+
+    async def export(self):
+        pages = await self.gather_history(overlap=True)
 
         try:
-            return await super().build_transcript()
+            return await super().build_transcript(pages)
         except Exception:
             self.html = "Whoops! Something went wrong..."
             traceback.print_exc()
             print("Please send a screenshot of the above error to https://github.com/FroostySnoowman/py-discord-html-transcripts")
-            return self
\ No newline at end of file
+            return self
+        finally:
+            if pages is not None:
+                await pages.aclose()
+            self.finish_profile()
+
+    async def split(self, max_bytes: int, file_name: Optional[str] = None) -> List[TranscriptPart]:
+        """Render the transcript in to files of at most max_bytes each, see split_transcript.
+        :param max_bytes: size limit of every part, e.g. the upload limit of the guild
+        :param file_name: (optional) file name without extension, defaults to transcript-<channel name>
+        """
+        pages = await self.gather_history(overlap=True)
+        file_name = file_name or f"transcript-{self.channel.name}"
+
+        try:
+            return await super().split_transcript(max_bytes, file_name, pages)
+        except ValueError:
+            raise
+        except Exception:
+            traceback.print_exc()
+            print("Please send a screenshot of the above error to https://github.com/FroostySnoowman/py-discord-html-transcripts")
+            data = b"Whoops! Something went wrong..."
+            return [TranscriptPart(f"{file_name}.html", io.BytesIO(data), len(data))]
+        finally:
+            if pages is not None:
+                await pages.aclose()
+            self.finish_profile()
+
+    async def stream(self, sink, output: str = "html", compression: Optional[str] = None):
+        """Render the transcript straight into a file-like sink or async writer instead of self.html.
+
+        When the history is fetched while the page renders, every message is written as soon as it is rendered.
+        The head goes out before the messages are counted, so its link preview description leaves the count out.
+        :param sink: file-like object (text or binary) or async writer
+        :param output: "html" for the transcript page, "ndjson" for one JSON record per line (an "error" record
+            ends an export that failed)
+        :param compression: (optional) "gzip" or "zstd" to compress the output on the fly
+        """
+        if output not in OUTPUTS:
+            raise ValueError(f"Unknown output {output!r}, expected one of {', '.join(OUTPUTS)}")
+
+        # Records start with the message count, only the HTML page can be rendered while the history is fetched
+        pages = await self.gather_history(overlap=output == "html")
+        writer = TranscriptWriter(sink, compression=compression)
+
+        try:
+            if output == "ndjson":
+                return await super().stream_records(writer)
+            return await super().stream_transcript(writer, pages)
+        except Exception as error:
+            await writer.write(dump_error(error) if output == "ndjson" else "Whoops! Something went wrong...")
+            traceback.print_exc()
+            print("Please send a screenshot of the above error to https://github.com/FroostySnoowman/py-discord-html-transcripts")
+            return self
+        finally:
+            if pages is not None:
+                await pages.aclose()
+            await writer.finish()
+            self.finish_profile()
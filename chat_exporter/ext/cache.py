@@ -1,54 +1,132 @@
+import hashlib
+import inspect
+import json
+import time
+from collections import OrderedDict
 from functools import wraps
-from typing import Any, Dict, Tuple
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
 
-_internal_cache: dict = {}
+EXPORT_CACHE_SIZE = 8192
+SHARED_CACHE_SIZE = 4096
+# Rendered embeds, components and reactions kept per export, for each kind of asset
+ASSET_CACHE_SIZE = 1024
+ASSET_KINDS = ("embeds", "components", "reactions")
 
-def _wrap_and_store_coroutine(cache, key, coro):
-    async def func():
-        value = await coro
-        cache[key] = value
-        return value
-    return func()
+_MISSING = object()
+
+
+class CacheScope:
+    """Bounded LRU store with optional per-entry TTL and hit/miss counters."""
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._store: "OrderedDict[Hashable, Tuple[Optional[float], Any]]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._store)
+
+    def get(self, key: Hashable, default=None):
+        try:
+            expires_at, value = self._store[key]
+        except KeyError:
+            self.misses += 1
+            return default
 
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._store[key]
+            self.misses += 1
+            return default
 
-def _wrap_new_coroutine(value):
-    async def new_coroutine():
+        self._store.move_to_end(key)
+        self.hits += 1
         return value
-    return new_coroutine()
 
-def clear_cache():
-    _internal_cache.clear()
+    def set(self, key: Hashable, value, ttl: Optional[float] = None):
+        self._store[key] = (time.monotonic() + ttl if ttl is not None else None, value)
+        self._store.move_to_end(key)
+
+        if self.maxsize is not None:
+            while len(self._store) > self.maxsize:
+                self._store.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        self._store.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self._store)}
+
+
+def payload_key(payload) -> str:
+    """Stable hash of a JSON-like payload, e.g. the to_dict() of an embed, equal payloads give equal keys."""
+    data = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
 
-def cache():
+
+# Long-lived tier shared by every export, for values that do not depend on a single transcript
+shared_cache = CacheScope(maxsize=SHARED_CACHE_SIZE)
+
+
+def cache(shared: bool = False, ttl: Optional[float] = None, key: Optional[Callable[..., Hashable]] = None):
+    """Memoize a function or coroutine function.
+
+    Unless shared, results are stored in the cache of the export the method runs for (self.context.cache)
+    and are not cached at all outside an export.
+
+    :param shared: store results in the long-lived shared tier instead of the export cache
+    :param ttl: seconds before an entry expires, None to keep it until evicted
+    :param key: builds the cache key from the call arguments, defaults to the arguments themselves
+    """
     def decorator(func):
-        def _make_key(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> str:
-            def _true_repr(o):
-                if o.__class__.__repr__ is object.__repr__:
-                    # this is how MessageConstruct can retain
-                    # caching across multiple instances
-                    return f'<{o.__class__.__module__}.{o.__class__.__name__}>'
-                return repr(o)
-
-            key = [f'{func.__module__}.{func.__name__}']
-            key.extend(_true_repr(o) for o in args)
-            for k, v in kwargs.items():
-                key.append(_true_repr(k))
-                key.append(_true_repr(v))
-
-            return ':'.join(key)
-
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            key = _make_key(args, kwargs)
-            try:
-                value = _internal_cache[key]
-            except KeyError:
-                value = func(*args, **kwargs)
-                return _wrap_and_store_coroutine(_internal_cache, key, value)
+        # Methods are keyed on their arguments only, this is how MessageConstruct can retain
+        # caching across multiple instances
+        is_method = "." in func.__qualname__.rpartition("<locals>.")[2]
+
+        def _make_key(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Hashable:
+            if key is not None:
+                return func, key(*args, **kwargs)
+            if is_method:
+                args = args[1:]
+            if kwargs:
+                return func, args, tuple(sorted(kwargs.items()))
+            return func, args
+
+        def _lookup(args, kwargs):
+            if shared:
+                scope = shared_cache
             else:
-                return _wrap_new_coroutine(value)
+                scope = getattr(getattr(args[0], "context", None), "cache", None) if is_method and args else None
+            if scope is None:
+                return None, None, _MISSING
+
+            cache_key = _make_key(args, kwargs)
+            try:
+                return scope, cache_key, scope.get(cache_key, _MISSING)
+            except TypeError:
+                # Unhashable arguments are not cached
+                return None, None, _MISSING
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                scope, cache_key, value = _lookup(args, kwargs)
+                if value is _MISSING:
+                    value = await func(*args, **kwargs)
+                    if scope is not None:
+                        scope.set(cache_key, value, ttl)
+                return value
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                scope, cache_key, value = _lookup(args, kwargs)
+                if value is _MISSING:
+                    value = func(*args, **kwargs)
+                    if scope is not None:
+                        scope.set(cache_key, value, ttl)
+                return value
 
-        wrapper.cache = _internal_cache
-        wrapper.clear_cache = _internal_cache.clear()
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
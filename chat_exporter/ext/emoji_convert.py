@@ -1,20 +1,14 @@
+import re
 import unicodedata
 from grapheme import graphemes
 import emoji
-import aiohttp
 
 from chat_exporter.ext.cache import cache
+from chat_exporter.ext.twemoji import cdn_format, has_asset
 
-cdn_fmt = "https://cdn.jsdelivr.net/gh/jdecked/twemoji@latest/assets/72x72/{codepoint}.png"
+cdn_fmt = cdn_format()
 
-@cache()
-async def valid_src(src):
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(src) as resp:
-                return resp.status == 200
-    except aiohttp.ClientConnectorError:
-        return False
+NON_ASCII_PATTERN = re.compile(r"[^\x00-\x7f]+")
 
 def valid_category(char):
     try:
@@ -22,12 +16,13 @@ def valid_category(char):
     except TypeError:
         return False
 
-async def codepoint(codes):
+def codepoint(codes):
     if "200d" not in codes:
         return "-".join([c for c in codes if c != "fe0f"])
     return "-".join(codes)
 
-async def convert(char):
+@cache(shared=True)
+def convert_grapheme(char):
     if valid_category(char):
         name = unicodedata.name(char).title()
     else:
@@ -37,15 +32,45 @@ async def convert(char):
             shortcode = emoji.demojize(char)
             name = shortcode.replace(":", "").replace("_", " ").replace("selector", "").title()
 
-    src = cdn_fmt.format(codepoint=await codepoint(["{cp:x}".format(cp=ord(c)) for c in char]))
+    code = codepoint(["{cp:x}".format(cp=ord(c)) for c in char])
 
-    if await valid_src(src):
+    if has_asset(code):
+        src = cdn_fmt.format(codepoint=code)
         return f'<img class="emoji emoji--small" src="{src}" alt="{char}" title="{name}" aria-label="Emoji: {name}">'
     else:
         return char
 
+async def convert(char):
+    return convert_grapheme(char)
+
+def emoji_spans(string):
+    """Yield (start, end) spans around runs of non-ASCII characters.
+
+    Spans are padded by one character on each side so clusters that begin or end with
+    an ASCII character (keycaps, combining marks) are segmented as in the full string."""
+    span_start = span_end = None
+    for match in NON_ASCII_PATTERN.finditer(string):
+        start, end = max(match.start() - 1, 0), min(match.end() + 1, len(string))
+        if span_end is not None and start < span_end:
+            span_end = end
+            continue
+        if span_end is not None:
+            yield span_start, span_end
+        span_start, span_end = start, end
+
+    if span_end is not None:
+        yield span_start, span_end
+
 async def convert_emoji(string):
+    # ASCII text can not contain an emoji, skip grapheme segmentation entirely
+    if string.isascii():
+        return string
+
     x = []
-    for ch in graphemes(string):
-        x.append(await convert(ch))
+    position = 0
+    for start, end in emoji_spans(string):
+        x.append(string[position:start])
+        x.extend(convert_grapheme(ch) for ch in graphemes(string[start:end]))
+        position = end
+    x.append(string[position:])
     return "".join(x)
\ No newline at end of file
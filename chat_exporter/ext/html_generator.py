@@ -1,6 +1,9 @@
 import os
+import re
+import time
 from chat_exporter.parse.mention import ParseMention
 from chat_exporter.parse.markdown import ParseMarkdown
+from chat_exporter.ext.profiler import PARSE_MODES
 
 dir_path = os.path.abspath(os.path.join((os.path.dirname(os.path.realpath(__file__))), ".."))
 
@@ -12,7 +15,60 @@ PARSE_MODE_SPECIAL_EMBED = 4
 PARSE_MODE_REFERENCE = 5
 PARSE_MODE_EMOJI = 6
 
-async def fill_out(guild, base, replacements):
+PARSE_MODE_NAMES = {
+    PARSE_MODE_NO_MARKDOWN: "no_markdown",
+    PARSE_MODE_MARKDOWN: "markdown",
+    PARSE_MODE_EMBED: "embed",
+    PARSE_MODE_SPECIAL_EMBED: "special_embed",
+    PARSE_MODE_REFERENCE: "reference",
+    PARSE_MODE_EMOJI: "emoji",
+}
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{([A-Z0-9_]+)\}\}")
+
+
+class Template:
+    """HTML template compiled once into literal segments and {{KEY}} slots.
+
+    Rendering is a single join, unfilled slots keep their placeholder text."""
+
+    __slots__ = ("source", "parts", "slots")
+
+    def __init__(self, source: str):
+        self.source = source
+        self.parts = []
+        self.slots = []
+
+        for index, part in enumerate(PLACEHOLDER_PATTERN.split(source)):
+            if index % 2:
+                self.slots.append((len(self.parts), part))
+                self.parts.append("{{" + part + "}}")
+            elif part:
+                self.parts.append(part)
+
+    def render(self, values: dict) -> str:
+        parts = self.parts[:]
+        for index, key in self.slots:
+            value = values.get(key)
+            if value is not None:
+                parts[index] = value
+        return "".join(parts)
+
+    def partition(self, key: str):
+        """Split the template around its first {{KEY}} slot, e.g. to stream content in between."""
+        head, _, tail = self.source.partition("{{" + key + "}}")
+        return Template(head), Template(tail)
+
+
+async def fill_out(context, base, replacements):
+    if not isinstance(base, Template):
+        base = Template(base)
+
+    return base.render(await fill_values(context, replacements))
+
+async def fill_values(context, replacements):
+    profiler = context.profiler
+    values = {}
     for r in replacements:
         if len(r) == 2:  # default case
             k, v = r
@@ -20,8 +76,13 @@ async def fill_out(guild, base, replacements):
 
         k, v, mode = r
 
+        if k in values:
+            continue
+
+        start = time.perf_counter() if profiler.enabled and mode != PARSE_MODE_NONE else None
+
         if mode != PARSE_MODE_NONE:
-            v = await ParseMention(v, guild).flow()
+            v = await ParseMention(v, context).flow()
         if mode == PARSE_MODE_MARKDOWN:
             v = await ParseMarkdown(v).standard_message_flow()
         elif mode == PARSE_MODE_EMBED:
@@ -33,64 +94,72 @@ async def fill_out(guild, base, replacements):
         elif mode == PARSE_MODE_EMOJI:
             v = await ParseMarkdown(v).special_emoji_flow()
 
-        base = base.replace("{{" + k + "}}", v.strip())
+        if start is not None:
+            profiler.add(PARSE_MODES, PARSE_MODE_NAMES[mode], time.perf_counter() - start)
 
-    return base
+        values[k] = v.strip()
+
+    return values
 
 def read_file(filename):
     with open(filename, "r") as f:
         s = f.read()
     return s
 
+def read_template(filename):
+    return Template(read_file(filename))
+
 # MESSAGES
-start_message = read_file(dir_path + "/html/message/start.html")
+start_message = read_template(dir_path + "/html/message/start.html")
 bot_tag = read_file(dir_path + "/html/message/bot-tag.html")
 bot_tag_verified = read_file(dir_path + "/html/message/bot-tag-verified.html")
-message_content = read_file(dir_path + "/html/message/content.html")
-message_reference = read_file(dir_path + "/html/message/reference.html")
-message_interaction = read_file(dir_path + "/html/message/interaction.html")
-message_pin = read_file(dir_path + "/html/message/pin.html")
-message_thread = read_file(dir_path + "/html/message/thread.html")
-message_thread_remove = read_file(dir_path + "/html/message/thread_remove.html")
-message_thread_add = read_file(dir_path + "/html/message/thread_add.html")
+message_content = read_template(dir_path + "/html/message/content.html")
+message_reference = read_template(dir_path + "/html/message/reference.html")
+message_interaction = read_template(dir_path + "/html/message/interaction.html")
+message_pin = read_template(dir_path + "/html/message/pin.html")
+message_thread = read_template(dir_path + "/html/message/thread.html")
+message_thread_remove = read_template(dir_path + "/html/message/thread_remove.html")
+message_thread_add = read_template(dir_path + "/html/message/thread_add.html")
 message_reference_unknown = read_file(dir_path + "/html/message/reference_unknown.html")
-message_body = read_file(dir_path + "/html/message/message.html")
-end_message = read_file(dir_path + "/html/message/end.html")
-meta_data_temp = read_file(dir_path + "/html/message/meta.html")
+message_body = read_template(dir_path + "/html/message/message.html")
+end_message = read_template(dir_path + "/html/message/end.html")
+meta_data_temp = read_template(dir_path + "/html/message/meta.html")
 
 # COMPONENTS
-component_button = read_file(dir_path + "/html/component/component_button.html")
-component_menu = read_file(dir_path + "/html/component/component_menu.html")
-component_menu_options = read_file(dir_path + "/html/component/component_menu_options.html")
-component_menu_options_emoji = read_file(dir_path + "/html/component/component_menu_options_emoji.html")
+component_button = read_template(dir_path + "/html/component/component_button.html")
+component_menu = read_template(dir_path + "/html/component/component_menu.html")
+component_menu_options = read_template(dir_path + "/html/component/component_menu_options.html")
+component_menu_options_emoji = read_template(dir_path + "/html/component/component_menu_options_emoji.html")
 
 # EMBED
-embed_body = read_file(dir_path + "/html/embed/body.html")
-embed_title = read_file(dir_path + "/html/embed/title.html")
-embed_description = read_file(dir_path + "/html/embed/description.html")
-embed_field = read_file(dir_path + "/html/embed/field.html")
-embed_field_inline = read_file(dir_path + "/html/embed/field-inline.html")
-embed_footer = read_file(dir_path + "/html/embed/footer.html")
-embed_footer_icon = read_file(dir_path + "/html/embed/footer_image.html")
-embed_image = read_file(dir_path + "/html/embed/image.html")
-embed_thumbnail = read_file(dir_path + "/html/embed/thumbnail.html")
-embed_author = read_file(dir_path + "/html/embed/author.html")
-embed_author_icon = read_file(dir_path + "/html/embed/author_icon.html")
+embed_body = read_template(dir_path + "/html/embed/body.html")
+embed_title = read_template(dir_path + "/html/embed/title.html")
+embed_description = read_template(dir_path + "/html/embed/description.html")
+embed_field = read_template(dir_path + "/html/embed/field.html")
+embed_field_inline = read_template(dir_path + "/html/embed/field-inline.html")
+embed_footer = read_template(dir_path + "/html/embed/footer.html")
+embed_footer_icon = read_template(dir_path + "/html/embed/footer_image.html")
+embed_image = read_template(dir_path + "/html/embed/image.html")
+embed_thumbnail = read_template(dir_path + "/html/embed/thumbnail.html")
+embed_author = read_template(dir_path + "/html/embed/author.html")
+embed_author_icon = read_template(dir_path + "/html/embed/author_icon.html")
 
 # REACTION
-emoji = read_file(dir_path + "/html/reaction/emoji.html")
-custom_emoji = read_file(dir_path + "/html/reaction/custom_emoji.html")
+emoji = read_template(dir_path + "/html/reaction/emoji.html")
+custom_emoji = read_template(dir_path + "/html/reaction/custom_emoji.html")
 
 # ATTACHMENT
-img_attachment = read_file(dir_path + "/html/attachment/image.html")
-msg_attachment = read_file(dir_path + "/html/attachment/message.html")
-audio_attachment = read_file(dir_path + "/html/attachment/audio.html")
-video_attachment = read_file(dir_path + "/html/attachment/video.html")
+img_attachment = read_template(dir_path + "/html/attachment/image.html")
+msg_attachment = read_template(dir_path + "/html/attachment/message.html")
+audio_attachment = read_template(dir_path + "/html/attachment/audio.html")
+video_attachment = read_template(dir_path + "/html/attachment/video.html")
 
 # GUILD / FULL TRANSCRIPT
-total = read_file(dir_path + "/html/base.html")
+total = read_template(dir_path + "/html/base.html")
+total_head, total_tail = total.partition("MESSAGES")
 
 # SCRIPT
-fancy_time = read_file(dir_path + "/html/script/fancy_time.html")
-channel_topic = read_file(dir_path + "/html/script/channel_topic.html")
-channel_subject = read_file(dir_path + "/html/script/channel_subject.html")
\ No newline at end of file
+fancy_time = read_template(dir_path + "/html/script/fancy_time.html")
+channel_topic = read_template(dir_path + "/html/script/channel_topic.html")
+channel_subject = read_template(dir_path + "/html/script/channel_subject.html")
+part_navigation = read_template(dir_path + "/html/script/part_navigation.html")
\ No newline at end of file
@@ -0,0 +1,104 @@
+import time
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+
+# Groups a profiler reports on
+STAGES = "stages"
+PARSE_MODES = "parse_modes"
+NETWORK = "network"
+
+_DISABLED = nullcontext()
+
+
+class _Timer:
+    __slots__ = ("entry", "start")
+
+    def __init__(self, entry: List[float]):
+        self.entry = entry
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.entry[0] += 1
+        self.entry[1] += time.perf_counter() - self.start
+        return False
+
+
+class ExportProfiler:
+    """Cumulative time and call counts of an export, per stage, per fill_out parse mode and per network call.
+
+    Messages are prefetched concurrently with rendering, so network timings overlap the stages and may add
+    up to more than the export took. A disabled profiler measures nothing and costs a single attribute check."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        # group -> name -> [calls, seconds]
+        self.timings: Dict[str, Dict[str, List[float]]] = {STAGES: {}, PARSE_MODES: {}, NETWORK: {}}
+        self.stats: dict = {}
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def measure(self, group: str, name: str):
+        """Context manager adding the time spent inside it to group/name.
+        :param group: STAGES, PARSE_MODES or NETWORK
+        :param name: e.g. "build_content" or "fetch_message"
+        """
+        if not self.enabled:
+            return _DISABLED
+        return _Timer(self.timings[group].setdefault(name, [0, 0.0]))
+
+    def add(self, group: str, name: str, seconds: float, calls: int = 1):
+        if not self.enabled:
+            return
+        entry = self.timings[group].setdefault(name, [0, 0.0])
+        entry[0] += calls
+        entry[1] += seconds
+
+    def start(self):
+        if self.started is None:
+            self.started = time.perf_counter()
+
+    def finish(self, context):
+        """Stop the clock and keep the counters the export collected on its context."""
+        if not self.enabled:
+            return
+        self.finished = time.perf_counter()
+        self.stats = {
+            "members": dict(context.member_stats),
+            "attachments": dict(context.attachment_stats),
+            "render_cache": dict(context.render_stats),
+            "cache": context.cache.stats(),
+            "assets": {kind: cache.stats() for kind, cache in context.asset_caches.items()},
+        }
+
+    def report(self) -> dict:
+        """Structured report, every group maps names to {"calls", "seconds"} sorted by time spent."""
+        total = (self.finished or time.perf_counter()) - self.started if self.started is not None else 0.0
+        report = {"seconds": total}
+        for group, timings in self.timings.items():
+            report[group] = {
+                name: {"calls": int(calls), "seconds": seconds}
+                for name, (calls, seconds) in sorted(timings.items(), key=lambda item: -item[1][1])
+            }
+        report.update(self.stats)
+        return report
+
+    def summary(self) -> str:
+        """The report as a few readable lines, e.g. for logging."""
+        report = self.report()
+        lines = [f"export took {report['seconds']:.3f}s"]
+        for group in (STAGES, PARSE_MODES, NETWORK):
+            if report[group]:
+                lines.append(f"{group}: " + ", ".join(
+                    f"{name} {timing['seconds']:.3f}s/{timing['calls']}" for name, timing in report[group].items()
+                ))
+        for name in ("members", "attachments", "render_cache", "cache"):
+            if report.get(name):
+                lines.append(f"{name}: " + ", ".join(f"{key}={value}" for key, value in report[name].items()))
+        for kind, stats in report.get("assets", {}).items():
+            if stats["hits"] or stats["misses"]:
+                lines.append(f"{kind}: rendered {stats['misses']}, reused {stats['hits']}")
+        return "\n".join(lines)
@@ -0,0 +1,87 @@
+import datetime
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pytz
+
+# Directives whose output changes within a minute, formats using them are memoized per second instead
+SECOND_DIRECTIVES = ("%S", "%T", "%X", "%c", "%s", "%f")
+
+
+class TimeFormatter:
+    """Formats every timestamp of one export in its timezone and clock format.
+
+    The timezone is resolved once when the export starts and formatted strings are memoized per minute, so
+    the many messages sent within the same minute are localized and formatted a single time."""
+
+    def __init__(self, pytz_timezone="UTC", military_time: bool = True):
+        self.tzinfo = pytz.timezone(pytz_timezone)
+        self.military_time = military_time
+
+        if military_time:
+            self.message_format = "%A, %e %B %Y %H:%M"
+            self.default_format = "%d-%m-%Y %H:%M"
+            self.channel_format = "%b %d, %Y (%H:%M:%S)"
+            self.generated_format = "%e %B %Y at %H:%M:%S (%Z)"
+        else:
+            self.message_format = "%A, %e %B %Y %I:%M %p"
+            self.default_format = "%d-%m-%Y %I:%M %p"
+            self.channel_format = "%b %d, %Y (%I:%M:%S %p)"
+            self.generated_format = "%e %B %Y at %I:%M:%S %p (%Z)"
+        self.date_format = "%b %d, %Y"
+
+        self._formatted: Dict[Tuple[str, int], str] = {}
+
+    def localize(self, moment: datetime.datetime) -> datetime.datetime:
+        if not moment.tzinfo:
+            moment = pytz.utc.localize(moment)
+        return moment.astimezone(self.tzinfo)
+
+    def format(self, moment: datetime.datetime, strf: str) -> str:
+        """Format an aware (or naive UTC) datetime in the export timezone.
+
+        :param moment: the datetime to format
+        :param strf: strftime format
+        """
+        if not moment.tzinfo:
+            moment = pytz.utc.localize(moment)
+
+        seconds = int(moment.timestamp())
+        key = (strf, seconds if any(directive in strf for directive in SECOND_DIRECTIVES) else seconds // 60)
+        try:
+            return self._formatted[key]
+        except KeyError:
+            formatted = self._formatted[key] = moment.astimezone(self.tzinfo).strftime(strf)
+            return formatted
+
+    def format_batch(self, moments: Iterable[Optional[datetime.datetime]], strf: str) -> List[str]:
+        """Format many datetimes at once, None formats as an empty string."""
+        return [self.format(moment, strf) if moment else "" for moment in moments]
+
+    def message_times(self, message) -> Tuple[str, str]:
+        """Header timestamp of a message and of its last edit ("" when it was never edited)."""
+        created_at, edited_at = self.format_batch((message.created_at, message.edited_at), self.message_format)
+        return created_at, edited_at
+
+    def now(self) -> str:
+        return datetime.datetime.now(self.tzinfo).strftime(self.generated_format)
+
+    def mention(self, timestamp: int, strf: str) -> Tuple[str, str]:
+        """Text and tooltip of a <t:timestamp:style> mention.
+
+        :param timestamp: unix timestamp of the mention
+        :param strf: strftime format of the mention style
+        """
+        try:
+            moment = datetime.datetime.fromtimestamp(timestamp, tz=pytz.utc)
+        except (OverflowError, OSError, ValueError):
+            # Beyond what datetime can represent, format the day and time with a stand-in year
+            time_stamp = time.gmtime(timestamp)
+            moment = datetime.datetime(2010, *time_stamp[1:6], tzinfo=pytz.utc)
+            year = str(time_stamp[0])
+            return (
+                moment.strftime(strf).replace("2010", year),
+                moment.strftime("%A, %e %B %Y at %H:%M").replace("2010", year),
+            )
+
+        return self.format(moment, strf), self.format(moment, "%A, %e %B %Y at %H:%M")
@@ -0,0 +1,77 @@
+import asyncio
+import functools
+import os
+import re
+import sys
+
+import aiohttp
+
+index_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "twemoji.txt")
+
+TWEMOJI_PACKAGE = "jdecked/twemoji"
+TWEMOJI_ASSETS = "/assets/72x72/"
+JSDELIVR_API = "https://data.jsdelivr.com/v1/packages/gh/"
+JSDELIVR_CDN = "https://cdn.jsdelivr.net/gh/"
+
+HEADER_PATTERN = re.compile(r"^# " + re.escape(TWEMOJI_PACKAGE) + r"@(\S+) ")
+
+
+@functools.lru_cache(maxsize=None)
+def load_index(path: str = index_path) -> frozenset:
+    """Load the bundled set of twemoji codepoints (e.g. "1f600", "1f468-200d-1f469") that have a PNG asset."""
+    with open(path, "r") as f:
+        return frozenset(line.strip() for line in f if line.strip() and not line.startswith("#"))
+
+
+@functools.lru_cache(maxsize=None)
+def index_version(path: str = index_path) -> str:
+    """The twemoji tag the bundled index was listed from, recorded on its first line."""
+    with open(path, "r") as f:
+        match = HEADER_PATTERN.match(f.readline())
+    if match is None:
+        raise ValueError(f"{path} does not start with a '# {TWEMOJI_PACKAGE}@<version>' header")
+    return match.group(1)
+
+
+def cdn_format(path: str = index_path) -> str:
+    """URL format of the PNG assets, pinned to the tag of the index so both always list the same files."""
+    return f"{JSDELIVR_CDN}{TWEMOJI_PACKAGE}@{index_version(path)}{TWEMOJI_ASSETS}{{codepoint}}.png"
+
+
+def has_asset(codepoint: str) -> bool:
+    return codepoint in load_index()
+
+
+async def refresh_index(version: str = "latest", path: str = index_path) -> int:
+    """Regenerate the index from the jsdelivr file listing of the twemoji package.
+    :param version: twemoji version or "latest"
+    :param path: where to write the index
+    :return: number of codepoints written
+    """
+    async with aiohttp.ClientSession(raise_for_status=True) as session:
+        if version == "latest":
+            async with session.get(f"{JSDELIVR_API}{TWEMOJI_PACKAGE}/resolved?specifier=latest") as resp:
+                version = (await resp.json())["version"]
+
+        async with session.get(f"{JSDELIVR_API}{TWEMOJI_PACKAGE}@{version}?structure=flat") as resp:
+            files = (await resp.json())["files"]
+
+    codepoints = sorted(
+        f["name"][len(TWEMOJI_ASSETS):-len(".png")]
+        for f in files
+        if f["name"].startswith(TWEMOJI_ASSETS) and f["name"].endswith(".png")
+    )
+
+    with open(path, "w") as f:
+        f.write(f"# {TWEMOJI_PACKAGE}@{version} {TWEMOJI_ASSETS.strip('/')}\n")
+        f.write("\n".join(codepoints) + "\n")
+
+    load_index.cache_clear()
+    index_version.cache_clear()
+    return len(codepoints)
+
+
+if __name__ == "__main__":
+    # python -m chat_exporter.ext.twemoji [version]
+    count = asyncio.run(refresh_index(*sys.argv[1:2]))
+    print(f"Wrote {count} twemoji codepoints to {index_path}")
@@ -0,0 +1,95 @@
+import asyncio
+import inspect
+import io
+import zlib
+from typing import Optional
+
+COMPRESSIONS = ("gzip", "zstd")
+# Transcripts smaller than this stay in memory, bigger ones are spooled to a temporary file
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+def _compressor(compression: str):
+    """Streaming compressor with compress() and flush(), zstd needs Python 3.14 or the zstandard package."""
+    if compression == "gzip":
+        return zlib.compressobj(wbits=31)
+
+    if compression == "zstd":
+        try:
+            from compression import zstd
+            return zstd.ZstdCompressor()
+        except ImportError:
+            pass
+
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstd compression requires Python 3.14 or the zstandard package") from None
+        return zstandard.ZstdCompressor().compressobj()
+
+    raise ValueError(f"Unknown compression {compression!r}, expected one of {', '.join(COMPRESSIONS)}")
+
+
+class TranscriptWriter:
+    """Write transcript chunks to a file-like sink or an async writer.
+
+    Text sinks receive str, binary sinks (BytesIO, files opened with "wb",
+    asyncio.StreamWriter, ...) receive utf-8 encoded bytes. With compression
+    the output is gzip or zstd compressed on the fly and the sink must be binary."""
+
+    def __init__(self, sink, binary=None, compression: Optional[str] = None):
+        self.sink = sink
+        self.binary = self._is_binary(sink) if binary is None else binary
+        self.chars_written = 0
+        self.bytes_written = 0
+        self._drain = getattr(sink, "drain", None)
+        self._compressor = _compressor(compression) if compression else None
+        if self._compressor is not None:
+            self.binary = True
+
+    @staticmethod
+    def _is_binary(sink) -> bool:
+        if isinstance(sink, (io.RawIOBase, io.BufferedIOBase, asyncio.StreamWriter)):
+            return True
+        if isinstance(sink, io.TextIOBase):
+            return False
+        return "b" in getattr(sink, "mode", "")
+
+    async def write(self, chunk: str):
+        if not chunk:
+            return
+
+        data = chunk.encode() if self.binary else chunk
+        if self._compressor is not None:
+            data = self._compressor.compress(data)
+        await self._write(data)
+
+        self.chars_written += len(chunk)
+
+    async def finish(self):
+        """Write out what the compressor still holds, the sink itself is left open."""
+        if self._compressor is not None:
+            await self._write(self._compressor.flush())
+            self._compressor = None
+
+    async def _write(self, data):
+        if not data:
+            return
+
+        result = self.sink.write(data)
+        if inspect.isawaitable(result):
+            await result
+        if self._drain is not None:
+            await self._drain()
+
+        self.bytes_written += len(data)
+
+
+class TranscriptPart:
+    """One file of a transcript that was split to stay under a size limit."""
+
+    def __init__(self, file_name: str, file, size: int):
+        self.file_name = file_name
+        # Binary file object positioned at the start of the part
+        self.file = file
+        self.size = size
@@ -1,50 +1,100 @@
-import html
 import re
 from chat_exporter.ext.emoji_convert import convert_emoji
 
+MARKDOWN_LANGUAGES = ["asciidoc", "autohotkey", "bash", "coffeescript", "cpp", "cs", "css",
+                      "diff", "fix", "glsl", "ini", "json", "md", "ml", "prolog", "py",
+                      "tex", "xl", "xml", "js", "html"]
+
+# Rendered code and link targets are swapped out for placeholders so the emoji and mention passes leave them alone.
+PLACEHOLDER = "\x1a%d\x1a"
+PLACEHOLDER_PATTERN = re.compile(r"\x1a(\d+)\x1a")
+
+CODE_PATTERN = re.compile(r"```(?P<fence>.*?)```|``(?P<code2>.+?)``|`(?P<code>[^`]+)`", re.S)
+
+# Everything the lexer cares about inside a line, tried left to right at each position.
+TOKEN_PATTERN = re.compile(
+    CODE_PATTERN.pattern +
+    r"|(?P<emoji>&lt;a?:\w+:\d+&gt;|<a?:\w+:\d+>)"
+    r"|(?:&lt;|<)(?P<angle_url>https?://[^\s<>]+?)(?:&gt;|>)"
+    r"|(?P<tag></?[a-zA-Z][^>\"']*(?:(?:\"[^\"]*\"|'[^']*')[^>\"']*)*>)"
+    r"|\[(?P<link_text>[^\[\]\n]+)\]\((?P<link_url>https?://[^\s()]+)\)"
+    r"|(?P<url>https?://[^\s<>\"`*]+)"
+    r"|(?P<delimiter>\*\*\*|\*\*|\*|__|~~|\|\|)"
+    r"|(?P<newline>\n)",
+    re.S
+)
+
+# Block markers, only tried at the start of a line.
+LINE_PATTERN = re.compile(
+    r"(?P<header>#{1,3})[ \t]+"
+    r"|(?P<indent>[ \t]*)[-*][ \t]+(?=\S)"
+    r"|(?P<block_quote>(?:&gt;|>){3})[ \t]"
+    r"|(?P<quote>&gt;|>)[ \t](?=[^\n])"
+)
+QUOTE_PATTERN = re.compile(r"(?:&gt;|>)[ \t](?=[^\n])")
+LANGUAGE_PATTERN = re.compile(r"[\w+#.-]+")
+PRESERVE_PATTERN = re.compile(
+    r'^<span class="chatlog__markdown-preserve">(.*)</span>'
+    r'(?:<span class="chatlog__reference-edited-timestamp"[^>]*>\(edited\)</span>)?$',
+    re.S
+)
+
+INLINE_HTML = {
+    "***": ("<strong><em>", "</em></strong>"),
+    "**": ("<strong>", "</strong>"),
+    "*": ("<em>", "</em>"),
+    "__": ('<span style="text-decoration: underline">', "</span>"),
+    "~~": ('<span style="text-decoration: line-through">', "</span>"),
+    "||": ('<span class="spoiler spoiler--hidden" onclick="showSpoiler(event, this)"> <span class="spoiler-text">',
+           "</span></span>"),
+}
+
+CUSTOM_EMOJI_HOLDER = (
+    [r"&lt;:.*?:(\d*)&gt;", '<img class="emoji emoji--small" src="https://cdn.discordapp.com/emojis/%s.png">'],
+    [r"&lt;a:.*?:(\d*)&gt;", '<img class="emoji emoji--small" src="https://cdn.discordapp.com/emojis/%s.gif">'],
+    [r"<:.*?:(\d*)>", '<img class="emoji emoji--small" src="https://cdn.discordapp.com/emojis/%s.png">'],
+    [r"<a:.*?:(\d*)>", '<img class="emoji emoji--small" src="https://cdn.discordapp.com/emojis/%s.gif">'],
+)
+
+
 class ParseMarkdown:
     def __init__(self, content):
         self.content = content
         self.code_blocks_content = []
 
-
     async def standard_message_flow(self):
-        self.parse_code_block_markdown()
-        self.https_http_links()
-        self.parse_normal_markdown()
+        self.content = MarkdownRenderer(self).render(self.content)
 
         await self.parse_emoji()
         self.reverse_code_block_markdown()
         return self.content
 
     async def link_embed_flow(self):
-        self.parse_embed_markdown()
+        self.content = MarkdownRenderer(self, blocks=False).render(self.content)
+
         await self.parse_emoji()
+        self.reverse_code_block_markdown()
+        return self.content
 
     async def standard_embed_flow(self):
-        self.parse_code_block_markdown()
-        self.https_http_links()
-        self.parse_embed_markdown()
-        self.parse_normal_markdown()
+        self.content = MarkdownRenderer(self).render(self.content)
 
         await self.parse_emoji()
         self.reverse_code_block_markdown()
         return self.content
 
     async def special_embed_flow(self):
-        self.https_http_links()
-        self.parse_code_block_markdown()
-        self.parse_normal_markdown()
+        self.content = MarkdownRenderer(self).render(self.content)
 
         await self.parse_emoji()
         self.reverse_code_block_markdown()
         return self.content
 
     async def message_reference_flow(self):
-        self.strip_preserve()
-        self.parse_code_block_markdown(reference=True)
-        self.parse_normal_markdown()
-        self.reverse_code_block_markdown()
+        # A reply to a message earlier in the export gets that message's rendered html, anything else is raw markdown
+        if not self.strip_preserve():
+            self.content = MarkdownRenderer(self, blocks=False, links=False, reference=True).render(self.content)
+            self.reverse_code_block_markdown()
         self.parse_br()
 
         return self.content
@@ -57,366 +107,202 @@ class ParseMarkdown:
         self.content = self.content.replace("<br>", " ")
 
     async def parse_emoji(self):
-        holder = (
-            [r"&lt;:.*?:(\d*)&gt;", '<img class="emoji emoji--small" src="https://cdn.discordapp.com/emojis/%s.png">'],
-            [r"&lt;a:.*?:(\d*)&gt;", '<img class="emoji emoji--small" src="https://cdn.discordapp.com/emojis/%s.gif">'],
-            [r"<:.*?:(\d*)>", '<img class="emoji emoji--small" src="https://cdn.discordapp.com/emojis/%s.png">'],
-            [r"<a:.*?:(\d*)>", '<img class="emoji emoji--small" src="https://cdn.discordapp.com/emojis/%s.gif">'],
-        )
+        self.content = await convert_emoji(self.content)
 
-        self.content = await convert_emoji([word for word in self.content])
+        if ":" not in self.content:
+            return
 
-        for x in holder:
+        for x in CUSTOM_EMOJI_HOLDER:
             p, r = x
-            match = re.search(p, self.content)
-            while match is not None:
-                emoji_id = match.group(1)
-                self.content = self.content.replace(self.content[match.start():match.end()],
-                                                    r % emoji_id)
-                match = re.search(p, self.content)
+            self.content = re.sub(p, lambda match: r % match.group(1), self.content)
 
     def strip_preserve(self):
-        p = r'<span class="chatlog__markdown-preserve">(.*)</span>'
-        r = '%s'
-
-        pattern = re.compile(p)
-        match = re.search(pattern, self.content)
-        while match is not None:
-            affected_text = match.group(1)
-            self.content = self.content.replace(self.content[match.start():match.end()],
-                                                r % affected_text)
-            match = re.search(pattern, self.content)
-
-    def order_list_markdown_to_html(self):
-        lines = self.content.split('\n')
-        html = ''
-        indent_stack = [0]
-        started = True
-
-        for line in lines:
-            match = re.match(r'^(\s*)([-*])\s+(.+)$', line)
-            if match:
-                indent, bullet, content = match.groups()
-                indent = len(indent)
-
-                if started:
-                    html += '<ul class="markup" style="padding-left: 20px;margin: 0 !important">\n'
-                    started = False
-                if indent % 2 == 0:
-                    while indent < indent_stack[-1]:
-                        html += '</ul>\n'
-                        indent_stack.pop()
-                    if indent > indent_stack[-1]:
-                        html += '<ul class="markup">\n'
-                        indent_stack.append(indent)
-                else:
-                    while indent + 1 < indent_stack[-1]:
-                        html += '</ul>\n'
-                        indent_stack.pop()
-                    if indent + 1 > indent_stack[-1]:
-                        html += '<ul class="markup">\n'
-                        indent_stack.append(indent + 1)
-
-                html += f'<li class="markup">{content.strip()}</li>\n'
-            else:
-                while len(indent_stack) > 1:
-                    html += '</ul>'
-                    indent_stack.pop()
-                if not started:
-                    html += '</ul>'
-                    started = True
-                html += line + '\n'
-
-        while len(indent_stack) > 1:
-            html += '</ul>\n'
-            indent_stack.pop()
-
-        self.content = html
-
-    def parse_normal_markdown(self):
-        self.order_list_markdown_to_html()
-        holder = (
-            [r"__(.*?)__", '<span style="text-decoration: underline">%s</span>'],
-            [r"\*\*(.*?)\*\*", '<strong>%s</strong>'],
-            [r"\*(.*?)\*", '<em>%s</em>'],
-            [r"~~(.*?)~~", '<span style="text-decoration: line-through">%s</span>'],
-            [r"^###\s(.*?)\n", '<h3>%s</h1>'],
-            [r"^##\s(.*?)\n", '<h2>%s</h1>'],
-            [r"^#\s(.*?)\n", '<h1>%s</h1>'],
-            [r"\|\|(.*?)\|\|", '<span class="spoiler spoiler--hidden" onclick="showSpoiler(event, this)"> <span '
-                               'class="spoiler-text">%s</span></span>'],
-        )
-
-        for x in holder:
-            p, r = x
+        match = PRESERVE_PATTERN.match(self.content)
+        if match is None:
+            return False
 
-            pattern = re.compile(p, re.M)
-            match = re.search(pattern, self.content)
-            while match is not None:
-                affected_text = match.group(1)
-                self.content = self.content.replace(self.content[match.start():match.end()], r % affected_text)
-                match = re.search(pattern, self.content)
-
-        # > quote
-        self.content = self.content.split("<br>")
-        y = None
-        new_content = ""
-        pattern = re.compile(r"^&gt;\s(.+)")
-
-        if len(self.content) == 1:
-            if re.search(pattern, self.content[0]):
-                self.content = f'<div class="quote">{self.content[0][5:]}</div>'
-                return
-            self.content = self.content[0]
-            return
+        self.content = match.group(1)
+        return True
 
-        for x in self.content:
-            if re.search(pattern, x) and y:
-                y = y + "<br>" + x[5:]
-            elif not y:
-                if re.search(pattern, x):
-                    y = x[5:]
-                else:
-                    new_content = new_content + x + "<br>"
-            else:
-                new_content = new_content + f'<div class="quote">{y}</div>'
-                new_content = new_content + x
-                y = ""
-
-        if y:
-            new_content = new_content + f'<div class="quote">{y}</div>'
-
-        self.content = new_content
-
-    def parse_code_block_markdown(self, reference=False):
-        markdown_languages = ["asciidoc", "autohotkey", "bash", "coffeescript", "cpp", "cs", "css",
-                              "diff", "fix", "glsl", "ini", "json", "md", "ml", "prolog", "py",
-                              "tex", "xl", "xml", "js", "html"]
-        self.content = re.sub(r"\n", "<br>", self.content)
-
-        # ```code```
-        pattern = re.compile(r"```(.*?)```")
-        match = re.search(pattern, self.content)
-        while match is not None:
-            language_class = "nohighlight"
-            affected_text = match.group(1)
-
-            for language in markdown_languages:
-                if affected_text.lower().startswith(language):
-                    language_class = f"language-{language}"
-                    _, _, affected_text = affected_text.partition('<br>')
-
-            affected_text = self.return_to_markdown(affected_text)
-
-            second_pattern = re.compile(r"^<br>|<br>$")
-            second_match = re.search(second_pattern, affected_text)
-            while second_match is not None:
-                affected_text = re.sub(r"^<br>|<br>$", '', affected_text)
-                second_match = re.search(second_pattern, affected_text)
-            affected_text = re.sub("  ", "&nbsp;&nbsp;", affected_text)
-
-            self.code_blocks_content.append(affected_text)
-            if not reference:
-                self.content = self.content.replace(
-                    self.content[match.start():match.end()],
-                    '<div class="pre pre--multiline %s">%s</div>' % (language_class, f'%s{len(self.code_blocks_content)}')
-                )
-            else:
-                self.content = self.content.replace(
-                    self.content[match.start():match.end()],
-                    '<span class="pre pre-inline">%s</span>' % f'%s{len(self.code_blocks_content)}'
-                )
-
-            match = re.search(pattern, self.content)
-
-        # ``code``
-        pattern = re.compile(r"``(.*?)``")
-        match = re.search(pattern, self.content)
-        while match is not None:
-            affected_text = match.group(1)
-            affected_text = self.return_to_markdown(affected_text)
-            self.code_blocks_content.append(affected_text)
-            self.content = self.content.replace(self.content[match.start():match.end()],
-                                                '<span class="pre pre-inline">%s</span>' % f'%s{len(self.code_blocks_content)}')
-            match = re.search(pattern, self.content)
-
-        # `code`
-        pattern = re.compile(r"`(.*?)`")
-        match = re.search(pattern, self.content)
-        while match is not None:
-            affected_text = match.group(1)
-            affected_text = self.return_to_markdown(affected_text)
-            self.code_blocks_content.append(affected_text)
-            self.content = self.content.replace(self.content[match.start():match.end()],
-                                                '<span class="pre pre-inline">%s</span>' % f'%s{len(self.code_blocks_content)}')
-            match = re.search(pattern, self.content)
-
-        self.content = re.sub(r"<br>", "\n", self.content)
+    def protect(self, content):
+        self.code_blocks_content.append(content)
+        return PLACEHOLDER % (len(self.code_blocks_content) - 1)
+
+    def parse_code_block_markdown(self):
+        # Hide code spans (kept as raw markdown) from passes that must not touch them, e.g. mentions
+        self.content = self.content.replace("\x1a", "")
+        self.content = CODE_PATTERN.sub(lambda match: self.protect(match.group()), self.content)
 
     def reverse_code_block_markdown(self):
-        for x in range(len(self.code_blocks_content)):
-            self.content = self.content.replace(f'%s{x + 1}', self.code_blocks_content[x])
-
-    def parse_embed_markdown(self):
-        # [Message](Link)
-        pattern = re.compile(r"\[(.+?)]\((.+?)\)")
-        match = re.search(pattern, self.content)
-        while match is not None:
-            affected_text = match.group(1)
-            affected_url = match.group(2)
-            self.content = self.content.replace(self.content[match.start():match.end()],
-                                                '<a href="%s">%s</a>' % (affected_url, affected_text))
-            match = re.search(pattern, self.content)
-
-        self.content = self.content.split("\n")
-        y = None
-        new_content = ""
-        pattern = re.compile(r"^>\s(.+)")
-
-        if len(self.content) == 1:
-            if re.search(pattern, self.content[0]):
-                self.content = f'<div class="quote">{self.content[0][2:]}</div>'
-                return
-            self.content = self.content[0]
+        if not self.code_blocks_content:
             return
 
-        for x in self.content:
-            if re.search(pattern, x) and y:
-                y = y + "\n" + x[2:]
-            elif not y:
-                if re.search(pattern, x):
-                    y = x[2:]
-                else:
-                    new_content = new_content + x + "\n"
-            else:
-                new_content = new_content + f'<div class="quote">{y}</div>'
-                new_content = new_content + x
-                y = ""
-
-        if y:
-            new_content = new_content + f'<div class="quote">{y}</div>'
-
-        self.content = new_content
-
-    @staticmethod
-    def order_list_html_to_markdown(content):
-        lines = content.split('<br>')
-        html = ''
-        ul_level = -1
-
-        for line in lines:
-            if '<ul class="markup">' in line:
-                ul_level += 1
-                line = line.replace('<ul class="markup">', '')
-                if line != "":
-                    html += line + "\n"
-            elif "</ul>" in line:
-                ul_level -= 1
-            elif '<li class="markup">' in line:
-                match = re.match(r'<li class="markup">(.+?)</li>', line)
-                if match:
-                    matched_content = match.group(1)
-                    spaces = ul_level * 2
-                    html += " " * spaces + "-" + matched_content + "\n"
-                else:
-                    html += line
+        self.content = PLACEHOLDER_PATTERN.sub(lambda match: self.code_blocks_content[int(match.group(1))],
+                                               self.content)
+
+
+class MarkdownRenderer:
+    """Single pass markdown to html renderer.
+
+    The content is scanned once with TOKEN_PATTERN; inline delimiters are matched with a stack and block
+    markers (headers, lists, quotes) are checked at the start of each line."""
+
+    def __init__(self, markdown: ParseMarkdown, blocks=True, links=True, reference=False):
+        self.markdown = markdown
+        self.blocks = blocks
+        self.links = links
+        self.reference = reference
+
+        self.output = []
+        self.inline_stack = []
+        self.line_end = ""
+        self.list_indents = []
+        self.quote = None
+
+    def render(self, content: str) -> str:
+        content = content.replace("\x1a", "")
+        position = self.start_line(content, 0)
+
+        while True:
+            match = TOKEN_PATTERN.search(content, position)
+            if match is None:
+                self.output.append(content[position:])
+                break
+
+            self.output.append(content[position:match.start()])
+            position = match.end()
+            kind = match.lastgroup
+
+            if kind == "newline":
+                position = self.end_line(content, position)
+            elif kind in ("fence", "code2", "code"):
+                self.output.append(self.markdown.protect(self.code(kind, match.group(kind))))
+            elif kind == "delimiter":
+                self.delimiter(match.group(kind))
+            elif not self.links and kind in ("angle_url", "link_url", "url"):
+                self.output.append(match.group())
+            elif kind == "angle_url" or kind == "url":
+                url = match.group(kind)
+                trailing = ""
+                if kind == "url" and url.endswith(")") and "(" not in url:
+                    url, trailing = url[:-1], ")"
+                self.output.append(self.markdown.protect('<a href="%s">%s</a>' % (url, url)))
+                self.output.append(trailing)
+            elif kind == "link_url":
+                text = MarkdownRenderer(self.markdown, blocks=False, links=False).render(match.group("link_text"))
+                self.output.append('<a href="%s">%s</a>' % (self.markdown.protect(match.group(kind)), text))
             else:
-                html += line
-
-        return html
-
-    def return_to_markdown(self, content):
-        # content = self.order_list_html_to_markdown(content)
-        holders = (
-            [r"<strong>(.*?)</strong>", '**%s**'],
-            [r"<em>([^<>]+)</em>", '*%s*'],
-            [r"<h1>([^<>]+)</h1>", '# %s'],
-            [r"<h2>([^<>]+)</h2>", '## %s'],
-            [r"<h3>([^<>]+)</h3>", '### %s'],
-            [r'<span style="text-decoration: underline">([^<>]+)</span>', '__%s__'],
-            [r'<span style="text-decoration: line-through">([^<>]+)</span>', '~~%s~~'],
-            [r'<div class="quote">(.*?)</div>', '> %s'],
-            [r'<span class="spoiler spoiler--hidden" onclick="showSpoiler\(event, this\)"> <span '
-             r'class="spoiler-text">(.*?)<\/span><\/span>', '||%s||'],
-            [r'<span class="unix-timestamp" data-timestamp=".*?" raw-content="(.*?)">.*?</span>', '%s']
-        )
-
-        for x in holders:
-            p, r = x
+                self.output.append(match.group())
+
+        self.end_content()
+        return "".join(self.output)
+
+    def code(self, kind, text):
+        if kind != "fence":
+            return '<span class="pre pre-inline">%s</span>' % text
+
+        language_class = "nohighlight"
+        first_line, newline, rest = text.partition("\n")
+        if newline and LANGUAGE_PATTERN.fullmatch(first_line):
+            language = first_line.lower()
+            if language not in MARKDOWN_LANGUAGES:
+                language = next((x for x in MARKDOWN_LANGUAGES if language.startswith(x)), None)
+            if language is not None:
+                language_class = f"language-{language}"
+                text = rest
+
+        text = text.strip("\n").replace("  ", "&nbsp;&nbsp;")
+        if self.reference:
+            return '<span class="pre pre-inline">%s</span>' % text
+        return '<div class="pre pre--multiline %s">%s</div>' % (language_class, text)
+
+    def delimiter(self, delimiter):
+        for index in range(len(self.inline_stack) - 1, -1, -1):
+            opener, output_index = self.inline_stack[index]
+            if opener == delimiter:
+                # Anything opened after this delimiter was never closed and stays literal text
+                del self.inline_stack[index:]
+                self.output[output_index] = INLINE_HTML[delimiter][0]
+                self.output.append(INLINE_HTML[delimiter][1])
+                return
 
-            pattern = re.compile(p)
-            match = re.search(pattern, content)
-            while match is not None:
-                affected_text = match.group(1)
-                content = content.replace(content[match.start():match.end()],
-                                          r % html.escape(affected_text))
-                match = re.search(pattern, content)
-
-        pattern = re.compile(r'<a href="(.*?)">(.*?)</a>')
-        match = re.search(pattern, content)
-        while match is not None:
-            affected_url = match.group(1)
-            affected_text = match.group(2)
-            if affected_url != affected_text:
-                content = content.replace(content[match.start():match.end()],
-                                          '[%s](%s)' % (affected_text, affected_url))
-            else:
-                content = content.replace(content[match.start():match.end()],
-                                          '%s' % affected_url)
-            match = re.search(pattern, content)
-
-        return content.lstrip().rstrip()
-
-    def https_http_links(self):
-        def remove_silent_link(url, raw_url=None):
-            pattern = rf"`.*{raw_url}.*`"
-            match = re.search(pattern, self.content)
-
-            if "&lt;" in url and "&gt;" in url and not match:
-                return url.replace("&lt;", "").replace("&gt;", "")
-            return url
-
-        content = re.sub("\n", "<br>", self.content)
-        output = []
-        if "http://" in content or "https://" in content and "](" not in content:
-            for word in content.replace("<br>", " <br>").split():
-
-                if "http" not in word:
-                    output.append(word)
-                    continue
-
-                if "&lt;" in word and "&gt;" in word:
-                    pattern = r"&lt;https?:\/\/(.*)&gt;"
-                    match_url = re.search(pattern, word)
-                    if match_url:
-                        match_url = match_url.group(1)
-                        url = f'<a href="https://{match_url}">https://{match_url}</a>'
-                        word = word.replace("https://" + match_url, url)
-                        word = word.replace("http://" + match_url, url)
-                    output.append(remove_silent_link(word, match_url))
-                elif "https://" in word:
-                    pattern = r"https://[^\s>`\"*]*"
-                    word_link = re.search(pattern, word)
-                    if word_link and word_link.group().endswith(")"):
-                        output.append(word)
-                        continue
-                    elif word_link:
-                        word_link = word_link.group()
-                        word_full = f'<a href="{word_link}">{word_link}</a>'
-                        word = re.sub(pattern, word_full, word)
-                    output.append(remove_silent_link(word))
-                elif "http://" in word:
-                    pattern = r"http://[^\s>`\"*]*"
-                    word_link = re.search(pattern, word)
-                    if word_link and word_link.group().endswith(")"):
-                        output.append(word)
-                        continue
-                    elif word_link:
-                        word_link = word_link.group()
-                        word_full = f'<a href="{word_link}">{word_link}</a>'
-                        word = re.sub(pattern, word_full, word)
-                    output.append(remove_silent_link(word))
-                else:
-                    output.append(word)
-            content = " ".join(output)
-            self.content = re.sub("<br>", "\n", content)
\ No newline at end of file
+        self.inline_stack.append((delimiter, len(self.output)))
+        self.output.append(delimiter)
+
+    def start_line(self, content, position):
+        if not self.blocks or self.quote == "all":
+            return position
+
+        match = LINE_PATTERN.match(content, position)
+        if match is not None and match.group("indent") is not None:
+            self.list_item(len(match.group("indent")))
+            return match.end()
+
+        self.close_list("")
+
+        if match is None:
+            return position
+
+        if match.group("header"):
+            level = len(match.group("header"))
+            self.output.append(f"<h{level}>")
+            self.line_end = f"</h{level}>"
+        elif match.group("block_quote"):
+            self.output.append('<div class="quote">')
+            self.quote = "all"
+        else:
+            self.output.append('<div class="quote">')
+            self.quote = "line"
+        return match.end()
+
+    def end_line(self, content, position):
+        self.inline_stack.clear()
+
+        if self.line_end:
+            self.output.append(self.line_end)
+            self.line_end = ""
+        elif self.quote == "line":
+            match = QUOTE_PATTERN.match(content, position)
+            if match is not None:
+                self.output.append("\n")
+                return match.end()
+            self.output.append("</div>")
+            self.quote = None
+        else:
+            self.output.append("\n")
+
+        return self.start_line(content, position)
+
+    def end_content(self):
+        self.inline_stack.clear()
+        if self.line_end:
+            self.output.append(self.line_end)
+            self.line_end = ""
+        self.close_list("\n")
+        if self.quote:
+            self.output.append("</div>")
+            self.quote = None
+
+    def list_item(self, indent):
+        if not self.list_indents:
+            self.output.append('<ul class="markup" style="padding-left: 20px;margin: 0 !important">\n')
+            self.list_indents.append(0)
+
+        if indent % 2:
+            indent += 1
+        while indent < self.list_indents[-1]:
+            self.output.append("</ul>\n")
+            self.list_indents.pop()
+        if indent > self.list_indents[-1]:
+            self.output.append('<ul class="markup">\n')
+            self.list_indents.append(indent)
+
+        self.output.append('<li class="markup">')
+        self.line_end = "</li>\n"
+
+    def close_list(self, separator):
+        if not self.list_indents:
+            return
+
+        self.output.append(("</ul>" + separator) * (len(self.list_indents) - 1) + "</ul>")
+        self.list_indents = []
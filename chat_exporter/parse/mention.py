@@ -1,198 +1,114 @@
 import re
-import pytz
-import datetime
-import time
-from typing import Optional
-from chat_exporter.ext.discord_import import discord
+from chat_exporter.ext.cache import cache
 from chat_exporter.parse.markdown import ParseMarkdown
 
-bot: Optional[discord.Client] = None
-
-def pass_bot(_bot):
-    # Bot is used to fetch a user who is no longer inside a guild
-    # This will stop the user from appearing as 'Unknown' which some people do not want
-    global bot
-    bot = _bot
-
 class ParseMention:
-    REGEX_ROLES = r"&lt;@&amp;([0-9]+)&gt;"
-    REGEX_ROLES_2 = r"<@&([0-9]+)>"
-    REGEX_EVERYONE = r"@(everyone)(?:[$\s\t\n\f\r\0]|$)"
-    REGEX_HERE = r"@(here)(?:[$\s\t\n\f\r\0]|$)"
-    REGEX_MEMBERS = r"&lt;@!?([0-9]+)&gt;"
-    REGEX_MEMBERS_2 = r"<@!?([0-9]+)>"
-    REGEX_CHANNELS = r"&lt;#([0-9]+)&gt;"
-    REGEX_CHANNELS_2 = r"<#([0-9]+)>"
-    REGEX_EMOJIS = r"&lt;a?(:[^\n:]+:)[0-9]+&gt;"
-    REGEX_EMOJIS_2 = r"<a?(:[^\n:]+:)[0-9]+>"
-    REGEX_TIME_HOLDER = (
-        [r"&lt;t:([0-9]{1,13}):t&gt;", "%H:%M"],
-        [r"&lt;t:([0-9]{1,13}):T&gt;", "%T"],
-        [r"&lt;t:([0-9]{1,13}):d&gt;", "%d/%m/%Y"],
-        [r"&lt;t:([0-9]{1,13}):D&gt;", "%e %B %Y"],
-        [r"&lt;t:([0-9]{1,13}):f&gt;", "%e %B %Y %H:%M"],
-        [r"&lt;t:([0-9]{1,13}):F&gt;", "%A, %e %B %Y %H:%M"],
-        [r"&lt;t:([0-9]{1,13}):R&gt;", "%e %B %Y %H:%M"],
-        [r"&lt;t:([0-9]{1,13})&gt;", "%e %B %Y %H:%M"]
+    # Every mention form, escaped (message content) or raw (embeds), in one pattern
+    MENTION_PATTERN = re.compile(
+        r"(?:&lt;|<)@&(?:amp;)?(?P<role>[0-9]+)(?:&gt;|>)"
+        r"|(?:&lt;|<)@!?(?P<member>[0-9]+)(?:&gt;|>)"
+        r"|(?:&lt;|<)#(?P<channel>[0-9]+)(?:&gt;|>)"
+        r"|@(?P<everyone>everyone|here)(?=[\s\0]|$)"
+        r"|&lt;t:(?P<time>[0-9]{1,13})(?::(?P<time_style>[tTdDfFR]))?&gt;"
+        r"|&lt;/(?P<slash_command>[\w]+ ?[\w]*):[0-9]+&gt;"
     )
-    REGEX_SLASH_COMMAND = r"&lt;\/([\w]+ ?[\w]*):[0-9]+&gt;"
-
-    ESCAPE_LT = "______lt______"
-    ESCAPE_GT = "______gt______"
-    ESCAPE_AMP = "______amp______"
-
-    def __init__(self, content, guild):
+    TIME_FORMATS = {
+        "t": "%H:%M",
+        "T": "%T",
+        "d": "%d/%m/%Y",
+        "D": "%e %B %Y",
+        "f": "%e %B %Y %H:%M",
+        "F": "%A, %e %B %Y %H:%M",
+        "R": "%e %B %Y %H:%M",
+        None: "%e %B %Y %H:%M",
+    }
+
+    def __init__(self, content, context):
         self.content = content
-        self.guild = guild
-        self.code_blocks_content = []
+        self.context = context
+        self.guild = context.guild
 
     async def flow(self):
+        if "@" not in self.content and "&lt;" not in self.content and "<" not in self.content:
+            return self.content
+
         markdown = ParseMarkdown(self.content)
         markdown.parse_code_block_markdown()
-        self.content = markdown.content
-        await self.escape_mentions()
-        await self.escape_mentions()
-        await self.unescape_mentions()
-        await self.channel_mention()
-        await self.member_mention()
-        await self.role_mention()
-        await self.time_mention()
-        await self.slash_command_mention()
-        markdown.content = self.content
+
+        replacements = {}
+        for match in self.MENTION_PATTERN.finditer(markdown.content):
+            if match.group() not in replacements:
+                replacements[match.group()] = await self.mention(match)
+
+        if replacements:
+            markdown.content = self.MENTION_PATTERN.sub(lambda match: replacements[match.group()], markdown.content)
+
         markdown.reverse_code_block_markdown()
         self.content = markdown.content
         return self.content
 
-
-    async def escape_mentions(self):
-        for match in re.finditer("(%s|%s|%s|%s|%s|%s|%s|%s)"
-                                 % (self.REGEX_ROLES, self.REGEX_MEMBERS, self.REGEX_CHANNELS, self.REGEX_EMOJIS,
-                                    self.REGEX_ROLES_2, self.REGEX_MEMBERS_2, self.REGEX_CHANNELS_2,
-                                    self.REGEX_EMOJIS_2), self.content):
-            pre_content = self.content[:match.start()]
-            post_content = self.content[match.end():]
-            match_content = self.content[match.start():match.end()]
-
-            match_content = match_content.replace("<", self.ESCAPE_LT)
-            match_content = match_content.replace(">", self.ESCAPE_GT)
-            match_content = match_content.replace("&", self.ESCAPE_AMP)
-
-            self.content = pre_content + match_content + post_content
-
-    async def unescape_mentions(self):
-        self.content = self.content.replace(self.ESCAPE_LT, "<")
-        self.content = self.content.replace(self.ESCAPE_GT, ">")
-        self.content = self.content.replace(self.ESCAPE_AMP, "&")
-        pass
-
-    async def channel_mention(self):
-        holder = self.REGEX_CHANNELS, self.REGEX_CHANNELS_2
-        for regex in holder:
-            match = re.search(regex, self.content)
-            while match is not None:
-                channel_id = int(match.group(1))
-                channel = self.guild.get_channel(channel_id)
-
-                if channel is None:
-                    replacement = '#deleted-channel'
-                else:
-                    replacement = '<span class="mention" title="%s">#%s</span>' \
-                                  % (channel.id, channel.name)
-                self.content = self.content.replace(self.content[match.start():match.end()], replacement)
-
-                match = re.search(regex, self.content)
-
-    async def role_mention(self):
-        holder = self.REGEX_EVERYONE, self.REGEX_HERE
-        for regex in holder:
-            match = re.search(regex, self.content)
-            while match is not None:
-                role_name = match.group(1)
-                replacement = '<span class="mention" title="%s">@%s</span>' % (str(role_name), str(role_name))
-
-                self.content = self.content.replace(self.content[match.start():match.end()],
-                                                    replacement)
-                match = re.search(regex, self.content)
-        holder = self.REGEX_ROLES, self.REGEX_ROLES_2
-        for regex in holder:
-            match = re.search(regex, self.content)
-            while match is not None:
-                role_id = int(match.group(1))
-                role = self.guild.get_role(role_id)
-
-                if role is None:
-                    replacement = '@deleted-role'
-                else:
-                    if role.color.r == 0 and role.color.g == 0 and role.color.b == 0:
-                        colour = "#dee0fc"
-                    else:
-                        colour = "#%02x%02x%02x" % (role.color.r, role.color.g, role.color.b)
-                    replacement = '<span style="color: %s;">@%s</span>' % (colour, role.name)
-                self.content = self.content.replace(self.content[match.start():match.end()], replacement)
-                match = re.search(regex, self.content)
-
-    async def slash_command_mention(self):
-        match = re.search(self.REGEX_SLASH_COMMAND, self.content)
-        while match is not None:
-            slash_command_name = match.group(1)
-            replacement = (
-                    '<span class="mention" title="%s">/%s</span>'
-                    % (slash_command_name, slash_command_name)
+    async def mention(self, match):
+        if match.group("channel") is not None:
+            return await self.channel_mention(int(match.group("channel")))
+        if match.group("member") is not None:
+            return await self.member_mention(int(match.group("member")))
+        if match.group("role") is not None:
+            return await self.role_mention(int(match.group("role")))
+        if match.group("everyone") is not None:
+            return '<span class="mention" title="%s">@%s</span>' % (match.group("everyone"), match.group("everyone"))
+        if match.group("time") is not None:
+            return self.time_mention(match)
+        return self.slash_command_mention(match.group("slash_command"))
+
+    @cache()
+    async def channel_mention(self, channel_id):
+        channel = self.guild.get_channel(channel_id)
+
+        if channel is None:
+            return '#deleted-channel'
+        return '<span class="mention" title="%s">#%s</span>' % (channel.id, channel.name)
+
+    @cache()
+    async def role_mention(self, role_id):
+        role = self.guild.get_role(role_id)
+
+        if role is None:
+            return '@deleted-role'
+
+        if role.color.r == 0 and role.color.g == 0 and role.color.b == 0:
+            colour = "#dee0fc"
+        else:
+            colour = "#%02x%02x%02x" % (role.color.r, role.color.g, role.color.b)
+        return '<span style="color: %s;">@%s</span>' % (colour, role.name)
+
+    @staticmethod
+    def slash_command_mention(slash_command_name):
+        return '<span class="mention" title="%s">/%s</span>' % (slash_command_name, slash_command_name)
+
+    @cache()
+    async def member_mention(self, member_id):
+        member = None
+        try:
+            # The bot stops a user who left the guild from appearing as 'Unknown'
+            member = (
+                self.context.members.get(member_id)
+                or self.guild.get_member(member_id)
+                or self.context.bot.get_user(member_id)
             )
-            self.content = self.content.replace(self.content[match.start():match.end()], replacement)
-
-            match = re.search(self.REGEX_SLASH_COMMAND, self.content)
-
-    async def member_mention(self):
-        holder = self.REGEX_MEMBERS, self.REGEX_MEMBERS_2
-        for regex in holder:
-            match = re.search(regex, self.content)
-            while match is not None:
-                member_id = int(match.group(1))
-
-                member = None
-                try:
-                    member = self.guild.get_member(member_id) or bot.get_user(member_id)
-                    member_name = member.display_name
-                except AttributeError:
-                    member_name = member
-
-                if member is not None:
-                    replacement = '<span class="mention" title="%s">@%s</span>' \
-                                  % (str(member_id), str(member_name))
-                else:
-                    replacement = '<span class="mention" title="%s">&lt;@%s></span>' \
-                                  % (str(member_id), str(member_id))
-                self.content = self.content.replace(self.content[match.start():match.end()],
-                                                    replacement)
-
-                match = re.search(regex, self.content)
-
-    async def time_mention(self):
-        holder = self.REGEX_TIME_HOLDER
-        timezone = pytz.timezone("UTC")
-
-        if hasattr(self.guild, "timezone"):
-            timezone = pytz.timezone(self.guild.timezone)
-
-        for p in holder:
-            regex, strf = p
-            match = re.search(regex, self.content)
-            while match is not None:
-                timestamp = int(match.group(1)) - 1
-                time_stamp = time.gmtime(timestamp)
-                datetime_stamp = datetime.datetime(2010, *time_stamp[1:6], tzinfo=pytz.utc)
-                ui_time = datetime_stamp.strftime(strf)
-                ui_time = ui_time.replace(str(datetime_stamp.year), str(time_stamp[0]))
-                tooltip_time = datetime_stamp.strftime("%A, %e %B %Y at %H:%M")
-                tooltip_time = tooltip_time.replace(str(datetime_stamp.year), str(time_stamp[0]))
-                original = match.group().replace("&lt;", "<").replace("&gt;", ">")
-                replacement = (
-                    f'<span class="unix-timestamp" data-timestamp="{tooltip_time}" raw-content="{original}">'
-                    f'{ui_time}</span>'
-                )
-
-                self.content = self.content.replace(self.content[match.start():match.end()],
-                                                    replacement)
-
-                match = re.search(regex, self.content)
\ No newline at end of file
+            member_name = member.display_name
+        except AttributeError:
+            member_name = member
+
+        if member is not None:
+            return '<span class="mention" title="%s">@%s</span>' % (str(member_id), str(member_name))
+        return '<span class="mention" title="%s">&lt;@%s></span>' % (str(member_id), str(member_id))
+
+    def time_mention(self, match):
+        strf = self.TIME_FORMATS[match.group("time_style")]
+        timestamp = int(match.group("time")) - 1
+        ui_time, tooltip_time = self.context.time_formatter.mention(timestamp, strf)
+        original = match.group().replace("&lt;", "<").replace("&gt;", ">")
+        return (
+            f'<span class="unix-timestamp" data-timestamp="{tooltip_time}" raw-content="{original}">'
+            f'{ui_time}</span>'
+        )
@@ -6,20 +6,39 @@ import discord
 from loguru import logger
 from discord.ext.commands.bot import Bot
 
+from chat_exporter import chat_exporter
+
 from ..constants import BotConstants
+from ..database import AsyncDatabase
 
 
 class DiscordBot(Bot):
     def __init__(self, command_prefix: str, *, intents: discord.Intents, **options: Any):
         super().__init__(command_prefix, intents=intents, **options)
         self.loaded_cogs: list[str] = []
+        self.database: AsyncDatabase = AsyncDatabase()
 
     @logger.catch
     async def setup_hook(self) -> None:
         """Hook to be called after the bot has been initialized."""
+        await self._open_database()
         await self._load_extensions()
         await self.tree.sync()
 
+    async def close(self) -> None:
+        """Close the bot, the HTTP sessions of the transcript exporter and the database connection."""
+        await super().close()
+        await chat_exporter.shutdown()
+        await self.database.close()
+
+    async def _open_database(self) -> None:
+        """Open the database shared by every cog."""
+        await self.database.open()
+
+        if not await self.database.health_check():
+            logger.critical('The database is not answering queries.')
+            sys.exit(1)
+
     @logger.catch
     async def _load_extensions(self) -> None:
         """Load the initial extensions."""
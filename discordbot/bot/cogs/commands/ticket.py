@@ -1,5 +1,4 @@
 import asyncio
-import io
 from datetime import datetime
 from typing import Optional
 
@@ -9,11 +8,12 @@ from discord.ext import commands
 from ezjsonpy import translate_message
 from loguru import logger
 
-from chat_exporter import chat_exporter
+from chat_exporter import chat_exporter, upload_batches
 from ...utils.perms.perms import PermsCheck
+from ....constants.bot import BotConstants
 from ....constants.embeds import Embeds
 from ....constants.ids import CategoriesConstants, RoleConstants, ChannelConstants
-from ....database.db import Database
+from ....database.async_db import AsyncDatabase
 from ....database.models.ids import IdObject
 
 DROPDOWN_OPTIONS: list[tuple[str, str]] = [
@@ -31,14 +31,18 @@ DROPDOWN_OPTIONS: list[tuple[str, str]] = [
 
 TICKET_NAME_LIST: tuple = tuple(option[0] for option in DROPDOWN_OPTIONS)
 
+# Largest transcript file posted to the logs, bigger tickets are split in to parts browsers can still open
+TRANSCRIPT_PART_SIZE: int = 8 * 1024 * 1024
+
 
 class CloseTicket:
     @staticmethod
-    async def close(interaction: discord.Interaction, channel: TextChannel) -> None:
+    async def close(interaction: discord.Interaction, channel: TextChannel, database: AsyncDatabase) -> None:
         """
         Close the current ticket
         :param interaction: Discord Interaction
         :param channel: Current discord channel
+        :param database: Database shared by the bot
         """
         if not channel.name.startswith(TICKET_NAME_LIST):
             await interaction.response.send_message(
@@ -56,7 +60,7 @@ class CloseTicket:
         await interaction.response.send_message(translate_message('commands.ticket.closingTicket'), ephemeral=True)
         await asyncio.sleep(1)
         ticket_owner: Optional[discord.Member] = None
-        ticket_id_data: IdObject = Database().get_id_by_id(interaction.channel.id)
+        ticket_id_data: IdObject = await database.get_id_by_id(interaction.channel.id)
 
         for member in channel.members:
             if member != interaction.guild.me:  # Exclude the bot itself
@@ -68,15 +72,13 @@ class CloseTicket:
             await interaction.followup.send(translate_message('commands.ticket.noTicketOwnerFound'), ephemeral=True)
             return
 
-        # Generate the transcripts
-        transcript: Optional[str] = await chat_exporter.export(channel)
-        transcript_file: Optional[discord.File] = None
-
-        if transcript is not None:
-            transcript_file = discord.File(
-                io.BytesIO(transcript.encode()),
-                filename=f'transcript-{channel.name}.html'
-            )
+        # Generate the transcript, split in to parts that fit the upload limit of the guild
+        profiler: chat_exporter.ExportProfiler = chat_exporter.ExportProfiler(enabled=BotConstants.PROFILE_TRANSCRIPTS)
+        transcript_parts: list[chat_exporter.TranscriptPart] = await chat_exporter.split_export(
+            channel,
+            max_bytes=min(interaction.guild.filesize_limit, TRANSCRIPT_PART_SIZE),
+            profiler=profiler
+        )
 
         open_time: str = channel.created_at.strftime('%d de %B de %Y %H:%M')
         close_time: str = datetime.utcnow().strftime('%d/%m/%Y %H:%M')
@@ -86,22 +88,31 @@ class CloseTicket:
         if ticket_log_channel is not None:
             await ticket_log_channel.send(embed=embed)
 
-            if transcript_file is not None:
-                await ticket_log_channel.send(file=transcript_file)
+            # Every message stays within the file count and the upload limit of the guild
+            for parts in upload_batches(
+                transcript_parts, interaction.guild.filesize_limit, lambda part: part.size
+            ):
+                await ticket_log_channel.send(
+                    files=[discord.File(part.file, filename=part.file_name) for part in parts]
+                )
 
         await interaction.followup.send(translate_message('commands.ticket.ticketClosed').replace('%user%', interaction.user.display_name), ephemeral=True)
         await asyncio.sleep(1)
         await channel.delete(reason=f'Ticket closed by {interaction.user}')
-        Database().del_id(str(interaction.user.id))
+        await database.del_id(str(interaction.user.id))
+
+        if profiler.enabled:
+            logger.info(f'Transcript of the ticket {channel.name} ({len(transcript_parts)} parts):\n{profiler.summary()}')
 
 
 class CloseTicketButton(discord.ui.Button):
-    def __init__(self) -> None:
+    def __init__(self, database: AsyncDatabase) -> None:
         super().__init__(
             style=discord.ButtonStyle.danger,
             label=translate_message('commands.ticket.closeButton'),
             custom_id='close_ticket'
         )
+        self.database: AsyncDatabase = database
 
     @logger.catch
     async def callback(self, interaction: discord.Interaction) -> None:
@@ -109,11 +120,11 @@ class CloseTicketButton(discord.ui.Button):
         On button click
         :param interaction: Discord Interaction
         """
-        await CloseTicket.close(interaction=interaction, channel=interaction.channel)
+        await CloseTicket.close(interaction=interaction, channel=interaction.channel, database=self.database)
 
 
 class TicketDropdown(discord.ui.Select):
-    def __init__(self):
+    def __init__(self, database: AsyncDatabase):
         options: list = [
             discord.SelectOption(
                 label=translate_message(f'commands.ticket.options.{value}Label'),
@@ -130,6 +141,7 @@ class TicketDropdown(discord.ui.Select):
             options=options,
             custom_id='ticket_dropdown'
         )
+        self.database: AsyncDatabase = database
 
     @logger.catch
     async def callback(self, interaction: discord.Interaction) -> None:
@@ -173,7 +185,7 @@ class TicketDropdown(discord.ui.Select):
             return
 
         view: discord.ui.View = discord.ui.View()
-        view.add_item(CloseTicketButton())
+        view.add_item(CloseTicketButton(self.database))
 
         # Send the embed to the user ticket
         embed: discord.Embed = Embeds.get_user_ticket_embed(selected_option=selected_option, mention=user.mention)
@@ -186,20 +198,21 @@ class TicketDropdown(discord.ui.Select):
             translate_message('commands.ticket.createdTicket').replace('%channel%', channel.mention),
             ephemeral=True
         )
-        Database().add_id(channel.id, str(user.id), 'ticket')
-        new_view: TicketView = TicketView()
+        await self.database.add_id(channel.id, str(user.id), 'ticket')
+        new_view: TicketView = TicketView(self.database)
         await interaction.message.edit(view=new_view)
 
 
 class TicketView(discord.ui.View):
-    def __init__(self) -> None:
+    def __init__(self, database: AsyncDatabase) -> None:
         super().__init__(timeout=None)
-        self.add_item(TicketDropdown())
+        self.add_item(TicketDropdown(database))
 
 
 class TicketCommand(commands.Cog):
     def __init__(self, bot) -> None:
         self.bot = bot
+        self.database: AsyncDatabase = bot.database
 
     @app_commands.command(
         name='send_ticket',
@@ -218,8 +231,8 @@ class TicketCommand(commands.Cog):
             )
             return
 
-        ticket_channel_id: Optional[IdObject] = Database().get_id_by_name('TICKET_CHANNEL')
-        ticket_message_id: Optional[IdObject] = Database().get_id_by_name('TICKET_MESSAGE')
+        ticket_channel_id: Optional[IdObject] = await self.database.get_id_by_name('TICKET_CHANNEL')
+        ticket_message_id: Optional[IdObject] = await self.database.get_id_by_name('TICKET_MESSAGE')
 
         if ticket_channel_id is not None and ticket_message_id is not None:
             ticket_channel: Optional[TextChannel] = self.bot.get_channel(ticket_channel_id.object_id)
@@ -231,11 +244,11 @@ class TicketCommand(commands.Cog):
                     await ticket_message.delete()
 
         embed: discord.Embed = Embeds.get_ticket_embed()
-        view: discord.ui.View = TicketView()
+        view: discord.ui.View = TicketView(self.database)
         new_ticket_message: Message = await interaction.channel.send(embed=embed, view=view)
         await interaction.response.send_message(translate_message('commands.ticket.setup'), ephemeral=True)
-        Database().add_id(interaction.channel.id, 'TICKET_CHANNEL', 'channel')
-        Database().add_id(new_ticket_message.id, 'TICKET_MESSAGE', 'message')
+        await self.database.add_id(interaction.channel.id, 'TICKET_CHANNEL', 'channel')
+        await self.database.add_id(new_ticket_message.id, 'TICKET_MESSAGE', 'message')
         await interaction.original_response()
 
     @send_ticket.error
@@ -254,8 +267,8 @@ class TicketCommand(commands.Cog):
             return
 
         try:
-            ticket_channel_id: Optional[IdObject] = Database().get_id_by_name('TICKET_CHANNEL')
-            ticket_message_id: Optional[IdObject] = Database().get_id_by_name('TICKET_MESSAGE')
+            ticket_channel_id: Optional[IdObject] = await self.database.get_id_by_name('TICKET_CHANNEL')
+            ticket_message_id: Optional[IdObject] = await self.database.get_id_by_name('TICKET_MESSAGE')
 
             if ticket_channel_id is not None and ticket_message_id is not None:
                 channel: Optional[TextChannel] = self.bot.get_channel(ticket_channel_id.object_id)
@@ -263,17 +276,17 @@ class TicketCommand(commands.Cog):
                 if channel:
                     logger.info('The ticket message was updated successfully.')
                     message: Optional[Message] = await channel.fetch_message(ticket_message_id.object_id)
-                    view: TicketView = TicketView()
+                    view: TicketView = TicketView(self.database)
                     await message.edit(view=view)
                     return
 
-                Database().del_id('TICKET_CHANNEL')
-                Database().del_id('TICKET_MESSAGE')
+                await self.database.del_id('TICKET_CHANNEL')
+                await self.database.del_id('TICKET_MESSAGE')
 
         except Exception as e:
             logger.error(f"Error loading ticket message: {e}")
-            Database().del_id('TICKET_CHANNEL')
-            Database().del_id('TICKET_MESSAGE')
+            await self.database.del_id('TICKET_CHANNEL')
+            await self.database.del_id('TICKET_MESSAGE')
 
 
 async def setup(bot: commands.Bot):
@@ -5,7 +5,7 @@ from discord.ext import commands
 from ezjsonpy import translate_message
 from loguru import logger
 
-from discordbot.database.db import Database
+from discordbot.database.async_db import AsyncDatabase
 from discordbot.database.models.ids import IdObject
 
 from ....constants import URLContstants
@@ -14,21 +14,22 @@ from ...utils import EmbedUtilities, PermsCheck
 
 class VerificationView(discord.ui.View):
     @logger.catch
-    def __init__(self):
+    def __init__(self, database: AsyncDatabase):
         super().__init__(timeout=None)
         self.add_item(RedButton(custom_id='red_button_left'))
-        self.add_item(VerificationButton())
+        self.add_item(VerificationButton(database))
         self.add_item(RedButton(custom_id='red_button_right'))
 
 
 class VerificationButton(discord.ui.Button):
     @logger.catch
-    def __init__(self):
+    def __init__(self, database: AsyncDatabase):
         super().__init__(
             style=discord.ButtonStyle.success,
             label=translate_message('commands.verify.embed.buttonText'),
             custom_id='verify_button'
         )
+        self.database: AsyncDatabase = database
 
     @logger.catch
     async def callback(self, interaction: discord.Interaction) -> None:
@@ -37,7 +38,7 @@ class VerificationButton(discord.ui.Button):
 
         :param interaction: The interaction object.
         """
-        role_id_object: Optional[IdObject] = Database().get_id_by_name('VERIFICATION_ROLE')
+        role_id_object: Optional[IdObject] = await self.database.get_id_by_name('VERIFICATION_ROLE')
 
         if role_id_object is None:
             await interaction.response.send_message(
@@ -84,6 +85,7 @@ class RedButton(discord.ui.Button):
 class VerifyCommand(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.database: AsyncDatabase = bot.database
 
     @app_commands.command(name='send_verification', description='Send the verification message')
     @logger.catch
@@ -113,7 +115,7 @@ class VerifyCommand(commands.Cog):
             )
             return
 
-        view: VerificationView = VerificationView()
+        view: VerificationView = VerificationView(self.database)
         embed: discord.Embed = EmbedUtilities.create_embed(
             title=translate_message('commands.verify.embed.title'),
             description=translate_message('commands.verify.embed.description'),
@@ -123,9 +125,9 @@ class VerifyCommand(commands.Cog):
         )
         await interaction.response.send_message(translate_message('commands.verify.embed.sent'), ephemeral=True)
         verify_message: Message = await interaction.channel.send(embed=embed, view=view)
-        Database().add_id(interaction.channel.id, 'VERIFICATION_CHANNEL', 'channel')
-        Database().add_id(verify_message.id, 'VERIFICATION_MESSAGE', 'message')
-        Database().add_id(role.id, 'VERIFICATION_ROLE', 'role')
+        await self.database.add_id(interaction.channel.id, 'VERIFICATION_CHANNEL', 'channel')
+        await self.database.add_id(verify_message.id, 'VERIFICATION_MESSAGE', 'message')
+        await self.database.add_id(role.id, 'VERIFICATION_ROLE', 'role')
 
     @logger.catch
     async def on_ready(self) -> None:
@@ -134,25 +136,25 @@ class VerifyCommand(commands.Cog):
         This loads the verification message and sets the view.
         """
         try:
-            verify_channel_id: Optional[IdObject] = Database().get_id_by_name('VERIFICATION_CHANNEL')
-            verify_message_id: Optional[IdObject] = Database().get_id_by_name('VERIFICATION_MESSAGE')
+            verify_channel_id: Optional[IdObject] = await self.database.get_id_by_name('VERIFICATION_CHANNEL')
+            verify_message_id: Optional[IdObject] = await self.database.get_id_by_name('VERIFICATION_MESSAGE')
 
             if verify_channel_id is not None and verify_message_id is not None:
                 verify_channel: Optional[TextChannel] = self.bot.get_channel(verify_channel_id.object_id)
 
                 if verify_channel:
                     verify_message: Optional[Message] = await verify_channel.fetch_message(verify_message_id.object_id)
-                    view: VerificationView = VerificationView()
+                    view: VerificationView = VerificationView(self.database)
                     await verify_message.edit(view=view)
                     return
 
-                Database().del_id('VERIFICATION_CHANNEL')
-                Database().del_id('VERIFICATION_MESSAGE')
+                await self.database.del_id('VERIFICATION_CHANNEL')
+                await self.database.del_id('VERIFICATION_MESSAGE')
 
         except Exception as e:
             logger.info('Verify message not found! Deleting old IDs..')
-            Database().del_id('VERIFICATION_CHANNEL')
-            Database().del_id('VERIFICATION_MESSAGE')
+            await self.database.del_id('VERIFICATION_CHANNEL')
+            await self.database.del_id('VERIFICATION_MESSAGE')
             return
 
     @send_verification.error
@@ -6,13 +6,14 @@ from discord.ext import commands
 from ezjsonpy import translate_message
 from loguru import logger
 
-from ....database.db import Database
+from ....database.async_db import AsyncDatabase
 from ....constants import ChannelConstants
 
 
 class MemberJoinListener(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.database: AsyncDatabase = bot.database
 
     @commands.Cog.listener()
     @logger.catch
@@ -29,7 +30,7 @@ class MemberJoinListener(commands.Cog):
         Sends a welcome message to the specified member.
         :param member: The member to send the welcome message to.
         """
-        Database().add_discord_user(discord_id=member.id, username=member.name, joined_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        await self.database.add_discord_user(discord_id=member.id, username=member.name, joined_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
         welcome_channel: Optional[discord.TextChannel] = discord.utils.get(
             member.guild.text_channels,
             id=ChannelConstants.WELCOME_CHANNEL_ID
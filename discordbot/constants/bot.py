@@ -7,6 +7,7 @@ load_dotenv()
 
 TOKEN = os.getenv('DISCORD_TOKEN')
 PERMISSIONS_ROLE_ID = os.getenv('PERMISSIONS_ROLE_ID')
+PROFILE_TRANSCRIPTS = os.getenv('PROFILE_TRANSCRIPTS', '').lower() in ('1', 'true', 'yes')
 
 
 @dataclass
@@ -19,3 +20,4 @@ class BotConstants:
     DB_FILENAME: str = 'database.db'
     AUTHOR: str = 'Veryx Network'
     DOMAIN: str = 'veryx.us'
+    PROFILE_TRANSCRIPTS: bool = PROFILE_TRANSCRIPTS
@@ -1,4 +1,5 @@
+from .async_db import AsyncDatabase
 from .db import Database
 from .models import IdObject, DiscordUser
 
-__all__ = ['Database', 'IdObject', 'DiscordUser']
\ No newline at end of file
+__all__ = ['AsyncDatabase', 'Database', 'IdObject', 'DiscordUser']
\ No newline at end of file
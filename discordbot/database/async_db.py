@@ -0,0 +1,201 @@
+import asyncio
+import collections
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Optional, TypeVar
+
+from loguru import logger
+
+from .db import Database
+from .models.discord_user import DiscordUser
+from .models.ids import IdObject
+
+READER_THREADS: int = 4
+# Latest query latencies kept per pool for the metrics
+LATENCY_SAMPLES: int = 1000
+
+T = TypeVar('T')
+
+
+class PoolMetrics:
+    """Queue depth and latency of the queries sent to one of the database threads."""
+
+    def __init__(self) -> None:
+        self.queue_depth: int = 0
+        self.completed: int = 0
+        self.failed: int = 0
+        self.latencies: Deque[float] = collections.deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, seconds: float) -> None:
+        self.completed += 1
+        self.latencies.append(seconds)
+
+    def snapshot(self) -> dict:
+        """
+        Current metrics, latencies cover the latest LATENCY_SAMPLES queries.
+        :return: queue_depth, completed, failed and the average, p95 and max latency in milliseconds.
+        """
+        latencies: list[float] = sorted(self.latencies)
+        return {
+            'queue_depth': self.queue_depth,
+            'completed': self.completed,
+            'failed': self.failed,
+            'avg_ms': sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+            'max_ms': latencies[-1] * 1000 if latencies else 0.0,
+        }
+
+
+class AsyncDatabase:
+    def __init__(self, path: Optional[str] = None, readers: int = READER_THREADS) -> None:
+        """
+        Non-blocking access to the bot database, SQLite never runs on the event loop.
+        Writes go through a single writer thread in order, reads are spread over a small pool of reader threads
+        with a connection each.
+        :param path: Path of the SQLite file, default is db/<DB_FILENAME>.
+        :param readers: Number of reader threads.
+        """
+        self.path: Optional[str] = path
+        self.readers: int = readers
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._reader_pool: Optional[ThreadPoolExecutor] = None
+        self._write_database: Optional[Database] = None
+        self._read_databases: list[Database] = []
+        self._local: threading.local = threading.local()
+        self._lock: threading.Lock = threading.Lock()
+        self._metrics: dict[str, PoolMetrics] = {'write': PoolMetrics(), 'read': PoolMetrics()}
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the database threads are running."""
+        return self._writer is not None
+
+    async def open(self) -> None:
+        """Starts the writer and reader threads and migrates the schema, does nothing if it is already open."""
+        if self._writer is not None:
+            return
+
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='database-writer')
+        self._write_database = Database(self.path, check_same_thread=False)
+        await self._write(lambda database: database.open())
+
+        # Reader connections are opened by their own thread once the writer migrated the schema
+        self._reader_pool = ThreadPoolExecutor(
+            max_workers=self.readers,
+            thread_name_prefix='database-reader',
+            initializer=self._open_reader
+        )
+
+    async def close(self) -> None:
+        """Waits for the queued queries, then stops the threads and closes every connection."""
+        if self._writer is None:
+            return
+
+        writer, reader_pool = self._writer, self._reader_pool
+        self._writer = self._reader_pool = None
+
+        def shutdown() -> None:
+            writer.shutdown(wait=True)
+            reader_pool.shutdown(wait=True)
+
+        await asyncio.get_running_loop().run_in_executor(None, shutdown)
+        self._write_database.close()
+
+        for database in self._read_databases:
+            database.close()
+
+        self._read_databases.clear()
+        logger.info(f'Database metrics on close: {self.metrics()}')
+
+    async def health_check(self) -> bool:
+        """
+        Checks that both the writer and the readers answer queries.
+        :return: True if the database is healthy.
+        """
+        if self._writer is None:
+            return False
+
+        return (
+            await self._write(lambda database: database.health_check())
+            and await self._read(lambda database: database.health_check())
+        )
+
+    def metrics(self) -> dict:
+        """
+        Queue depth and latency of the writer and of the reader pool.
+        :return: A dictionary with the 'write' and 'read' metrics, see PoolMetrics.snapshot.
+        """
+        return {kind: metrics.snapshot() for kind, metrics in self._metrics.items()}
+
+    def _open_reader(self) -> None:
+        """Opens the connection of the reader thread this runs in."""
+        database: Database = Database(self.path, check_same_thread=False)
+        database.open(migrate=False)
+        self._local.database = database
+
+        with self._lock:
+            self._read_databases.append(database)
+
+    async def _write(self, query: Callable[[Database], T]) -> T:
+        return await self._run('write', self._writer, lambda: query(self._write_database))
+
+    async def _read(self, query: Callable[[Database], T]) -> T:
+        return await self._run('read', self._reader_pool, lambda: query(self._local.database))
+
+    async def _run(self, kind: str, executor: Optional[ThreadPoolExecutor], call: Callable[[], T]) -> T:
+        if executor is None:
+            raise RuntimeError('The database is not open.')
+
+        metrics: PoolMetrics = self._metrics[kind]
+        metrics.queue_depth += 1
+        start: float = time.perf_counter()
+
+        try:
+            result: T = await asyncio.get_running_loop().run_in_executor(executor, call)
+
+        except BaseException:
+            metrics.failed += 1
+            raise
+
+        finally:
+            metrics.queue_depth -= 1
+
+        metrics.record(time.perf_counter() - start)
+        return result
+
+    async def add_id(self, id_to_add: int, name: str, id_type: str) -> None:
+        """Adds a new category, channel, message or role, see Database.add_id."""
+        await self._write(lambda database: database.add_id(id_to_add, name, id_type))
+
+    async def del_id(self, name: str) -> None:
+        """Deletes a category, channel, message or role by its name, see Database.del_id."""
+        await self._write(lambda database: database.del_id(name))
+
+    async def get_id_by_name(self, name: str) -> Optional[IdObject]:
+        """Fetches a category, channel, message or role by its name, see Database.get_id_by_name."""
+        return await self._read(lambda database: database.get_id_by_name(name))
+
+    async def get_id_by_id(self, object_id: int) -> Optional[IdObject]:
+        """Fetches a category, channel, message or role by its object_id, see Database.get_id_by_id."""
+        return await self._read(lambda database: database.get_id_by_id(object_id))
+
+    async def add_discord_user(self, discord_id: int, username: str, joined_at: str) -> None:
+        """Adds a new Discord user or updates it, see Database.add_discord_user."""
+        await self._write(lambda database: database.add_discord_user(discord_id, username, joined_at))
+
+    async def get_discord_user_by_id(self, discord_id: int) -> Optional[DiscordUser]:
+        """Fetches a Discord user by their Discord ID, see Database.get_discord_user_by_id."""
+        return await self._read(lambda database: database.get_discord_user_by_id(discord_id))
+
+    async def get_discord_users_count(self) -> int:
+        """Fetches the count of all discord users, see Database.get_discord_users_count."""
+        return await self._read(lambda database: database.get_discord_users_count())
+
+    async def update_discord_user(self, discord_id: int, username: str, joined_at: str) -> None:
+        """Updates an existing Discord user, see Database.update_discord_user."""
+        await self._write(lambda database: database.update_discord_user(discord_id, username, joined_at))
+
+    async def del_discord_user(self, discord_id: int) -> None:
+        """Deletes a Discord user by their Discord ID, see Database.del_discord_user."""
+        await self._write(lambda database: database.del_discord_user(discord_id))
@@ -8,27 +8,89 @@ from contextlib import contextmanager
 from loguru import logger
 
 from discordbot.database.models.ids import IdObject
+from .migrations import MIGRATIONS
 from .models.discord_user import DiscordUser
 from .models.ids import IdObject
 from ..constants import BotConstants
 
+DB_DIRECTORY: str = 'db'
+
 
 class Database:
-    def __init__(self) -> None:
-        if not os.path.exists('db'):
-            os.makedirs('db')
+    def __init__(self, path: Optional[str] = None, check_same_thread: bool = True) -> None:
+        """
+        Synchronous access to the bot database over a single connection.
+        :param path: Path of the SQLite file, default is db/<DB_FILENAME>.
+        :param check_same_thread: Only allow the thread that opened the connection to use it.
+        """
+        self.path: str = path or os.path.join(DB_DIRECTORY, BotConstants.DB_FILENAME)
+        self.check_same_thread: bool = check_same_thread
+        self.conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the database connection is open."""
+        return self.conn is not None
+
+    def open(self, migrate: bool = True) -> None:
+        """
+        Opens the database connection, does nothing if it is already open.
+        :param migrate: Switch the database to WAL mode and apply the pending migrations, read-only connections skip it.
+        """
+        if self.conn is not None:
+            return
 
-        if not os.path.exists(f'db/{BotConstants.DB_FILENAME}'):
-            open(f'db/{BotConstants.DB_FILENAME}', 'w').close()
+        directory: str = os.path.dirname(self.path)
+
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
 
         try:
-            self.conn: sqlite3.Connection = sqlite3.connect(f'db/{BotConstants.DB_FILENAME}')
+            self.conn = sqlite3.connect(self.path, check_same_thread=self.check_same_thread)
+
+            if migrate:
+                # Readers keep reading while a write is in progress
+                self.conn.execute('PRAGMA journal_mode=WAL;')
 
         except sqlite3.Error as e:
             logger.critical(f'Failed to connect to the database: {e}')
             sys.exit(1)
 
-        self._create_table()
+        if migrate:
+            self._migrate()
+
+        logger.info('Database connection opened successfully.')
+
+    def close(self) -> None:
+        """Closes the database connection, does nothing if it is not open."""
+        if self.conn is None:
+            return
+
+        try:
+            self.conn.close()
+            logger.info('Database connection closed successfully.')
+
+        except sqlite3.Error as e:
+            logger.error(f'Failed to close database connection: {e}')
+
+        finally:
+            self.conn = None
+
+    def health_check(self) -> bool:
+        """
+        Checks that the database connection is open and answers queries.
+        :return: True if the database is healthy.
+        """
+        if self.conn is None:
+            return False
+
+        try:
+            with self._get_cursor() as cursor:
+                cursor.execute('SELECT 1;')
+                return cursor.fetchone() == (1,)
+
+        except sqlite3.Error:
+            return False
 
     @contextmanager
     def _get_cursor(self):
@@ -48,44 +110,58 @@ class Database:
             if cursor:
                 cursor.close()
 
-    def _create_table(self) -> None:
-        """Creates the users table if it doesn't exist."""
+    def _migrate(self) -> None:
+        """Applies the migrations the database is missing, in order and each one in its own transaction."""
         try:
             with self._get_cursor() as cursor:
                 cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS ids (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        object_id INTEGER NOT NULL,
-                        name TEXT NOT NULL, 
-                        type TEXT NOT NULL
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        version INTEGER PRIMARY KEY,
+                        description TEXT NOT NULL,
+                        applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
                     );
                 ''')
+                self.conn.commit()
                 cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS discord_users (
-                        discord_id INTEGER PRIMARY KEY,
-                        username TEXT NOT NULL,
-                        joined_at TEXT NOT NULL
-                    );
+                    SELECT COALESCE(MAX(version), 0) FROM schema_version;
                 ''')
-                self.conn.commit()
+                current_version: int = cursor.fetchone()[0]
+
+                for migration in sorted(MIGRATIONS, key=lambda migration: migration.version):
+                    if migration.version <= current_version:
+                        continue
+
+                    cursor.execute('BEGIN;')
+
+                    for statement in migration.statements:
+                        cursor.execute(statement)
+
+                    cursor.execute('''
+                        INSERT INTO schema_version (version, description) VALUES (?, ?);
+                    ''', (migration.version, migration.description))
+                    self.conn.commit()
+                    logger.info(f'Applied database migration {migration.version}: {migration.description}')
 
         except sqlite3.Error as e:
-            logger.critical(f'Failed to create table: {e}')
+            logger.critical(f'Failed to migrate the database: {e}')
             sys.exit(1)
 
-    def _execute_query(self, query: str, params: tuple = ()) -> None:
+    def _execute_query(self, query: str, params: tuple = ()) -> int:
         """
-        Executes an insert or update query on the database.
+        Executes an insert, update or delete query on the database in its own transaction.
         :param query: The SQL query to execute.
         :param params: The parameters for the query, default is an empty tuple.
+        :return: The number of rows the query changed, 0 if it failed.
         """
         try:
             with self._get_cursor() as cursor:
                 cursor.execute(query, params)
                 self.conn.commit()
+                return cursor.rowcount
 
         except sqlite3.Error as e:
             logger.error(f'Error executing query: {e}')
+            return 0
 
     def _fetch_data(self, query: str, params: tuple = ()) -> list:
         """
@@ -114,15 +190,11 @@ class Database:
             logger.critical(f'Invalid id type in add_id -> {id_type}')
             return
 
-        # Check if the name already exists
-        existing_entry: Optional[IdObject] = self.get_id_by_name(name)
-
-        if existing_entry:
-            self.del_id(name)
-
+        # Replaces the entry in place if the name already exists
         self._execute_query('''
         INSERT INTO ids (object_id, name, type)
-        VALUES (?, ?, ?);
+        VALUES (?, ?, ?)
+        ON CONFLICT (name) DO UPDATE SET object_id = excluded.object_id, type = excluded.type;
         ''', (id_to_add, name, id_type))
 
     def del_id(self, name: str) -> None:
@@ -130,16 +202,14 @@ class Database:
         Deletes a category, channel, message or role from the database by its name.
         :param name: The name of the object to delete (ticket, category, channel, message or role)
         """
-        existing_entry: Optional[IdObject] = self.get_id_by_name(name)
+        deleted: int = self._execute_query('''
+        DELETE FROM ids WHERE name = ?;
+        ''', (name,))
 
-        if not existing_entry:
+        if not deleted:
             logger.warning(f'No entry found with the name "{name}" to delete.')
             return
 
-        # Delete the entry if it exists
-        self._execute_query('''
-        DELETE FROM ids WHERE name = ?;
-        ''', (name,))
         logger.info(f'Entry with name "{name}" has been deleted from the database.')
 
     def get_id_by_name(self, name: str) -> Optional[IdObject]:
@@ -188,21 +258,15 @@ class Database:
 
     def add_discord_user(self, discord_id: int, username: str, joined_at: str) -> None:
         """
-        Adds a new Discord user to the database.
+        Adds a new Discord user to the database, or updates it if it already exists.
         :param discord_id: The Discord user ID.
         :param username: The Discord username.
         :param joined_at: The timestamp when the user joined the server.
         """
-        existing_user = self.get_discord_user_by_id(discord_id)
-
-        if existing_user:
-            logger.info(f'User with ID {discord_id} already exists. Updating information.')
-            self.update_discord_user(discord_id, username, joined_at)
-            return
-
         self._execute_query('''
         INSERT INTO discord_users (discord_id, username, joined_at)
-        VALUES (?, ?, ?);
+        VALUES (?, ?, ?)
+        ON CONFLICT (discord_id) DO UPDATE SET username = excluded.username, joined_at = excluded.joined_at;
         ''', (discord_id, username, joined_at))
 
     def get_discord_user_by_id(self, discord_id: int) -> Optional[DiscordUser]:
@@ -261,22 +325,12 @@ class Database:
         Deletes a Discord user from the database by their Discord ID.
         :param discord_id: The Discord user ID.
         """
-        existing_user = self.get_discord_user_by_id(discord_id)
-
-        if not existing_user:
-            logger.warning(f'No user found with ID {discord_id} to delete.')
-            return
-
-        self._execute_query('''
+        deleted: int = self._execute_query('''
         DELETE FROM discord_users WHERE discord_id = ?;
         ''', (discord_id,))
-        logger.info(f'User with ID {discord_id} has been deleted from the database.')
 
-    def _close(self) -> None:
-        """Closes the database connection."""
-        try:
-            self.conn.close()
-            logger.info('Database connection closed successfully.')
+        if not deleted:
+            logger.warning(f'No user found with ID {discord_id} to delete.')
+            return
 
-        except sqlite3.Error as e:
-            logger.error(f'Failed to close database connection: {e}')
\ No newline at end of file
+        logger.info(f'User with ID {discord_id} has been deleted from the database.')
\ No newline at end of file
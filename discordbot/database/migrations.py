@@ -0,0 +1,49 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    statements: tuple[str, ...]
+
+
+# Ordered schema changes, each one runs once and is recorded in schema_version.
+# Never edit a released migration, append a new one with the next version instead.
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(1, 'Create the ids and discord_users tables', (
+        '''
+        CREATE TABLE IF NOT EXISTS ids (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            object_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            type TEXT NOT NULL
+        );
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS discord_users (
+            discord_id INTEGER PRIMARY KEY,
+            username TEXT NOT NULL,
+            joined_at TEXT NOT NULL
+        );
+        ''',
+    )),
+    Migration(2, 'Unique index on ids.name', (
+        # Databases created before the unique index may hold a name twice, keep its latest entry
+        '''
+        DELETE FROM ids
+        WHERE id NOT IN (SELECT MAX(id) FROM ids GROUP BY name);
+        ''',
+        '''
+        CREATE UNIQUE INDEX IF NOT EXISTS ids_name ON ids (name);
+        ''',
+    )),
+    Migration(3, 'Index ids.object_id and ids.type', (
+        '''
+        CREATE INDEX IF NOT EXISTS ids_object_id ON ids (object_id);
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS ids_type ON ids (type);
+        ''',
+    )),
+)